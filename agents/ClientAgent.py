@@ -1,10 +1,18 @@
 import logging
 from mesa import Agent
 from models.Product import Product
-from models.Opinion import Opinion
 
 logger = logging.getLogger(__name__)
 
+# Daily requirement a client's need is reset to, by product id.
+# Products not listed here (e.g. Cheese) keep their initial random need.
+DAILY_NEED_QUANTITIES = {
+    1: 5,  # Milk
+    2: 3,  # Eggs
+    3: 4,  # Bread
+    4: 2,  # Butter
+}
+
 class ClientAgent(Agent):
     def __init__(self, unique_id, model, money, product_to_sell, product_needs):
         super().__init__(unique_id, model)
@@ -12,96 +20,129 @@ class ClientAgent(Agent):
         self.product_to_sell = product_to_sell
         self.product_needs = product_needs  # List of Product instances with id, name, and quantity
         self.inventory = []  # List of Product instances the client owns
+        self.inventory_by_id = {}  # product_id -> Product in self.inventory
         self.opinions = {}  # Dict of shop_id -> Opinion instances
         self.opinion_exchange_count = {}
 
     def replenish_needs(self):
+        changed = False
         for need in self.product_needs:
             # Reset quantities to original daily requirements
-            if need.product_id == 1:  # Milk
-                need.quantity = 5
-            elif need.product_id == 2:  # Eggs
-                need.quantity = 3
-            elif need.product_id == 3:  # Bread
-                need.quantity = 4
-            elif need.product_id == 4:  # Butter
-                need.quantity = 2
-
-    def buy_products(self):
+            if need.product_id in DAILY_NEED_QUANTITIES and need.quantity != DAILY_NEED_QUANTITIES[need.product_id]:
+                need.quantity = DAILY_NEED_QUANTITIES[need.product_id]
+                changed = True
+        if changed and self.model.statistics is not None:
+            self.model.statistics.needs_changed(self)
+
+    def get_inventory_item(self, product_id):
+        return self.inventory_by_id.get(product_id)
+
+    def add_to_inventory(self, product):
+        self.inventory.append(product)
+        self.inventory_by_id.setdefault(product.product_id, product)
+
+    def daily_demand(self):
+        """
+        Yields (need, quantity) for every need the client wants to buy today.
+        """
         for need in self.product_needs:
             # Check if the inventory has less than the required quantity
-            inventory_item = next((item for item in self.inventory if item.product_id == need.product_id), None)
+            inventory_item = self.inventory_by_id.get(need.product_id)
             if inventory_item and inventory_item.quantity >= need.quantity * 5:
                 continue  # Skip buying if we have enough in inventory
 
             # Determine the quantity to buy (5 to 8 times the needed quantity)
-            buy_quantity = self.random.randint(5, 8) * need.quantity
+            quantity = self.random.randint(5, 8) * need.quantity
+            if self.model.statistics is not None:
+                self.model.statistics.demanded(need.product_id, quantity)
+            yield need, quantity
+
+    def receive_product(self, need, quantity):
+        # Update the client's inventory
+        inventory_item = self.inventory_by_id.get(need.product_id)
+        if inventory_item:
+            inventory_item.quantity += quantity
+        else:
+            self.add_to_inventory(Product(
+                product_id=need.product_id,
+                name=need.name,
+                quality=0,  # Assuming quality is not tracked for client inventory
+                price=need.price,
+                quantity=quantity
+            ))
+        if self.model.statistics is not None:
+            self.model.statistics.inventory_changed(self)
 
+    def buy_products(self):
+        for need, buy_quantity in self.daily_demand():
             # Try to buy the product from each shop until successful
             for shop in self.model.shops:
                 if shop.sell_product(self, need.product_id, buy_quantity):
-                    # Update the client's inventory
-                    if inventory_item:
-                        inventory_item.quantity += buy_quantity
-                    else:
-                        self.inventory.append(Product(
-                            product_id=need.product_id,
-                            name=need.name,
-                            quality=0,  # Assuming quality is not tracked for client inventory
-                            price=need.price,
-                            quantity=buy_quantity
-                        ))
+                    self.receive_product(need, buy_quantity)
                     break  # Stop searching after a successful purchase
 
-
     def produce_product(self):
         # Check if all required ingredients are available in the inventory
+        ingredients = []
         for need in self.product_needs:
-            inventory_item = next((item for item in self.inventory if item.product_id == need.product_id), None)
+            inventory_item = self.inventory_by_id.get(need.product_id)
             if not inventory_item or inventory_item.quantity < need.quantity:
-                logger.info(f"Client {self.unique_id}: Not enough {need.name} to produce product")
+                if self.model.trace:
+                    logger.info("Client %s: Not enough %s to produce product", self.unique_id, need.name)
                 return
+            ingredients.append((need, inventory_item))
 
         total_cost = 0
         # Deduct ingredients from inventory and calculate total cost
-        for need in self.product_needs:
-            inventory_item = next((item for item in self.inventory if item.product_id == need.product_id), None)
+        for need, inventory_item in ingredients:
             inventory_item.adjust_quantity(-need.quantity)
             total_cost += inventory_item.price * need.quantity
-            logger.info(f"Client {self.unique_id}: Deducted {need.quantity} of {need.name} from inventory, total cost so far: {total_cost:.2f}")
+            if self.model.trace:
+                logger.info("Client %s: Deducted %s of %s from inventory, total cost so far: %.2f", self.unique_id, need.quantity, need.name, total_cost)
 
         # Calculate profit (80-90% of the total cost) and add a surcharge (10-30%)
         profit_margin = self.random.uniform(0.8, 0.9)
         surcharge = self.random.uniform(0.1, 0.3)
         profit = total_cost * profit_margin * (1 + surcharge)
         self.money += profit
-        logger.info(f"Client {self.unique_id}: Profit margin: {profit_margin:.2f}, Surcharge: {surcharge:.2f}, Total cost: {total_cost:.2f}")
-        logger.info(f"Client {self.unique_id}: Produced product and earned {profit:.2f}")
+        if self.model.statistics is not None:
+            self.model.statistics.produced(self, profit)
+        if self.model.profiler is not None:
+            self.model.profiler.count("productions")
+        if self.model.trace:
+            logger.info("Client %s: Profit margin: %.2f, Surcharge: %.2f, Total cost: %.2f", self.unique_id, profit_margin, surcharge, total_cost)
+            logger.info("Client %s: Produced product and earned %.2f", self.unique_id, profit)
 
     def choose_best_shop(self):
         if not self.opinions:
-            logger.info(f"Client {self.unique_id}: No opinions yet.")
+            if self.model.trace:
+                logger.info("Client %s: No opinions yet.", self.unique_id)
             return None
 
         # Find the best shop
         best_shop = max(self.opinions.values(), key=lambda opinion: opinion.get_score())
         if best_shop.get_score() == 0:
-            logger.info(f"Client {self.unique_id}: All opinions are neutral, choosing a random shop.")
+            if self.model.trace:
+                logger.info("Client %s: All opinions are neutral, choosing a random shop.", self.unique_id)
             return self.random.choice(list(self.opinions.keys()))
-        logger.info(f"Client {self.unique_id}: Best shop is {best_shop.shop_id} with score {best_shop.get_score()}")
+        if self.model.trace:
+            logger.info("Client %s: Best shop is %s with score %s", self.unique_id, best_shop.shop_id, best_shop.get_score())
         return best_shop.shop_id
 
     def update_opinion(self, shop_id, experience, reason):
         if shop_id not in self.opinions:
-            self.opinions[shop_id] = Opinion(shop_id=shop_id, initial_score=0.0)
+            self.opinions[shop_id] = self.model.create_opinion(shop_id)
         self.opinions[shop_id].adjust_score(change=experience, reason=reason)
+        if self.model.opinion_network is not None:
+            self.model.opinion_network.set_score(self, shop_id)
 
     def share_opinion(self, other_client):
         for shop_id, opinion in self.opinions.items():
             if shop_id not in other_client.opinions:
-                other_client.opinions[shop_id] = Opinion(shop_id=shop_id, initial_score=0.0)
+                other_client.opinions[shop_id] = self.model.create_opinion(shop_id)
             if other_client.opinions[shop_id].get_score() < opinion.get_score():
-                logger.info(f"Client {self.unique_id}: sharing opinion about Shop {shop_id} with Client {other_client.unique_id}")
+                if self.model.trace:
+                    logger.info("Client %s: sharing opinion about Shop %s with Client %s", self.unique_id, shop_id, other_client.unique_id)
                 other_client.opinions[shop_id].adjust_score(
                     change=0.5, reason="Opinion shared by another client."
                 )
@@ -109,23 +150,40 @@ class ClientAgent(Agent):
                 if shop_id not in self.opinion_exchange_count:
                     self.opinion_exchange_count[shop_id] = 0
                 self.opinion_exchange_count[shop_id] += 1
+                if self.model.profiler is not None:
+                    self.model.profiler.count("opinions_shared")
+
+    def shop_for_needs(self):
+        # Choose a shop and attempt to buy products if needed,
+        # in "clearing" mode the model has already matched today's demand
+        if self.model.market_mode == "sequential":
+            self.buy_products()
+
+    def share_with_neighbors(self):
+        # Share opinions with nearby clients, or let the model's opinion network do it after everyone stepped
+        if self.model.opinion_network is not None:
+            self.model.opinion_network.queue(self)
+        else:
+            neighbors = self.model.grid.get_neighbors(self.pos, moore=True, include_center=False)
+            for neighbor in neighbors:
+                if isinstance(neighbor, ClientAgent):
+                    if self.model.trace:
+                        logger.info("Client %s: sharing opinions with Client %s", self.unique_id, neighbor.unique_id)
+                    self.share_opinion(neighbor)
+
+    def finish_day(self):
+        # Log the client's money at the end of the day
+        if self.model.trace:
+            logger.info("Client %s: Money = %.2f", self.unique_id, self.money)
+            logger.info("Client %s: Ending daily step.", self.unique_id)
 
-    def step(self):
-        logger.info(f"Client {self.unique_id}: Starting daily step.")
-
-        # Choose a shop and attempt to buy products if needed
-        self.buy_products()
+    def begin_day(self):
+        if self.model.trace:
+            logger.info("Client %s: Starting daily step.", self.unique_id)
 
+    def step(self):
+        self.begin_day()
+        self.shop_for_needs()
         self.produce_product()
-
-        # Share opinions with nearby clients
-        neighbors = self.model.grid.get_neighbors(self.pos, moore=True, include_center=False)
-        for neighbor in neighbors:
-            if isinstance(neighbor, ClientAgent):
-                logger.info(f"Client {self.unique_id}: sharing opinions with Client {neighbor.unique_id}")
-                self.share_opinion(neighbor)
-
-        # Log the client's money at the end of the day
-        logger.info(f"Client {self.unique_id}: Money = {self.money:.2f}")
-
-        logger.info(f"Client {self.unique_id}: Ending daily step.")
\ No newline at end of file
+        self.share_with_neighbors()
+        self.finish_day()
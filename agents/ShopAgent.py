@@ -5,70 +5,135 @@ from models.Product import Product
 logger = logging.getLogger(__name__)
 
 class ShopAgent(Agent):
+    """
+    Restocking and repricing are event driven: every stock change of a shelf goes
+    through stock_changed(), which files the shelf under restock_due (quantity at
+    or below RESTOCK_THRESHOLD) and reprice_due (quantity outside the low/high
+    stock thresholds, or a price not rounded yet). restock_products() and
+    adjust_prices() only visit those shelves, in shelf order, which gives the same
+    prices, stock and random draws as scanning every shelf every day: any other
+    shelf would keep its quantity and its already rounded price. Code that changes
+    a shelf's quantity or price directly must call stock_changed() afterwards.
+    """
+
+    RESTOCK_THRESHOLD = 25
+    LOW_STOCK_THRESHOLD = 20
+    HIGH_STOCK_THRESHOLD = 100
+
     def __init__(self, unique_id, model, scam_probability=0.1, initial_money=1000):
         super().__init__(unique_id, model)
         self.money = initial_money
         self.products = []  # List of Product instances available in the shop
+        self.products_by_id = {}  # product_id -> Product, the first one added wins
+        self.shelf_index = {}  # Product -> its index in self.products
+        self.restock_due = set()  # Shelf indices restock_products() has to visit
+        self.reprice_due = set()  # Shelf indices adjust_prices() has to visit
         self.scam_probability = scam_probability
-        self.sales_log = []  # List of transactions for logging purposes
+
+    def shop_transactions(self):
+        """
+        Queries the model's transaction ledger for this shop's sales, returned as dicts
+        (it scans the whole ledger). Replaces the former sales_log list.
+        """
+        return self.model.ledger.shop_transactions(self.unique_id)
 
     def add_product(self, product):
+        self.shelf_index[product] = len(self.products)
         self.products.append(product)
+        self.products_by_id.setdefault(product.product_id, product)
+        self.stock_changed(product)
+
+    def stock_changed(self, product):
+        """
+        Files a shelf whose quantity or price changed under the shelves to restock and reprice.
+        """
+        shelf = self.shelf_index[product]
+        quantity = product.quantity
+        if quantity <= self.RESTOCK_THRESHOLD:
+            self.restock_due.add(shelf)
+        else:
+            self.restock_due.discard(shelf)
+        # The price may not be rounded yet, adjust_prices() drops the shelf once it is
+        self.reprice_due.add(shelf)
+
+    def get_product(self, product_id):
+        return self.products_by_id.get(product_id)
 
     def sell_product(self, client, product_id, quantity):
-        product = next((p for p in self.products if p.product_id == product_id), None)
+        if self.model.profiler is not None:
+            self.model.profiler.count("sell_attempts")
+        product = self.products_by_id.get(product_id)
         if not product:
-            logger.info(f"Shop {self.unique_id}: Product with ID {product_id} not found.")
+            if self.model.trace:
+                logger.info("Shop %s: Product with ID %s not found.", self.unique_id, product_id)
             return False
 
         if product.quantity < quantity:
-            logger.info(f"Shop {self.unique_id}: Not enough stock for {product.name}. Requested: {quantity}, Available: {product.quantity}")
+            if self.model.trace:
+                logger.info("Shop %s: Not enough stock for %s. Requested: %s, Available: %s", self.unique_id, product.name, quantity, product.quantity)
             return False
 
         cost = product.price * quantity
         if client.money >= cost:
-            logger.info(f"Shop {self.unique_id}: Selling {quantity} of {product.name} to Client {client.unique_id}")
+            if self.model.trace:
+                logger.info("Shop %s: Selling %s of %s to Client %s", self.unique_id, quantity, product.name, client.unique_id)
             client.money -= cost
             self.money += cost
             product.adjust_quantity(-quantity)
+            self.stock_changed(product)
+            if self.model.statistics is not None:
+                self.model.statistics.product_sold(self, client, product, quantity, cost)
+            if self.model.profiler is not None:
+                self.model.profiler.count("sell_successes")
             self.log_transaction(client, product, quantity, product.price, product.quality, scammed=False)
             return True
         else:
-            logger.info(f"Shop {self.unique_id}: Client {client.unique_id} cannot afford {product.name}. Cost: {cost}, Client Money: {client.money}")
+            if self.model.trace:
+                logger.info("Shop %s: Client %s cannot afford %s. Cost: %s, Client Money: %s", self.unique_id, client.unique_id, product.name, cost, client.money)
             return False
 
     def restock_products(self):
-        for product in self.products:
-            if product.quantity <= 25:  # Restock only if quantity is below 20
+        # Only shelves at or below the threshold, in shelf order like a scan of self.products
+        for shelf in sorted(self.restock_due):
+            product = self.products[shelf]
+            if product.quantity <= self.RESTOCK_THRESHOLD:
                 restock_quantity = self.random.randint(30, 150)  # Random restock quantity
                 restock_cost = restock_quantity * product.price * 0.2  # 20% of the price
                 if self.money >= restock_cost:
                     product.adjust_quantity(restock_quantity)
+                    self.stock_changed(product)
                     self.money -= restock_cost
-                    logger.info(f"Shop {self.unique_id}: Restocked {restock_quantity} of {product.name} for {restock_cost:.2f}")
+                    if self.model.statistics is not None:
+                        self.model.statistics.restocked(self, product, restock_quantity, restock_cost)
+                    if self.model.trace:
+                        logger.info("Shop %s: Restocked %s of %s for %.2f", self.unique_id, restock_quantity, product.name, restock_cost)
                 else:
-                    logger.info(f"Shop {self.unique_id}: Not enough money to restock {product.name}")
+                    if self.model.trace:
+                        logger.info("Shop %s: Not enough money to restock %s", self.unique_id, product.name)
 
     def adjust_prices(self):
-        for product in self.products:
+        # Tracing logs every shelf's price, otherwise only shelves whose price can change are visited
+        shelves = range(len(self.products)) if self.model.trace else sorted(self.reprice_due)
+        for shelf in shelves:
+            product = self.products[shelf]
+            previous_price = product.price
             # Simple price adjustment logic: higher demand leads to higher prices
-            if product.quantity < 20:  # Low stock, increase price
+            if product.quantity < self.LOW_STOCK_THRESHOLD:  # Low stock, increase price
                 product.price *= 1.1
-            elif product.quantity > 100:  # High stock, decrease price
+            elif product.quantity > self.HIGH_STOCK_THRESHOLD:  # High stock, decrease price
                 product.price *= 0.9
+            else:
+                # The price is rounded below and stays put until the quantity leaves this range
+                self.reprice_due.discard(shelf)
             product.price = round(product.price, 2)
-            logger.info(f"Shop {self.unique_id}: Adjusted price of {product.name} to {product.price:.2f}")
+            if product.price != previous_price and self.model.statistics is not None:
+                self.model.statistics.price_changed(self)
+            if self.model.trace:
+                logger.info("Shop %s: Adjusted price of %s to %.2f", self.unique_id, product.name, product.price)
 
     def log_transaction(self, client, product, quantity, price, quality, scammed):
-        self.sales_log.append({
-            "day": self.model.day_count,
-            "client_id": client.unique_id,
-            "product_id": product.product_id,
-            "quantity": quantity,
-            "price": price,
-            "quality": quality,
-            "scammed": scammed
-        })
+        self.model.ledger.append(self.model.day_count, self.unique_id, client.unique_id, product.product_id,
+                                 quantity, price, quality, scammed)
 
     def step(self):
         # Adjust prices dynamically based on stock levels
@@ -78,4 +143,5 @@ class ShopAgent(Agent):
         self.restock_products()
 
         # Log the shop's money at the end of the day
-        logger.info(f"Shop {self.unique_id}: Money = {self.money:.2f}")
\ No newline at end of file
+        if self.model.trace:
+            logger.info("Shop %s: Money = %.2f", self.unique_id, self.money)
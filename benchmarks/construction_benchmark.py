@@ -0,0 +1,65 @@
+"""
+Construction time of MarketSimulationModel by placement mode.
+
+"legacy" lists the empty cells again for every agent and is only run up to
+--legacy-max clients. "population" builds the model from a population file
+written from the "bulk" model beforehand. Every mode is built twice to check
+that the layout is the same for the same seed.
+
+Usage (from the project root):
+    python -m benchmarks.construction_benchmark --clients 1000 10000 100000 --shops 20
+"""
+import argparse
+import os
+import tempfile
+import time
+from benchmarks.grid import grid_side
+from models.MarketSimulationModel import MarketSimulationModel
+from models.Population import population_of, save_population
+
+
+def build(num_clients, num_shops, seed, **options):
+    side = grid_side(num_clients + num_shops)
+    start = time.perf_counter()
+    model = MarketSimulationModel(
+        width=side,
+        height=side,
+        num_clients=num_clients,
+        num_shops=num_shops,
+        seed=seed,
+        verbosity="off",
+        **options
+    )
+    return model, time.perf_counter() - start
+
+
+def layout(model):
+    return [agent.pos for agent in model.shops + model.clients]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--shops", type=int, default=20)
+    parser.add_argument("--legacy-max", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'clients':>8} {'placement':>10} {'init s':>8} {'same layout':>12}")
+    for num_clients in args.clients:
+        modes = ["bulk", "population"]
+        if num_clients <= args.legacy_max:
+            modes.insert(0, "legacy")
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "population.npz")
+            for mode in modes:
+                options = {"population": path} if mode == "population" else {"placement": mode}
+                model, elapsed = build(num_clients, args.shops, args.seed, **options)
+                again, _ = build(num_clients, args.shops, args.seed, **options)
+                if mode == "bulk":
+                    save_population(population_of(model), path)
+                print(f"{num_clients:>8} {mode:>10} {elapsed:>8.3f} {str(layout(model) == layout(again)):>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Compares the object-based agents with the vectorized engine.
+
+For every population size both engines are built from the same seed, run for the
+same number of days, checked for identical per-day aggregates and timed.
+
+Usage (from the project root):
+    python -m benchmarks.engine_benchmark --clients 1000 10000 --days 20
+"""
+import argparse
+import logging
+import time
+from benchmarks.grid import grid_side
+from models.MarketSimulationModel import MarketSimulationModel
+
+
+def run(engine, num_clients, num_shops, days, seed):
+    side = grid_side(num_clients + num_shops)
+    model = MarketSimulationModel(
+        width=side,
+        height=side,
+        num_clients=num_clients,
+        num_shops=num_shops,
+        engine=engine,
+        seed=seed,
+        verbosity="off"
+    )
+    aggregates = []
+    elapsed = 0.0
+    for _ in range(days):
+        start = time.perf_counter()
+        model.step()
+        elapsed += time.perf_counter() - start
+        aggregates.append(model.daily_aggregates())
+    return elapsed, aggregates
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--shops-ratio", type=float, default=0.01, help="Shops per client (at least 5 shops)")
+    parser.add_argument("--days", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Keep log formatting out of the measurement
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'clients':>8} {'shops':>6} {'agents s/day':>13} {'vector s/day':>13} {'speedup':>8} {'match':>6}")
+    for num_clients in args.clients:
+        num_shops = max(5, int(num_clients * args.shops_ratio))
+        agents_time, agents_aggregates = run("agents", num_clients, num_shops, args.days, args.seed)
+        vector_time, vector_aggregates = run("vectorized", num_clients, num_shops, args.days, args.seed)
+        match = agents_aggregates == vector_aggregates
+        print(f"{num_clients:>8} {num_shops:>6} {agents_time / args.days:>13.5f} "
+              f"{vector_time / args.days:>13.5f} {agents_time / vector_time:>8.1f} {str(match):>6}")
+
+
+if __name__ == "__main__":
+    main()
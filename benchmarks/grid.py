@@ -0,0 +1,12 @@
+"""
+Grid sizing shared by the benchmarks.
+"""
+import math
+
+
+def grid_side(num_agents, density=0.8):
+    """
+    Side of the smallest square grid on which num_agents fill at most `density` of
+    the cells, so that every agent gets its own cell with some room to spare.
+    """
+    return math.ceil(math.sqrt(num_agents / density))
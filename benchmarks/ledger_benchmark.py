@@ -0,0 +1,89 @@
+"""
+Recording and querying sales: per-sale dicts in lists (the former
+ShopAgent.sales_log) against the TransactionLedger, in memory and spilled to
+memory-mapped files.
+
+The same random sales are recorded by each variant, then revenue per shop per
+day is computed. Memory is the Python heap held after recording (tracemalloc),
+so spilled chunks, which live in the page cache, are not counted.
+
+Usage (from the project root):
+    python -m benchmarks.ledger_benchmark --sales 100000 1000000 --shops 20
+"""
+import argparse
+import random
+import tempfile
+import time
+import tracemalloc
+from models.TransactionLedger import TransactionLedger
+
+
+def random_sales(num_sales, num_shops, seed):
+    rng = random.Random(seed)
+    return [
+        (i // 1000, rng.randrange(num_shops), rng.randrange(10 * num_shops), rng.randint(1, 5),
+         rng.randint(5, 40), round(rng.uniform(1, 6), 2), rng.randint(6, 9), False)
+        for i in range(num_sales)
+    ]
+
+
+def record_dicts(sales, num_shops):
+    logs = [[] for _ in range(num_shops)]
+    for day, shop, client, product, quantity, price, quality, scammed in sales:
+        logs[shop].append({"day": day, "client_id": client, "product_id": product, "quantity": quantity,
+                           "price": price, "quality": quality, "scammed": scammed})
+    return logs
+
+
+def revenue_dicts(logs):
+    revenue = {}
+    for shop, log in enumerate(logs):
+        for sale in log:
+            key = (sale["day"], shop)
+            revenue[key] = revenue.get(key, 0.0) + sale["quantity"] * sale["price"]
+    return revenue
+
+
+def record_ledger(sales, spill_directory):
+    ledger = TransactionLedger(spill_directory=spill_directory)
+    append = ledger.append
+    for sale in sales:
+        append(*sale)
+    return ledger
+
+
+def measure(record, query):
+    tracemalloc.start()
+    start = time.perf_counter()
+    recorded = record()
+    record_seconds = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    start = time.perf_counter()
+    query(recorded)
+    return record_seconds, time.perf_counter() - start, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--shops", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'sales':>9} {'variant':>14} {'record s':>9} {'query s':>8} {'heap MB':>8}")
+    for num_sales in args.sales:
+        sales = random_sales(num_sales, args.shops, args.seed)
+        with tempfile.TemporaryDirectory() as directory:
+            variants = (
+                ("dicts", lambda: record_dicts(sales, args.shops), revenue_dicts),
+                ("ledger", lambda: record_ledger(sales, None), TransactionLedger.revenue_per_shop_per_day),
+                ("ledger spill", lambda: record_ledger(sales, directory), TransactionLedger.revenue_per_shop_per_day),
+            )
+            for name, record, query in variants:
+                record_seconds, query_seconds, memory = measure(record, query)
+                print(f"{num_sales:>9} {name:>14} {record_seconds:>9.3f} {query_seconds:>8.3f} {memory / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
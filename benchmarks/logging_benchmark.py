@@ -0,0 +1,77 @@
+"""
+Measures step time under each verbosity level and log sink.
+
+Sinks: "file" is a plain synchronous logging.FileHandler (what main.py uses),
+"buffered" batches records in memory, "binary" stores unformatted records.
+
+Usage (from the project root):
+    python -m benchmarks.logging_benchmark --clients 2000 --days 10
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from benchmarks.grid import grid_side
+from models.MarketSimulationModel import MarketSimulationModel, VERBOSITY_LEVELS
+from models.LogSinks import buffered_file_handler, BinaryLogHandler
+
+SINKS = ("file", "buffered", "binary")
+
+
+def make_handler(sink, path):
+    if sink == "file":
+        handler = logging.FileHandler(path, mode="w")
+        handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        return handler
+    if sink == "buffered":
+        return buffered_file_handler(path)
+    return BinaryLogHandler(path)
+
+
+def run(verbosity, sink, num_clients, num_shops, days, seed, directory):
+    path = os.path.join(directory, f"{verbosity}-{sink}.log")
+    handler = make_handler(sink, path)
+    root = logging.getLogger()
+    root.addHandler(handler)
+    try:
+        side = grid_side(num_clients + num_shops)
+        model = MarketSimulationModel(
+            width=side,
+            height=side,
+            num_clients=num_clients,
+            num_shops=num_shops,
+            seed=seed,
+            verbosity=verbosity
+        )
+        start = time.perf_counter()
+        for _ in range(days):
+            model.step()
+        handler.flush()
+        elapsed = time.perf_counter() - start
+    finally:
+        root.removeHandler(handler)
+        handler.close()
+    return elapsed / days, os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--shops", type=int, default=20)
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.INFO)
+
+    print(f"{'verbosity':>10} {'sink':>9} {'s/step':>9} {'log MB':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        for verbosity in VERBOSITY_LEVELS:
+            for sink in SINKS:
+                step_time, size = run(verbosity, sink, args.clients, args.shops, args.days, args.seed, directory)
+                print(f"{verbosity:>10} {sink:>9} {step_time:>9.4f} {size / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
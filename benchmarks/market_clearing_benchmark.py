@@ -0,0 +1,51 @@
+"""
+Compares the purchasing cost of the "sequential" and "clearing" market modes as the number of shops grows.
+
+Usage (from the project root):
+    python -m benchmarks.market_clearing_benchmark --clients 2000 --shops 10 100 1000 --days 5
+"""
+import argparse
+import logging
+import time
+from benchmarks.grid import grid_side
+from models.MarketSimulationModel import MarketSimulationModel, MARKET_MODES
+
+
+def run(market_mode, num_clients, num_shops, days, seed):
+    side = grid_side(num_clients + num_shops)
+    model = MarketSimulationModel(
+        width=side,
+        height=side,
+        num_clients=num_clients,
+        num_shops=num_shops,
+        seed=seed,
+        verbosity="off",
+        market_mode=market_mode
+    )
+    start = time.perf_counter()
+    for _ in range(days):
+        model.step()
+    elapsed = time.perf_counter() - start
+    stock = sum(p.quantity for shop in model.shops for p in shop.products)
+    return elapsed / days, stock
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--shops", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'shops':>7} {'mode':>11} {'s/step':>9} {'shop stock':>11}")
+    for num_shops in args.shops:
+        for market_mode in MARKET_MODES:
+            step_time, stock = run(market_mode, args.clients, num_shops, args.days, args.seed)
+            print(f"{num_shops:>7} {market_mode:>11} {step_time:>9.4f} {stock:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Before/after memory report for the slotted Product and Opinion classes.
+
+"before" uses copies of the original __dict__-based classes, "after" the ones in
+models/. Both are measured with tracemalloc, per instance and for the objects a
+MarketSimulationModel of the given size creates (a Product per shop offering and
+per client need, an Opinion per client and shop).
+
+Usage (from the project root):
+    python -m benchmarks.memory_benchmark --instances 100000 --clients 2000 --shops 20
+"""
+import argparse
+import logging
+import tracemalloc
+from benchmarks.grid import grid_side
+from models.MarketSimulationModel import MarketSimulationModel
+from models.Opinion import Opinion
+from models.Product import Product
+
+
+class DictProduct:
+    def __init__(self, product_id, name, quality, price, quantity=0):
+        self.product_id = product_id
+        self.name = name
+        self.quality = quality
+        self.price = price
+        self.quantity = quantity
+
+
+class DictOpinion:
+    def __init__(self, shop_id, initial_score=0.0):
+        self.shop_id = shop_id
+        self.score = initial_score
+        self.history = []
+
+
+def measure(factory, count):
+    tracemalloc.start()
+    objects = [factory(i) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # Discount the list holding them
+    return (current - objects.__sizeof__()) / count
+
+
+def model_memory(num_clients, num_shops):
+    side = grid_side(num_clients + num_shops)
+    tracemalloc.start()
+    model = MarketSimulationModel(width=side, height=side, num_clients=num_clients, num_shops=num_shops,
+                                  seed=0, verbosity="off")
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    products = sum(len(shop.products) for shop in model.shops) + sum(len(c.product_needs) for c in model.clients)
+    opinions = sum(len(client.opinions) for client in model.clients)
+    return current, products, opinions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--instances", type=int, default=100_000)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--shops", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    names = ("Milk", "Eggs", "Bread", "Butter", "Cheese")
+
+    product_before = measure(lambda i: DictProduct(i % 5 + 1, names[i % 5], 7, 2.5 + i, i), args.instances)
+    product_after = measure(lambda i: Product(i % 5 + 1, names[i % 5], 7, 2.5 + i, i), args.instances)
+    opinion_before = measure(lambda i: DictOpinion(i, 0.0), args.instances)
+    opinion_after = measure(lambda i: Opinion(i, 0.0), args.instances)
+    opinion_compact = measure(lambda i: Opinion(i, 0.0, history="compact"), args.instances)
+
+    print(f"{'object':>22} {'before B':>9} {'after B':>9} {'saved':>7}")
+    print(f"{'Product':>22} {product_before:>9.1f} {product_after:>9.1f} {1 - product_after / product_before:>7.0%}")
+    print(f"{'Opinion':>22} {opinion_before:>9.1f} {opinion_after:>9.1f} {1 - opinion_after / opinion_before:>7.0%}")
+    print(f"{'Opinion (compact)':>22} {opinion_before:>9.1f} {opinion_compact:>9.1f} "
+          f"{1 - opinion_compact / opinion_before:>7.0%}")
+
+    total, products, opinions = model_memory(args.clients, args.shops)
+    saved = products * (product_before - product_after) + opinions * (opinion_before - opinion_after)
+    print()
+    print(f"Model with {args.clients} clients and {args.shops} shops: {total / 1e6:.2f} MB traced, "
+          f"{products} products and {opinions} opinions")
+    print(f"Estimated size with the dict-based classes: {(total + saved) / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
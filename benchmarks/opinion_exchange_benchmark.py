@@ -0,0 +1,65 @@
+"""
+Step time of the three opinion exchange modes.
+
+A fraction of the clients starts with a non-neutral opinion, otherwise no share
+would ever happen. "sequential" must end with the same scores as "agents".
+
+Usage (from the project root):
+    python -m benchmarks.opinion_exchange_benchmark --clients 1000 5000 --shops 20 --days 10
+"""
+import argparse
+import logging
+import random
+import time
+from benchmarks.grid import grid_side
+from models.MarketSimulationModel import MarketSimulationModel, OPINION_EXCHANGE_MODES
+
+
+def run(opinion_exchange, num_clients, num_shops, days, seed):
+    side = grid_side(num_clients + num_shops)
+    model = MarketSimulationModel(
+        width=side,
+        height=side,
+        num_clients=num_clients,
+        num_shops=num_shops,
+        seed=seed,
+        verbosity="off",
+        opinion_history="none",
+        opinion_exchange=opinion_exchange
+    )
+    rng = random.Random(seed)
+    for client in model.clients:
+        if rng.random() < 0.1:
+            client.update_opinion(rng.choice(model.shops).unique_id, rng.choice((1.0, 2.0, 5.0)), "Seeded opinion.")
+
+    start = time.perf_counter()
+    for _ in range(days):
+        model.step()
+    elapsed = time.perf_counter() - start
+    scores = [opinion.score for client in model.clients for opinion in client.opinions.values()]
+    return elapsed / days, scores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1000, 5000])
+    parser.add_argument("--shops", type=int, default=20)
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'clients':>8} {'mode':>11} {'s/step':>9} {'mean score':>11} {'same as agents':>15}")
+    for num_clients in args.clients:
+        reference = None
+        for mode in OPINION_EXCHANGE_MODES:
+            step_time, scores = run(mode, num_clients, args.shops, args.days, args.seed)
+            if reference is None:
+                reference = scores
+            print(f"{num_clients:>8} {mode:>11} {step_time:>9.4f} {sum(scores) / len(scores):>11.4f} "
+                  f"{str(scores == reference):>15}")
+
+
+if __name__ == "__main__":
+    main()
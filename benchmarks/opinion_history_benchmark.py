@@ -0,0 +1,54 @@
+"""
+Memory used by Opinion histories under each history policy over a long run.
+
+Opinions in the stock simulation rarely change, so the benchmark drives them
+directly: every day each opinion gets one adjust_score() call, with the reasons
+the agents use. Memory is measured with tracemalloc.
+
+Usage (from the project root):
+    python -m benchmarks.opinion_history_benchmark --opinions 100 --days 10000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from models.Opinion import Opinion, HISTORY_POLICIES
+
+REASONS = ("Opinion shared by another client.", "Good purchase.", "Scammed by the shop.")
+
+
+def run(policy, num_opinions, days, history_size, seed):
+    rng = random.Random(seed)
+    changes = [rng.choice((-1.0, -0.5, 0.5, 1.0)) for _ in range(997)]
+    tracemalloc.start()
+    start = time.perf_counter()
+    opinions = [Opinion(shop_id=i, history=policy, history_size=history_size) for i in range(num_opinions)]
+    for day in range(days):
+        change = changes[day % len(changes)]
+        reason = REASONS[day % len(REASONS)]
+        for opinion in opinions:
+            opinion.adjust_score(change, reason)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    entries = len(opinions[0].get_history())
+    return current, peak, elapsed, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--opinions", type=int, default=100, help="Number of Opinion instances (clients x shops)")
+    parser.add_argument("--days", type=int, default=10_000)
+    parser.add_argument("--history-size", type=int, default=32, help="Entries kept by the ring policy")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'policy':>8} {'MB held':>9} {'MB peak':>9} {'bytes/change':>13} {'seconds':>8} {'entries':>8}")
+    for policy in HISTORY_POLICIES:
+        current, peak, elapsed, entries = run(policy, args.opinions, args.days, args.history_size, args.seed)
+        per_change = current / (args.opinions * args.days)
+        print(f"{policy:>8} {current / 1e6:>9.2f} {peak / 1e6:>9.2f} {per_change:>13.1f} {elapsed:>8.2f} {entries:>8}")
+
+
+if __name__ == "__main__":
+    main()
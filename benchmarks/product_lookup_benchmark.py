@@ -0,0 +1,87 @@
+"""
+Micro-benchmark of product lookups as the catalog grows beyond the five default products.
+
+Times ShopAgent.sell_product and ClientAgent.produce_product against the previous
+linear `next(p for p in list if p.product_id == ...)` scans.
+
+Usage (from the project root):
+    python -m benchmarks.product_lookup_benchmark --catalog 5 100 1000 5000
+"""
+import argparse
+import logging
+import random
+import time
+from agents.ClientAgent import ClientAgent
+from agents.ShopAgent import ShopAgent
+from models.MarketSimulationModel import MarketSimulationModel
+from models.Product import Product
+
+
+def linear_find(products, product_id):
+    return next((p for p in products if p.product_id == product_id), None)
+
+
+def linear_produce(client):
+    # The pre-index algorithm: one scan to check, a second scan to deduct
+    for need in client.product_needs:
+        item = linear_find(client.inventory, need.product_id)
+        if not item or item.quantity < need.quantity:
+            return
+    for need in client.product_needs:
+        linear_find(client.inventory, need.product_id).adjust_quantity(-need.quantity)
+
+
+def make_catalog(size):
+    return [Product(product_id=i, name=f"SKU {i}", quality=5, price=1.0, quantity=0) for i in range(1, size + 1)]
+
+
+def timed(function, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--catalog", type=int, nargs="+", default=[5, 100, 1000, 5000])
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    model = MarketSimulationModel(width=2, height=2, num_clients=0, num_shops=1, seed=0, verbosity="off")
+    rng = random.Random(0)
+
+    print(f"{'catalog':>8} {'sell linear us':>15} {'sell indexed us':>16} "
+          f"{'produce linear ms':>18} {'produce indexed ms':>19}")
+    for size in args.catalog:
+        catalog = make_catalog(size)
+        shop = ShopAgent(unique_id=10_000, model=model, initial_money=0)
+        for product in catalog:
+            shop.add_product(Product(product.product_id, product.name, product.quality, product.price, quantity=10**9))
+        client = ClientAgent(
+            unique_id=10_001,
+            model=model,
+            money=float("inf"),
+            product_to_sell="Cookies",
+            product_needs=[Product(p.product_id, p.name, p.quality, p.price, quantity=1) for p in catalog]
+        )
+        for need in client.product_needs:
+            client.add_to_inventory(Product(need.product_id, need.name, 0, need.price, quantity=10**9))
+
+        product_ids = [rng.randint(1, size) for _ in range(args.lookups)]
+        ids = iter(product_ids * 2)
+        sell_linear = timed(lambda: linear_find(shop.products, next(ids)).adjust_quantity(-1), args.lookups)
+        ids = iter(product_ids * 2)
+        sell_indexed = timed(lambda: shop.sell_product(client, next(ids), 1), args.lookups)
+
+        repeat = max(1, 200_000 // (size * size))
+        produce_linear = timed(lambda: linear_produce(client), repeat)
+        produce_indexed = timed(client.produce_product, repeat)
+
+        print(f"{size:>8} {sell_linear * 1e6:>15.2f} {sell_indexed * 1e6:>16.2f} "
+              f"{produce_linear * 1e3:>18.3f} {produce_indexed * 1e3:>19.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Per-step overhead of mesa's RandomActivation against the MarketScheduler modes.
+
+The agents do nothing in their step, so only the scheduling itself is timed:
+collecting and shuffling the keys (RandomActivation) or resetting and shuffling
+the preallocated permutation (MarketScheduler), and dispatching the calls.
+
+Usage (from the project root):
+    python -m benchmarks.scheduler_benchmark --agents 10000 100000 1000000 --steps 5
+"""
+import argparse
+import time
+from mesa import Agent, Model
+from mesa.time import RandomActivation
+from models.MarketScheduler import MarketScheduler, ACTIVATION_MODES
+
+
+class IdleAgent(Agent):
+    def step(self):
+        pass
+
+    def shop_for_needs(self):
+        pass
+
+    def produce_product(self):
+        pass
+
+    def share_with_neighbors(self):
+        pass
+
+    def finish_day(self):
+        pass
+
+
+def build(scheduler, num_agents, seed):
+    model = Model(seed=seed)
+    schedule = RandomActivation(model) if scheduler == "mesa" else MarketScheduler(model, scheduler)
+    start = time.perf_counter()
+    for i in range(num_agents):
+        schedule.add(IdleAgent(i, model))
+    return schedule, time.perf_counter() - start
+
+
+def run(scheduler, num_agents, steps, seed):
+    schedule, add_time = build(scheduler, num_agents, seed)
+    start = time.perf_counter()
+    for _ in range(steps):
+        schedule.step()
+    return add_time, (time.perf_counter() - start) / steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--agents", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    print(f"{'agents':>9} {'scheduler':>13} {'add s':>8} {'s/step':>9} {'speedup':>8}")
+    for num_agents in args.agents:
+        reference = None
+        for scheduler in ("mesa",) + ACTIVATION_MODES:
+            add_time, step_time = run(scheduler, num_agents, args.steps, args.seed)
+            if reference is None:
+                reference = step_time
+            print(f"{num_agents:>9} {scheduler:>13} {add_time:>8.3f} {step_time:>9.4f} {reference / step_time:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Load test of the scenario service (experiments/ScenarioService.py), entirely on
+this machine.
+
+Starts the service on a free local port, then streams --scenarios distinct
+scenarios at once over POST /scenarios/stream, --concurrency connections at a
+time. Reports throughput in scenarios per second, the queue latency (submitted
+to picked up by a worker), the time to the first day event and the full
+latency. The same batch is then requested again to time answers from the cache,
+and one more submission past max_queued checks that overload is refused.
+
+Usage (from the project root):
+    python -m benchmarks.service_benchmark --workers 2 --scenarios 16 --clients 200 --days 30
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from experiments.ScenarioService import ScenarioService
+
+
+async def request(port, method, path, payload=None):
+    """
+    Sends one request; returns (status, body) for JSON, or (status, events) for an event stream.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode().strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.lower()] = value.strip()
+    if headers.get("content-type") != "text/event-stream":
+        data = json.loads(await reader.read())
+        writer.close()
+        return status, data
+
+    events = []
+    event = None
+    while True:
+        line = await reader.readline()
+        if not line:
+            break
+        line = line.decode().rstrip("\n")
+        if line.startswith("event: "):
+            event = line[len("event: "):]
+        elif line.startswith("data: "):
+            events.append((time.perf_counter(), event, json.loads(line[len("data: "):])))
+    writer.close()
+    return status, events
+
+
+async def stream_batch(port, scenarios, concurrency):
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(scenario):
+        async with limit:
+            start = time.perf_counter()
+            status, events = await request(port, "POST", "/scenarios/stream", scenario)
+            first_day = next((at for at, event, _ in events if event == "day"), None)
+            _, last_event, result = events[-1]
+            return {
+                "status": status,
+                "ok": last_event == "result",
+                "days": sum(1 for _, event, _ in events if event == "day"),
+                "first_day": first_day - start if first_day else None,
+                "latency": events[-1][0] - start,
+                "queue": result.get("queue_seconds"),
+            }
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(scenario) for scenario in scenarios))
+    return results, time.perf_counter() - start
+
+
+def percentiles(values):
+    values = sorted(value for value in values if value is not None)
+    if not values:
+        return "-"
+    p95 = values[min(len(values) - 1, int(round(0.95 * (len(values) - 1))))]
+    return f"median {statistics.median(values):.3f}s, p95 {p95:.3f}s, max {values[-1]:.3f}s"
+
+
+def report(label, results, elapsed):
+    ok = sum(result["ok"] for result in results)
+    print(f"{label}: {ok}/{len(results)} scenarios in {elapsed:.2f}s, {len(results) / elapsed:.2f} scenarios/s")
+    print(f"  queue latency   {percentiles(result['queue'] for result in results)}")
+    print(f"  first day event {percentiles(result['first_day'] for result in results)}")
+    print(f"  full latency    {percentiles(result['latency'] for result in results)}")
+
+
+async def run(args):
+    service = ScenarioService(port=0, workers=args.workers, max_queued=args.scenarios)
+    await service.start()
+    try:
+        params = {"num_clients": args.clients, "num_shops": args.shops, "days": args.days,
+                  "width": args.side, "height": args.side}
+        scenarios = [{"params": params, "seed": seed} for seed in range(args.scenarios)]
+
+        # Start the worker processes before timing anything
+        status, _ = await request(service.port, "POST", "/scenarios/stream",
+                                  {"params": dict(params, days=0), "seed": -1})
+        if status != 200:
+            raise RuntimeError(f"Warm-up scenario failed with status {status}.")
+
+        results, elapsed = await stream_batch(service.port, scenarios, args.concurrency)
+        report(f"cold ({service.workers} workers, {args.concurrency} connections)", results, elapsed)
+        if any(result["days"] != args.days for result in results):
+            raise RuntimeError("A stream did not deliver every day.")
+
+        results, elapsed = await stream_batch(service.port, scenarios, args.concurrency)
+        report("cached", results, elapsed)
+
+        # Fill the pool and the queue, then one more submission must be refused
+        overload = [{"params": params, "seed": args.scenarios + i}
+                    for i in range(service.workers + service.max_queued + 1)]
+        statuses = [(await request(service.port, "POST", "/scenarios", scenario))[0] for scenario in overload]
+        print(f"overload: statuses {sorted(set(statuses))}, last {statuses[-1]} (503 expected)")
+        _, health = await request(service.port, "GET", "/health")
+        print(f"health: {health}")
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--scenarios", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=16, help="Streams open at the same time")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--shops", type=int, default=10)
+    parser.add_argument("--side", type=int, default=20, help="Grid width and height")
+    parser.add_argument("--days", type=int, default=30)
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
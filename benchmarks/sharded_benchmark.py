@@ -0,0 +1,71 @@
+"""
+Scaling of the sharded engine with the number of worker processes.
+
+Every run builds the same market (same seed) and times the days only. The
+single-process vectorized engine is listed as a reference. Results differ
+between worker counts by design (see ShardedMarketEngine), so the client money
+total is printed to show they stay in the same range.
+
+Usage (from the project root):
+    python -m benchmarks.sharded_benchmark --clients 20000 --workers 1 2 4 8 --days 10
+"""
+import argparse
+import logging
+import os
+import time
+from benchmarks.grid import grid_side
+from models.MarketSimulationModel import MarketSimulationModel
+
+
+def run(engine, workers, num_clients, num_shops, days, seed):
+    side = grid_side(num_clients + num_shops)
+    start = time.perf_counter()
+    model = MarketSimulationModel(
+        width=side,
+        height=side,
+        num_clients=num_clients,
+        num_shops=num_shops,
+        engine=engine,
+        seed=seed,
+        verbosity="off",
+        opinion_history="none",
+        opinion_exchange="batched",
+        workers=workers
+    )
+    init_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(days):
+        model.step()
+    step_time = (time.perf_counter() - start) / days
+    total_money = sum(model.daily_aggregates()["client_money"])
+    model.close()
+    return init_time, step_time, total_money
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[5000])
+    parser.add_argument("--shops", type=int, default=20)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    parser.add_argument("--days", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    print(f"{'clients':>8} {'engine':>10} {'workers':>7} {'init s':>8} {'s/step':>9} {'speedup':>8} "
+          f"{'client money':>14}")
+    for num_clients in args.clients:
+        init_time, reference, total_money = run("vectorized", 1, num_clients, args.shops, args.days, args.seed)
+        print(f"{num_clients:>8} {'vectorized':>10} {1:>7} {init_time:>8.2f} {reference:>9.4f} {1.0:>8.2f} "
+              f"{total_money:>14.2f}")
+        for workers in args.workers:
+            init_time, step_time, total_money = run("sharded", workers, num_clients, args.shops, args.days, args.seed)
+            print(f"{num_clients:>8} {'sharded':>10} {workers:>7} {init_time:>8.2f} {step_time:>9.4f} "
+                  f"{reference / step_time:>8.2f} {total_money:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Reproducible timing suite of MarketSimulationModel on the "agents" engine.
+
+For every population and grid size it times the model construction, full
+step() calls and each phase of a day, and writes the results as JSON together
+with the commit and machine they were measured on. Every case uses a fixed
+seed, so two runs of the suite simulate exactly the same days.
+
+Phases are timed on separate days run in the "staged" order (see
+models/MarketScheduler.py), where every phase runs for all agents before the
+next one starts: replenish_needs, restock_products, adjust_prices,
+buy_products, produce_product and share_opinion (share_with_neighbors).
+
+Usage (from the project root):
+    python -m benchmarks.suite --clients 100 1000 10000 --output bench.json
+    python -m benchmarks.suite --compare bench_old.json bench.json
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import time
+from benchmarks.grid import grid_side
+from models.MarketSimulationModel import MarketSimulationModel
+
+PHASES = ("replenish_needs", "restock_products", "adjust_prices", "buy_products", "produce_product",
+          "share_opinion")
+
+# A run is flagged by --compare when a median gets slower by more than this factor
+REGRESSION_THRESHOLD = 1.10
+
+
+def build(num_clients, num_shops, density, seed):
+    # density is the share of grid cells occupied by an agent
+    side = grid_side(num_clients + num_shops, density)
+    return MarketSimulationModel(
+        width=side,
+        height=side,
+        num_clients=num_clients,
+        num_shops=num_shops,
+        seed=seed,
+        verbosity="off"
+    )
+
+
+def timed_phases(model):
+    """
+    Runs one day phase by phase and returns the seconds spent in each.
+    """
+    timings = {}
+    clients = model.schedule.clients
+    shops = model.shops
+
+    def timed(name, calls):
+        start = time.perf_counter()
+        for call in calls:
+            call()
+        timings[name] = time.perf_counter() - start
+
+    model.statistics.start_day()
+    timed("replenish_needs", [client.replenish_needs for client in clients])
+    timed("restock_products", [shop.restock_products for shop in shops])
+    timed("adjust_prices", [shop.adjust_prices for shop in shops])
+    order = [clients[i] for i in model.schedule.permutation()]
+    timed("buy_products", [client.shop_for_needs for client in order])
+    timed("produce_product", [client.produce_product for client in order])
+    timed("share_opinion", [client.share_with_neighbors for client in order])
+    model.schedule.steps += 1
+    model.schedule.time += 1
+    model.day_count += 1
+    return timings
+
+
+def summarize(samples):
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "samples": len(samples),
+    }
+
+
+def run_case(num_clients, num_shops, density, days, repeats, seed):
+    init_times = []
+    step_times = []
+    phase_times = {name: [] for name in PHASES}
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model = build(num_clients, num_shops, density, seed)
+        init_times.append(time.perf_counter() - start)
+
+        for _ in range(days):
+            start = time.perf_counter()
+            model.step()
+            step_times.append(time.perf_counter() - start)
+        for _ in range(days):
+            for name, seconds in timed_phases(model).items():
+                phase_times[name].append(seconds)
+
+    return {
+        "case": {"clients": num_clients, "shops": num_shops, "density": density, "days": days,
+                 "repeats": repeats, "seed": seed},
+        "init": summarize(init_times),
+        "step": summarize(step_times),
+        "phases": {name: summarize(samples) for name, samples in phase_times.items()},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def case_key(case):
+    return (case["clients"], case["shops"], case["density"])
+
+
+def metrics(result):
+    yield "init", result["init"]["median"]
+    yield "step", result["step"]["median"]
+    for name, summary in result["phases"].items():
+        yield name, summary["median"]
+
+
+def compare(base_path, new_path):
+    with open(base_path) as file:
+        base = {case_key(result["case"]): result for result in json.load(file)["results"]}
+    with open(new_path) as file:
+        new = json.load(file)["results"]
+
+    print(f"{'clients':>8} {'shops':>5} {'density':>7} {'metric':>16} {'base s':>10} {'new s':>10} {'ratio':>6}")
+    regressions = 0
+    for result in new:
+        reference = base.get(case_key(result["case"]))
+        if reference is None:
+            continue
+        base_metrics = dict(metrics(reference))
+        for name, seconds in metrics(result):
+            ratio = seconds / base_metrics[name] if base_metrics[name] else float("inf")
+            flag = " slower" if ratio > REGRESSION_THRESHOLD else ""
+            regressions += bool(flag)
+            case = result["case"]
+            print(f"{case['clients']:>8} {case['shops']:>5} {case['density']:>7} {name:>16} "
+                  f"{base_metrics[name]:>10.5f} {seconds:>10.5f} {ratio:>6.2f}{flag}")
+    print(f"{regressions} medians slower by more than {REGRESSION_THRESHOLD:.0%} of the base")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--shops", type=int, nargs="+", default=[10])
+    parser.add_argument("--density", type=float, nargs="+", default=[0.8, 0.2],
+                        help="Share of grid cells occupied by an agent, sets the grid size")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"),
+                        help="Compare two result files instead of running the suite")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    logging.basicConfig(level=logging.WARNING)
+
+    results = []
+    print(f"{'clients':>8} {'shops':>5} {'density':>7} {'init s':>8} {'step s':>8}  slowest phase")
+    for num_clients in args.clients:
+        for num_shops in args.shops:
+            for density in args.density:
+                result = run_case(num_clients, num_shops, density, args.days, args.repeats, args.seed)
+                results.append(result)
+                slowest = max(result["phases"], key=lambda name: result["phases"][name]["median"])
+                print(f"{num_clients:>8} {num_shops:>5} {density:>7} {result['init']['median']:>8.3f} "
+                      f"{result['step']['median']:>8.4f}  {slowest}")
+
+    with open(args.output, "w") as file:
+        json.dump({
+            "commit": git_commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "results": results,
+        }, file, indent=2)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import hashlib
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from models.MarketSimulationModel import MarketSimulationModel
+
+# Parameters of a single run, anything else in a run's params is passed to MarketSimulationModel
+DEFAULT_PARAMS = {
+    "width": 6,
+    "height": 6,
+    "num_clients": 30,
+    "num_shops": 5,
+    "scam_probability": 0.1,
+    "days": 100,
+    "verbosity": "off",
+}
+
+
+def expand_grid(grid):
+    """
+    Turns {"num_clients": [30, 60], "num_shops": [5]} into a list of full parameter dicts.
+    Scalars are treated as single-value lists.
+    """
+    names = sorted(grid)
+    values = [grid[name] if isinstance(grid[name], list) else [grid[name]] for name in names]
+    runs = []
+    for combination in itertools.product(*values):
+        params = dict(DEFAULT_PARAMS)
+        params.update(zip(names, combination))
+        runs.append(params)
+    return runs
+
+
+def run_seed(params, replicate, base_seed=0):
+    """
+    Deterministic seed of a (params, replicate) cell. It only depends on the cell itself,
+    so seeds do not shift when the grid grows or runs finish in a different order.
+    """
+    payload = json.dumps([base_seed, params, replicate], sort_keys=True).encode()
+    return int.from_bytes(hashlib.sha256(payload).digest()[:8], "big")
+
+
+def run_key(params, seed):
+    return json.dumps([params, seed], sort_keys=True)
+
+
+def run_single(params, seed):
+    """
+    Runs one simulation and returns a compact, JSON-serialisable summary of its last day.
+    """
+    model_params = dict(params)
+    days = model_params.pop("days")
+    start = time.perf_counter()
+    model = MarketSimulationModel(seed=seed, **model_params)
+    try:
+        for _ in range(days):
+            model.step()
+        elapsed = time.perf_counter() - start
+        aggregates = model.daily_aggregates()
+    finally:
+        # Stops sharded workers and deletes ledger spill files now, not whenever the model is collected
+        model.close()
+
+    shop_money = aggregates["shop_money"]
+    client_money = aggregates["client_money"]
+    return {
+        "params": params,
+        "seed": seed,
+        "days": model.day_count,
+        "elapsed": elapsed,
+        "shop_money_total": sum(shop_money),
+        "shop_money_min": min(shop_money, default=0.0),
+        "shop_money_max": max(shop_money, default=0.0),
+        "shop_stock_total": sum(aggregates["shop_stock"]),
+        "client_money_total": sum(client_money),
+        "client_money_min": min(client_money, default=0.0),
+        "client_money_max": max(client_money, default=0.0),
+        "clients_in_profit": sum(1 for money in client_money if money > 500),
+    }
+
+
+def ends_with_newline(path):
+    """
+    True for an empty or missing file and for one whose last byte is a newline.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return True
+    with open(path, "rb") as file:
+        file.seek(-1, os.SEEK_END)
+        return file.read(1) == b"\n"
+
+
+class ExperimentRunner:
+    """
+    Runs every (params, replicate) cell of a parameter grid over a process pool.
+
+    Summaries are yielded as runs finish and, if `output` is given, appended to it as
+    JSON lines. Cells already present in `output` are skipped, so an interrupted
+    batch resumes where it stopped when started again with the same arguments.
+    """
+
+    def __init__(self, grid, replicates=1, base_seed=0, workers=None, output=None):
+        self.runs = expand_grid(grid)
+        self.replicates = replicates
+        self.base_seed = base_seed
+        self.workers = workers or os.cpu_count() or 1
+        self.output = output
+        self.completed = 0
+        self.skipped = 0
+        self.elapsed = 0.0
+
+    def cells(self):
+        for params in self.runs:
+            for replicate in range(self.replicates):
+                yield params, run_seed(params, replicate, self.base_seed)
+
+    def load_completed(self):
+        done = set()
+        if self.output and os.path.exists(self.output):
+            with open(self.output) as file:
+                for line in file:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        result = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # A line cut short by an interruption
+                    done.add(run_key(result["params"], result["seed"]))
+        return done
+
+    def run(self):
+        done = self.load_completed()
+        pending = []
+        for params, seed in self.cells():
+            if run_key(params, seed) in done:
+                self.skipped += 1
+            else:
+                pending.append((params, seed))
+
+        start = time.perf_counter()
+        sink = open(self.output, "a") if self.output else None
+        if sink and not ends_with_newline(self.output):
+            sink.write("\n")  # Terminate a line cut short by an interruption
+        pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            futures = [pool.submit(run_single, params, seed) for params, seed in pending]
+            for future in as_completed(futures):
+                result = future.result()
+                if sink:
+                    sink.write(json.dumps(result) + "\n")
+                    sink.flush()
+                self.completed += 1
+                self.elapsed = time.perf_counter() - start
+                yield result
+        except BaseException:
+            # Ctrl-C, a failed run or a caller that stops iterating: drop the queued runs instead of
+            # waiting for them, only the ones already running finish
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        else:
+            pool.shutdown()
+        finally:
+            if sink:
+                sink.close()
+            self.elapsed = time.perf_counter() - start
+
+    def throughput(self):
+        """
+        Returns (runs per second, runs per second per worker) of the last run().
+        """
+        if self.elapsed <= 0:
+            return 0.0, 0.0
+        runs_per_second = self.completed / self.elapsed
+        return runs_per_second, runs_per_second / self.workers
@@ -0,0 +1,431 @@
+"""
+Local HTTP service that runs MarketSimulationModel scenarios on a process pool.
+
+A scenario is {"params": {...}, "seed": optional int}. params may only set the
+fields in SCENARIO_FIELDS, within the limits of MAX_SIZES, on top of the
+defaults of ExperimentRunner and bulk placement; anything else (file paths,
+engines, worker counts) is refused, since any web page can POST to a local
+port. Without a seed, one is derived from the params, so the same request
+always means the same run. Finished scenarios are cached by
+(params, seed): asking again replays the recorded days at once.
+
+Endpoints (JSON unless noted):
+  POST /scenarios             submit a scenario, returns its id and status
+  POST /scenarios/stream      submit a scenario and stream it as server-sent events
+  GET  /scenarios/<id>        status, queue and run times, last day, error
+  GET  /scenarios/<id>/events stream a submitted scenario as server-sent events
+  GET  /health                pool size, queued, running and cached scenarios
+
+Streams send one "day" event per simulated day (money, stock, demand and sales
+totals from model.market_statistics()) and end with a "result" or "error" event.
+Days already simulated are replayed first, so a stream can join at any time.
+
+At most `workers` scenarios run at once; up to `max_queued` more wait for a
+worker, and further submissions get 503 until some finish. Everything runs in
+the standard library, the service only listens on the given host (127.0.0.1 by
+default).
+"""
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from experiments.ExperimentRunner import DEFAULT_PARAMS, run_key, run_seed
+from models.MarketScheduler import ACTIVATION_MODES
+from models.MarketSimulationModel import (
+    MarketSimulationModel, MARKET_MODES, OPINION_EXCHANGE_MODES
+)
+
+# The only params a request may set: integer sizes, a probability and the mode choices
+SCENARIO_FIELDS = ("width", "height", "num_clients", "num_shops", "scam_probability", "market_mode",
+                   "activation", "opinion_exchange", "days")
+MODE_CHOICES = {"market_mode": MARKET_MODES, "activation": ACTIVATION_MODES,
+                "opinion_exchange": OPINION_EXCHANGE_MODES}
+
+# Largest accepted sizes, so that one request cannot hold a worker or its memory for long
+MAX_SIZES = {"width": 1000, "height": 1000, "num_clients": 50000, "num_shops": 1000, "days": 1000}
+
+# Defaults of a scenario; bulk placement keeps construction fast on large grids
+SCENARIO_DEFAULTS = dict(DEFAULT_PARAMS, placement="bulk")
+
+# "spawn" keeps the workers independent of the event loop and forwarder thread of the service
+SPAWN = multiprocessing.get_context("spawn")
+
+# Largest request body accepted, in bytes
+MAX_BODY = 1 << 20
+
+# Queue for the messages of the scenarios run by a worker process, set by init_worker()
+events = None
+
+
+def init_worker(queue):
+    global events
+    events = queue
+
+
+def day_record(model):
+    """
+    Market totals after a day, from the running statistics (no scan of the agents).
+    """
+    statistics = model.market_statistics()
+    return {
+        "day": model.day_count,
+        "shop_money": statistics["shop_money"],
+        "client_money": statistics["client_money"],
+        "shop_stock": sum(statistics["shop_stock"].values()),
+        "demand": sum(statistics["demand"].values()),
+        "sold": sum(statistics["sold"].values()),
+        "starved": sum(statistics["starved"].values()),
+    }
+
+
+def run_scenario(scenario_id, params, seed):
+    """
+    Runs in a worker process and reports through the events queue, in order:
+    ("start", id, time), one ("day", id, record) per day, then ("done", id, time)
+    or ("error", id, traceback).
+    """
+    events.put(("start", scenario_id, time.time()))
+    try:
+        model_params = dict(params)
+        days = model_params.pop("days")
+        model = MarketSimulationModel(seed=seed, **model_params)
+        try:
+            for _ in range(days):
+                model.step()
+                events.put(("day", scenario_id, day_record(model)))
+        finally:
+            model.close()
+    except Exception:
+        events.put(("error", scenario_id, traceback.format_exc()))
+    else:
+        events.put(("done", scenario_id, time.time()))
+
+
+def scenario_params(params):
+    """
+    Validates the params of a request and completes them with SCENARIO_DEFAULTS.
+    """
+    if not isinstance(params, dict):
+        raise ScenarioError(400, "params must be a JSON object.")
+    unknown = sorted(set(params) - set(SCENARIO_FIELDS))
+    if unknown:
+        raise ScenarioError(400, f"Unknown params {unknown}, expected one of {SCENARIO_FIELDS}.")
+    full = dict(SCENARIO_DEFAULTS)
+    full.update(params)
+    for name, limit in MAX_SIZES.items():
+        value = full[name]
+        low = 1 if name in ("width", "height") else 0
+        if not isinstance(value, int) or isinstance(value, bool) or not low <= value <= limit:
+            raise ScenarioError(400, f"{name} must be an integer from {low} to {limit}, got {value!r}.")
+    for name, choices in MODE_CHOICES.items():
+        if name in full and full[name] not in choices:
+            raise ScenarioError(400, f"Unknown {name} {full[name]!r}, expected one of {choices}.")
+    probability = full["scam_probability"]
+    if not isinstance(probability, (int, float)) or isinstance(probability, bool) or not 0 <= probability <= 1:
+        raise ScenarioError(400, f"scam_probability must be a number from 0 to 1, got {probability!r}.")
+    if full["num_clients"] + full["num_shops"] > full["width"] * full["height"]:
+        raise ScenarioError(400, "num_clients + num_shops must fit on the width x height grid.")
+    return full
+
+
+class ScenarioError(Exception):
+    """
+    A request the service refuses, answered with `status`.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Scenario:
+    def __init__(self, scenario_id, params, seed):
+        self.id = scenario_id
+        self.params = params
+        self.seed = seed
+        self.status = "queued"
+        self.days = []
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self.subscribers = set()
+
+    @property
+    def done(self):
+        return self.status in ("finished", "failed")
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "seed": self.seed,
+            "days": len(self.days),
+            "last_day": self.days[-1] if self.days else None,
+            "queue_seconds": self.started - self.submitted if self.started else None,
+            "run_seconds": self.finished - self.started if self.finished and self.started else None,
+            "error": self.error,
+        }
+
+    def publish(self, event, data):
+        for queue in self.subscribers:
+            queue.put_nowait((event, data))
+
+
+class ScenarioService:
+    """
+    Runs scenarios on a ProcessPoolExecutor of `workers` processes and serves them over HTTP.
+
+    Worker processes send their messages through one multiprocessing queue; a
+    thread forwards them to the event loop, which records them on the Scenario and
+    passes them on to its streams. Finished scenarios stay in an LRU cache of
+    `cache_size` entries; failed ones are dropped so they can be retried.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8765, workers=None, max_queued=64, cache_size=256):
+        self.host = host
+        self.port = port
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queued = max_queued
+        self.cache_size = cache_size
+        self.active = {}
+        self.cache = OrderedDict()
+        self.loop = None
+        self.server = None
+        self.pool = None
+        self.events = None
+        self.forwarder = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.events = SPAWN.Queue()
+        self.pool = self.create_pool()
+        self.forwarder = threading.Thread(target=self.forward_events, daemon=True)
+        self.forwarder.start()
+        self.server = await asyncio.start_server(self.handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    def create_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=SPAWN,
+                                   initializer=init_worker, initargs=(self.events,))
+
+    async def serve_forever(self):
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.pool is not None:
+            await self.loop.run_in_executor(None, lambda: self.pool.shutdown(cancel_futures=True))
+        if self.events is not None:
+            self.events.put(None)
+            self.forwarder.join()
+
+    def forward_events(self):
+        while True:
+            message = self.events.get()
+            if message is None:
+                return
+            self.loop.call_soon_threadsafe(self.dispatch, *message)
+
+    def dispatch(self, kind, scenario_id, payload):
+        scenario = self.active.get(scenario_id)
+        if scenario is None:
+            return
+        if kind == "start":
+            scenario.started = payload
+            scenario.status = "running"
+        elif kind == "day":
+            scenario.days.append(payload)
+            scenario.publish("day", payload)
+        elif kind == "done":
+            scenario.finished = payload
+            scenario.status = "finished"
+            del self.active[scenario_id]
+            self.cache[scenario_id] = scenario
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            scenario.publish("result", scenario.summary())
+        else:
+            self.fail(scenario, payload)
+
+    def fail(self, scenario, error):
+        scenario.finished = time.time()
+        scenario.status = "failed"
+        scenario.error = error
+        self.active.pop(scenario.id, None)
+        scenario.publish("error", scenario.summary())
+
+    def worker_done(self, scenario_id, future):
+        # Only a crashed worker process ends a future with an exception, everything else is reported as events
+        scenario = self.active.get(scenario_id)
+        if scenario is not None and not future.cancelled() and future.exception() is not None:
+            self.fail(scenario, repr(future.exception()))
+
+    def submit(self, request):
+        """
+        Returns (scenario, cached) for a request body, starting the scenario unless
+        it is running or cached already.
+        """
+        if not isinstance(request, dict):
+            raise ScenarioError(400, "The request body must be a JSON object.")
+        params = scenario_params(request.get("params", {}))
+        seed = request.get("seed")
+        if seed is None:
+            seed = run_seed(params, 0)
+        elif not isinstance(seed, int) or isinstance(seed, bool):
+            raise ScenarioError(400, f"seed must be an integer, got {seed!r}.")
+        scenario_id = hashlib.sha256(run_key(params, seed).encode()).hexdigest()[:16]
+
+        if scenario_id in self.cache:
+            self.cache.move_to_end(scenario_id)
+            return self.cache[scenario_id], True
+        if scenario_id in self.active:
+            return self.active[scenario_id], False
+        if len(self.active) >= self.workers + self.max_queued:
+            raise ScenarioError(503, f"{len(self.active)} scenarios are queued or running, try again later.")
+
+        scenario = self.active[scenario_id] = Scenario(scenario_id, params, seed)
+        try:
+            future = self.pool.submit(run_scenario, scenario_id, params, seed)
+        except BrokenProcessPool:
+            # A worker process died, which breaks the whole pool and fails its scenarios; start a new one
+            self.pool.shutdown(wait=False)
+            self.pool = self.create_pool()
+            future = self.pool.submit(run_scenario, scenario_id, params, seed)
+        future.add_done_callback(
+            lambda future: self.loop.call_soon_threadsafe(self.worker_done, scenario_id, future)
+        )
+        return scenario, False
+
+    def find(self, scenario_id):
+        scenario = self.active.get(scenario_id) or self.cache.get(scenario_id)
+        if scenario is None:
+            raise ScenarioError(404, f"Unknown scenario '{scenario_id}'.")
+        return scenario
+
+    def health(self):
+        running = sum(1 for scenario in self.active.values() if scenario.status == "running")
+        return {
+            "workers": self.workers,
+            "running": running,
+            "queued": len(self.active) - running,
+            "cached": len(self.cache),
+        }
+
+    async def handle(self, reader, writer):
+        try:
+            method, path, body = await read_request(reader)
+            parts = [part for part in path.split("?")[0].split("/") if part]
+            if method == "GET" and parts == ["health"]:
+                await send_json(writer, 200, self.health())
+            elif method == "POST" and parts[:1] == ["scenarios"] and len(parts) <= 2:
+                if len(parts) == 2 and parts[1] != "stream":
+                    raise ScenarioError(404, f"No route for {method} {path}.")
+                scenario, cached = self.submit(parse_json(body))
+                if len(parts) == 2:
+                    await self.stream(writer, scenario)
+                else:
+                    await send_json(writer, 200 if scenario.done else 202, dict(scenario.summary(), cached=cached))
+            elif method == "GET" and parts[:1] == ["scenarios"] and len(parts) == 2:
+                await send_json(writer, 200, self.find(parts[1]).summary())
+            elif method == "GET" and parts[:1] == ["scenarios"] and len(parts) == 3 and parts[2] == "events":
+                await self.stream(writer, self.find(parts[1]))
+            else:
+                raise ScenarioError(404, f"No route for {method} {path}.")
+        except ScenarioError as error:
+            await send_json(writer, error.status, {"error": error.message})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def stream(self, writer, scenario):
+        """
+        Sends the recorded days of a scenario, then its live events until it ends.
+        """
+        queue = asyncio.Queue()
+        # Subscribe and copy the days in one go, so no day is missed or sent twice
+        recorded = list(scenario.days)
+        if not scenario.done:
+            scenario.subscribers.add(queue)
+        try:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                         b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+            for record in recorded:
+                writer.write(sse("day", record))
+            if scenario.done:
+                writer.write(sse("result" if scenario.status == "finished" else "error", scenario.summary()))
+                await writer.drain()
+                return
+            await writer.drain()
+            while True:
+                event, data = await queue.get()
+                writer.write(sse(event, data))
+                await writer.drain()
+                if event != "day":
+                    return
+        finally:
+            scenario.subscribers.discard(queue)
+
+
+STATUS_TEXT = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 413: "Payload Too Large",
+               503: "Service Unavailable"}
+
+
+async def read_request(reader):
+    """
+    Reads a request line, headers and Content-Length body; returns (method, path, body).
+    """
+    request_line = (await reader.readline()).decode("latin-1").strip()
+    if not request_line:
+        raise ConnectionError("Connection closed before a request.")
+    try:
+        method, path, _ = request_line.split(" ", 2)
+    except ValueError:
+        raise ScenarioError(400, f"Malformed request line '{request_line}'.")
+    length = 0
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            # Only plain digits: int() would also take signs, spaces and underscores
+            value = value.strip()
+            if not (value.isascii() and value.isdigit()):
+                raise ScenarioError(400, f"Malformed Content-Length '{value}'.")
+            length = int(value)
+    if length > MAX_BODY:
+        raise ScenarioError(413, f"Request bodies are limited to {MAX_BODY} bytes.")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, body
+
+
+def parse_json(body):
+    try:
+        return json.loads(body or b"{}")
+    except ValueError as error:
+        raise ScenarioError(400, f"Invalid JSON: {error}.")
+
+
+async def send_json(writer, status, payload):
+    body = json.dumps(payload).encode()
+    writer.write(f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+def sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()
@@ -1,110 +1,121 @@
+"""
+Runs one market simulation.
+
+Every day's shop and client money, stock and inventory, and the market
+statistics, are streamed to the --output directory (see models/ResultStream.py).
+Plotting libraries are only imported with --report or --show, which render the
+grid heatmap and money-over-time figures from the recorded files, so plain runs
+start fast and work without a display.
+
+Usage:
+    python main.py --clients 30 --shops 5 --days 100 --report
+    python main.py --show                  # also open the figures in windows
+    python main.py --report-only results   # re-render the figures of a finished run
+    python main.py --profile --profile-days 10 20   # phase timings and a cProfile dump of days 10-20
+"""
+import argparse
 import logging
-import numpy as np
-import seaborn as sns
-import matplotlib.pyplot as plt
-import re
-from models.MarketSimulationModel import MarketSimulationModel
-
-# Configure logging
-logging.basicConfig(filename='simulation.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+import os
+import time
+from models.MarketSimulationModel import (
+    MarketSimulationModel, ENGINES, VERBOSITY_LEVELS, MARKET_MODES, OPINION_EXCHANGE_MODES, PLACEMENT_MODES
+)
+from models.MarketScheduler import ACTIVATION_MODES
+from models.ResultStream import ResultStream
 
 logger = logging.getLogger(__name__)
 
-if __name__ == "__main__":
-    # Parameters for the simulation
-    GRID_WIDTH = 6
-    GRID_HEIGHT = 6
-    NUM_CLIENTS = 30
-    NUM_SHOPS = 5
-
-    # Clear the simulation.log file
-    with open('simulation.log', 'w'):
-        pass
 
-    # Initialize the model
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--width", type=int, default=6)
+    parser.add_argument("--height", type=int, default=6)
+    parser.add_argument("--clients", type=int, default=30)
+    parser.add_argument("--shops", type=int, default=5)
+    parser.add_argument("--days", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--engine", choices=ENGINES, default="agents")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes of the sharded engine")
+    parser.add_argument("--market-mode", choices=MARKET_MODES, default="sequential")
+    parser.add_argument("--opinion-exchange", choices=OPINION_EXCHANGE_MODES, default=None,
+                        help="Default: 'agents' on the agents engine, 'sequential' on vectorized, 'batched' on sharded")
+    parser.add_argument("--activation", choices=ACTIVATION_MODES, default="random")
+    parser.add_argument("--placement", choices=PLACEMENT_MODES, default="legacy")
+    parser.add_argument("--population", help="Population .npz file to start from (see models/Population.py)")
+    parser.add_argument("--verbosity", choices=VERBOSITY_LEVELS, default="summary",
+                        help="'trace' also logs every agent action, which slows large runs down")
+    parser.add_argument("--log-file", default="simulation.log")
+    parser.add_argument("--output", default="results", help="Directory the daily results are streamed to")
+    parser.add_argument("--report", action="store_true", help="Render the figures to files after the run")
+    parser.add_argument("--show", action="store_true", help="Render the figures and open them in windows")
+    parser.add_argument("--profile", action="store_true",
+                        help="Write per-day phase timings and counters (phases.csv, counters.csv) to --output")
+    parser.add_argument("--profile-days", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                        help="Run cProfile over these days and dump the stats to a .prof file in --output")
+    parser.add_argument("--report-only", metavar="DIRECTORY",
+                        help="Only render the figures of a run already recorded in DIRECTORY")
+    return parser.parse_args(argv)
+
+
+def render(directory, show):
+    # Imported here so that runs without a report never load matplotlib
+    from models.Report import render_report
+    for path in render_report(directory, show=show):
+        print(f"Wrote {path}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.report_only:
+        render(args.report_only, args.show)
+        return
+
+    # Start from an empty log file
+    logging.basicConfig(filename=args.log_file, filemode='w', level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+
+    start = time.perf_counter()
     model = MarketSimulationModel(
-        width=GRID_WIDTH,
-        height=GRID_HEIGHT,
-        num_clients=NUM_CLIENTS,
-        num_shops=NUM_SHOPS
+        width=args.width,
+        height=args.height,
+        num_clients=args.clients,
+        num_shops=args.shops,
+        engine=args.engine,
+        seed=args.seed,
+        verbosity=args.verbosity,
+        market_mode=args.market_mode,
+        opinion_exchange=args.opinion_exchange,
+        activation=args.activation,
+        workers=args.workers,
+        placement=args.placement,
+        population=args.population,
+        profile=args.profile,
+        profile_days=args.profile_days,
+        profile_path=os.path.join(args.output, "profile_days{first}-{last}.prof")
     )
+    try:
+        with ResultStream(model, args.output) as stream:
+            for day in range(args.days):
+                if model.log_summary:
+                    logger.info("\n--- Simulating Day %s ---", day + 1)
+                model.step()
+                stream.record()
+                if model.log_summary:
+                    logger.info("--- End of Day %s ---\n", day + 1)
+    finally:
+        # Stops the sharded engine's workers even when the run fails
+        model.close()
+    print(f"Simulated {args.days} days with seed {model.seed} in {time.perf_counter() - start:.2f}s, "
+          f"results in {args.output}/")
+    if model.profiler is not None:
+        for path in model.profiler.to_csv(args.output):
+            print(f"Wrote {path}")
+    if model.day_profiler is not None and os.path.exists(model.day_profiler.path):
+        print(f"Wrote {model.day_profiler.path}")
+
+    if args.report or args.show:
+        render(args.output, args.show)
 
-    # Run the simulation for 365 days
-    NUM_DAYS = 100
-    for day in range(NUM_DAYS):
-        logger.info(f"\n--- Simulating Day {day + 1} ---")
-        model.step()
-        logger.info(f"--- End of Day {day + 1} ---\n")
-
-    # Generate the heatmap of agent counts
-    agent_counts = np.zeros((model.grid.width, model.grid.height))
-    for cell_content, (x, y) in model.grid.coord_iter():
-        agent_count = len(cell_content)
-        agent_counts[x][y] = agent_count
-
-    # Plot the grid heatmap in a separate window
-    plt.figure()
-    g = sns.heatmap(agent_counts, cmap="viridis", annot=True, cbar=False, square=True)
-    g.figure.set_size_inches(5, 5)
-    g.set(title="Number of agents on each cell of the grid")
-    plt.show(block=False)
-
-    # Read the log file and extract data for plotting
-    log_file = 'simulation.log'
-    shop_profits = {}
-    client_money = {}
-
-    with open(log_file, 'r') as file:
-        for line in file:
-            # Extract shop profits
-            shop_match = re.search(r'Shop (\d+): Money = (\d+\.\d+)', line)
-            if shop_match:
-                shop_id = int(shop_match.group(1))
-                money = float(shop_match.group(2))
-                if shop_id not in shop_profits:
-                    shop_profits[shop_id] = []
-                shop_profits[shop_id].append(money)
 
-            # Extract client money
-            client_match = re.search(r'Client (\d+): Money = (\d+\.\d+)$', line)
-            if client_match:
-                client_id = int(client_match.group(1))
-                money = float(client_match.group(2))
-                if client_id not in client_money:
-                    client_money[client_id] = []
-                client_money[client_id].append(money)
-
-    # Prepare data for plotting
-    plot_data = {
-        'shop_profits': shop_profits,
-        'client_money': client_money
-    }
-    plot_titles = {
-        'shop_profits': 'Shop Profits Over Time',
-        'client_money': 'Client Money Over Time'
-    }
-    plot_labels = {
-        'shop_profits': 'Shop',
-        'client_money': 'Client'
-    }
-
-    # Create subplots for all data in a separate window
-    fig, axs = plt.subplots(len(plot_data), 1, figsize=(10, 5 * len(plot_data)))
-    fig.tight_layout(pad=5.0)
-
-    # Plot each dataset in a separate subplot
-    for i, (key, data) in enumerate(plot_data.items()):
-        ax = axs[i] if len(plot_data) > 1 else axs  # Handle single subplot case
-        for entity_id, values in data.items():
-            ax.plot(values, label=f'{plot_labels[key]} {entity_id}')
-        ax.set_xlabel('Day')
-        ax.set_ylabel('Money')
-        ax.set_title(plot_titles[key])
-        ax.legend()
-
-    # Show all plots
-    plt.show(block=False)
-
-    # Keep the plots open
-    input("Press Enter to exit and close all plots...")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Checkpoints of a MarketSimulationModel.
+
+A checkpoint is a single uncompressed .npz file: a JSON header with the model
+options, counters, RNG state and the string/catalog tables, plus flat typed
+columns for shops, clients, products, opinions, the transaction ledger and grid
+positions.
+Nothing is pickled, so loading only builds plain agents from arrays.
+
+Save and load happen between days. A model loaded from a checkpoint continues
+bit-identically to the one that wrote it: the RNG state, the schedule order and
+the order of agents inside every grid cell are all restored.
+"""
+import json
+import numpy as np
+from mesa import Model
+from agents.ClientAgent import ClientAgent
+from agents.ShopAgent import ShopAgent
+from models.Product import Product
+from models.TransactionLedger import LEDGER_COLUMNS
+
+FORMAT_VERSION = 1
+
+
+class Columns:
+    """
+    Collects values column by column and turns them into typed arrays.
+    """
+    def __init__(self, **dtypes):
+        self.dtypes = dtypes
+        self.values = {name: [] for name in dtypes}
+
+    def append(self, **values):
+        for name, value in values.items():
+            self.values[name].append(value)
+
+    def arrays(self, prefix):
+        return {f"{prefix}_{name}": np.array(self.values[name], dtype=dtype) for name, dtype in self.dtypes.items()}
+
+
+def save_checkpoint(model, path):
+    if model.engine is not None:
+        model.engine.sync_to_agents()
+
+    strings = {}
+    catalog = {}
+
+    def string_code(value):
+        return strings.setdefault(value, len(strings))
+
+    def catalog_code(product):
+        return catalog.setdefault(product.catalog, len(catalog))
+
+    shops = Columns(id=np.int64, money=np.float64, scam_probability=np.float64, products=np.int64)
+    clients = Columns(id=np.int64, money=np.float64, product_to_sell=np.int64, needs=np.int64,
+                      inventory=np.int64, opinions=np.int64, exchanges=np.int64)
+    products = Columns(catalog=np.int64, price=np.float64, quantity=np.int64)
+    opinions = Columns(shop_id=np.int64, score=np.float64, history=np.int64)
+    history = Columns(previous_score=np.float64, new_score=np.float64, change=np.float64, reason=np.int64)
+    exchanges = Columns(shop_id=np.int64, count=np.int64)
+
+    # Products are stored shop shelves first, then for every client its needs followed by its inventory
+    for shop in model.shops:
+        shops.append(id=shop.unique_id, money=shop.money, scam_probability=shop.scam_probability,
+                     products=len(shop.products))
+        for product in shop.products:
+            products.append(catalog=catalog_code(product), price=product.price, quantity=product.quantity)
+
+    for client in model.clients:
+        clients.append(id=client.unique_id, money=client.money, product_to_sell=string_code(client.product_to_sell),
+                       needs=len(client.product_needs), inventory=len(client.inventory),
+                       opinions=len(client.opinions), exchanges=len(client.opinion_exchange_count))
+        for product in client.product_needs + client.inventory:
+            products.append(catalog=catalog_code(product), price=product.price, quantity=product.quantity)
+        for shop_id, opinion in client.opinions.items():
+            entries = opinion.get_history()
+            opinions.append(shop_id=shop_id, score=opinion.score, history=len(entries))
+            for entry in entries:
+                history.append(previous_score=entry["previous_score"], new_score=entry["new_score"],
+                               change=entry["change"], reason=string_code(entry["reason"]))
+        for shop_id, count in client.opinion_exchange_count.items():
+            exchanges.append(shop_id=shop_id, count=count)
+
+    # Grid order, so that every cell lists its agents in the same order after loading
+    positions = Columns(id=np.int64, x=np.int64, y=np.int64)
+    for cell_content, (x, y) in model.grid.coord_iter():
+        for agent in cell_content:
+            positions.append(id=agent.unique_id, x=x, y=y)
+
+    version, rng_state, gauss_next = model.random.getstate()
+    header = {
+        "format_version": FORMAT_VERSION,
+        "options": {
+            "width": model.grid.width,
+            "height": model.grid.height,
+            "engine": model.engine_name,
+            "verbosity": model.verbosity,
+            "market_mode": model.market_mode,
+            "scam_probability": model.scam_probability,
+            "opinion_history": model.opinion_history,
+            "opinion_history_size": model.opinion_history_size,
+            "checkpoint_every": model.checkpoint_every,
+            "checkpoint_path": model.checkpoint_path,
+            "opinion_exchange": model.opinion_exchange,
+            "activation": model.activation,
+            "workers": model.workers,
+            "placement": model.placement,
+            "profile": model.profiler is not None,
+            "profile_days": model.profile_days,
+            "profile_path": model.profile_path,
+            "ledger_chunk_size": model.ledger.chunk_size,
+            "ledger_spill_directory": model.ledger.spill_directory,
+        },
+        "record_metrics": model.metrics is not None,
+        "seed": model.seed,
+        "day_count": model.day_count,
+        "running": model.running,
+        "current_id": model.current_id,
+        "schedule_steps": model.schedule.steps,
+        "schedule_time": model.schedule.time,
+        "rng_version": version,
+        "rng_gauss_next": gauss_next,
+        "strings": list(strings),
+        "catalog": [[entry.product_id, entry.name, entry.quality] for entry in catalog],
+        "product_catalog": [list(product) for product in model.product_catalog],
+    }
+
+    arrays = {
+        "header": np.frombuffer(json.dumps(header).encode(), dtype=np.uint8),
+        "rng_state": np.array(rng_state, dtype=np.uint32),
+        "schedule_keys": np.array(model.schedule.get_agent_keys(), dtype=np.int64),
+    }
+    for prefix, columns in (("shop", shops), ("client", clients), ("product", products),
+                            ("opinion", opinions), ("history", history), ("exchange", exchanges),
+                            ("position", positions)):
+        arrays.update(columns.arrays(prefix))
+    arrays.update({f"ledger_{name}": array for name, array in model.ledger.arrays().items()})
+    if model.metrics is not None:
+        arrays.update({f"metrics_{name}": array for name, array in model.metrics.arrays().items()})
+
+    with open(path, "wb") as file:
+        np.savez(file, **arrays)
+
+
+def load_checkpoint(model_class, path):
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files}
+    header = json.loads(arrays["header"].tobytes().decode())
+    if header["format_version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported checkpoint format version {header['format_version']}.")
+
+    model = model_class.__new__(model_class, seed=header["seed"])
+    Model.__init__(model)
+    model.configure(**header["options"])
+    model.day_count = header["day_count"]
+    model.running = header["running"]
+    model.current_id = header["current_id"]
+    model.product_catalog = tuple(tuple(product) for product in header["product_catalog"])
+    model.random.setstate((
+        header["rng_version"],
+        tuple(arrays["rng_state"].tolist()),
+        header["rng_gauss_next"]
+    ))
+
+    strings = header["strings"]
+    catalog = header["catalog"]
+    # Per product, its row in the catalog table of the header
+    catalog_codes = arrays["product_catalog"].tolist()
+    product_price = arrays["product_price"].tolist()
+    product_quantity = arrays["product_quantity"].tolist()
+    next_product = 0
+
+    def take_products(count):
+        nonlocal next_product
+        taken = []
+        for i in range(next_product, next_product + count):
+            product_id, name, quality = catalog[catalog_codes[i]]
+            taken.append(Product(product_id=product_id, name=name, quality=quality,
+                                 price=product_price[i], quantity=product_quantity[i]))
+        next_product += count
+        return taken
+
+    for unique_id, money, scam_probability, num_products in zip(
+            arrays["shop_id"].tolist(), arrays["shop_money"].tolist(), arrays["shop_scam_probability"].tolist(),
+            arrays["shop_products"].tolist()):
+        shop = ShopAgent(unique_id=unique_id, model=model, scam_probability=scam_probability, initial_money=money)
+        for product in take_products(num_products):
+            shop.add_product(product)
+        model.shops.append(shop)
+    model.ledger.load_arrays({name: arrays[f"ledger_{name}"] for name, _ in LEDGER_COLUMNS})
+
+    opinion_shop_id = arrays["opinion_shop_id"].tolist()
+    opinion_score = arrays["opinion_score"].tolist()
+    opinion_history = arrays["opinion_history"].tolist()
+    history = list(zip(
+        arrays["history_previous_score"].tolist(),
+        arrays["history_new_score"].tolist(),
+        arrays["history_change"].tolist(),
+        [strings[code] for code in arrays["history_reason"].tolist()]
+    ))
+    exchange_shop_id = arrays["exchange_shop_id"].tolist()
+    exchange_count = arrays["exchange_count"].tolist()
+    next_opinion = next_history = next_exchange = 0
+    for unique_id, money, product_to_sell, num_needs, num_inventory, num_opinions, num_exchanges in zip(
+            arrays["client_id"].tolist(), arrays["client_money"].tolist(), arrays["client_product_to_sell"].tolist(),
+            arrays["client_needs"].tolist(), arrays["client_inventory"].tolist(), arrays["client_opinions"].tolist(),
+            arrays["client_exchanges"].tolist()):
+        client = ClientAgent(
+            unique_id=unique_id,
+            model=model,
+            money=money,
+            product_to_sell=strings[product_to_sell],
+            product_needs=take_products(num_needs)
+        )
+        for product in take_products(num_inventory):
+            client.add_to_inventory(product)
+        for i in range(next_opinion, next_opinion + num_opinions):
+            opinion = model.create_opinion(opinion_shop_id[i], initial_score=opinion_score[i])
+            if opinion_history[i]:
+                opinion.load_history(history[next_history:next_history + opinion_history[i]])
+                next_history += opinion_history[i]
+            client.opinions[opinion_shop_id[i]] = opinion
+        next_opinion += num_opinions
+        for i in range(next_exchange, next_exchange + num_exchanges):
+            client.opinion_exchange_count[exchange_shop_id[i]] = exchange_count[i]
+        next_exchange += num_exchanges
+        model.clients.append(client)
+
+    agents = {agent.unique_id: agent for agent in model.shops + model.clients}
+    for shop in model.shops:
+        model.schedule.add(shop)
+    for key in arrays["schedule_keys"].tolist():
+        model.schedule.add(agents[key])
+    model.schedule.steps = header["schedule_steps"]
+    model.schedule.time = header["schedule_time"]
+    for unique_id, x, y in zip(arrays["position_id"].tolist(), arrays["position_x"].tolist(),
+                               arrays["position_y"].tolist()):
+        model.grid.place_agent(agents[unique_id], (x, y))
+
+    model.start(header["record_metrics"])
+    if model.metrics is not None:
+        model.metrics.load_arrays({name[len("metrics_"):]: array for name, array in arrays.items()
+                                   if name.startswith("metrics_")})
+    return model
@@ -0,0 +1,69 @@
+import logging
+import logging.handlers
+import marshal
+
+
+def buffered_file_handler(path, capacity=10000, mode="w"):
+    """
+    Returns a handler that keeps up to `capacity` records in memory and writes them
+    to `path` in one go, instead of one synchronous write per record.
+    Records of level WARNING and above are flushed immediately.
+    """
+    target = logging.FileHandler(path, mode=mode)
+    target.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    return logging.handlers.MemoryHandler(capacity, flushLevel=logging.WARNING, target=target)
+
+
+class BinaryLogHandler(logging.Handler):
+    """
+    Writes records as marshal-encoded (created, levelno, name, msg, args) tuples.
+
+    The message template and its arguments are stored as they were passed to the
+    logger, so nothing is formatted while the simulation runs. Use read_binary_log
+    to turn the file back into text.
+    """
+
+    PRIMITIVES = (int, float, str, bool, type(None))
+
+    def __init__(self, path, buffer_size=1 << 20):
+        super().__init__()
+        self.stream = open(path, "wb", buffering=buffer_size)
+
+    def emit(self, record):
+        args = record.args
+        if args:
+            args = tuple(arg if isinstance(arg, self.PRIMITIVES) else str(arg) for arg in args)
+        try:
+            marshal.dump((record.created, record.levelno, record.name, str(record.msg), args), self.stream)
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if not self.stream.closed:
+                self.stream.flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.acquire()
+        try:
+            if not self.stream.closed:
+                self.stream.close()
+        finally:
+            self.release()
+        super().close()
+
+
+def read_binary_log(path):
+    """
+    Yields (created, levelname, name, message) for every record written by a BinaryLogHandler.
+    """
+    with open(path, "rb") as file:
+        while True:
+            try:
+                created, levelno, name, msg, args = marshal.load(file)
+            except EOFError:
+                return
+            yield created, logging.getLevelName(levelno), name, msg % args if args else msg
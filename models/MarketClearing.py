@@ -0,0 +1,68 @@
+import heapq
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MarketClearing:
+    """
+    Daily market clearing phase used by MarketSimulationModel in "clearing" mode.
+
+    Instead of every client probing model.shops in list order, all demand of the
+    day is collected and matched against an order book: per product id, a heap of
+    shop offers keyed by (price, rank), where rank is a per-day random permutation
+    of the shops so equally priced shops take turns instead of shop 0 always winning.
+
+    Clients are served in a random order. A demand is filled from the cheapest
+    offers first and may be split over several shops; an offer leaves the book once
+    its stock runs out. If a client cannot afford the full quantity at the current
+    price it buys what it can afford and stops. Every demand therefore touches only
+    the offers it consumes, never the whole list of shops.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.fills_today = 0
+
+    def build_book(self):
+        shops = self.model.shops
+        ranks = list(range(len(shops)))
+        self.model.random.shuffle(ranks)
+        book = {}
+        for rank, shop in zip(ranks, shops):
+            for product_id, product in shop.products_by_id.items():
+                if product.quantity > 0:
+                    book.setdefault(product_id, []).append((product.price, rank, shop, product))
+        for offers in book.values():
+            heapq.heapify(offers)
+        return book
+
+    def clear(self):
+        book = self.build_book()
+        clients = list(self.model.clients)
+        self.model.random.shuffle(clients)
+        fills = 0
+
+        for client in clients:
+            for need, quantity in client.daily_demand():
+                offers = book.get(need.product_id)
+                bought = 0
+                while offers and bought < quantity:
+                    price, _, shop, product = offers[0]
+                    take = min(quantity - bought, product.quantity)
+                    affordable = take if price * take <= client.money else int(client.money // price)
+                    if affordable <= 0 or not shop.sell_product(client, need.product_id, affordable):
+                        break
+                    bought += affordable
+                    fills += 1
+                    if product.quantity == 0:
+                        heapq.heappop(offers)
+                    if affordable < take:
+                        break  # Out of money
+                if bought:
+                    client.receive_product(need, bought)
+                elif self.model.trace:
+                    logger.info("Client %s: No offer could fill %s of %s", client.unique_id, quantity, need.name)
+
+        self.fills_today = fills
+        return fills
@@ -0,0 +1,145 @@
+from operator import methodcaller
+from time import perf_counter
+from agents.ShopAgent import ShopAgent
+
+# "random":       every client runs its whole step, in a new random order each day (like RandomActivation)
+# "staged":       one random order per day, all clients shop, then all produce, then all share
+# "ordered":      every client runs its whole step in fixed insertion order, without shuffling
+ACTIVATION_MODES = ("random", "staged", "ordered")
+
+# ClientAgent methods run one after the other for all clients in "staged" mode
+CLIENT_STAGES = ("shop_for_needs", "produce_product", "share_with_neighbors", "finish_day")
+
+# Profiler phase (see models/Profiler.py) of every part of ClientAgent.step
+STAGE_PHASES = {
+    "begin_day": "logging",
+    "shop_for_needs": "buy_products",
+    "produce_product": "produce_product",
+    "share_with_neighbors": "share_opinion",
+    "finish_day": "logging",
+}
+
+
+class MarketScheduler:
+    """
+    Scheduler of a MarketSimulationModel that knows its two agent types.
+
+    Shops and clients are kept in separate lists in insertion order, so the model
+    never has to type-filter the population. Only clients are activated; shops
+    are driven by the model's daily restock and pricing phase.
+
+    The activation order is a preallocated list of client indices that is reset
+    and shuffled in place each day. In "random" mode this consumes model.random
+    exactly like mesa's RandomActivation, so results do not change. "ordered"
+    consumes no randomness for the order, so early clients always shop first.
+    """
+
+    def __init__(self, model, activation="random"):
+        if activation not in ACTIVATION_MODES:
+            raise ValueError(f"Unknown activation '{activation}', expected one of {ACTIVATION_MODES}.")
+        self.model = model
+        self.activation = activation
+        self.steps = 0
+        self.time = 0
+        self.shops = []
+        self.clients = []
+        self.client_ids = set()
+        self.identity = []
+        self.order = []
+
+    def add(self, agent):
+        # Running statistics exist once the model has started, later agents are counted on arrival
+        statistics = getattr(self.model, "statistics", None)
+        if isinstance(agent, ShopAgent):
+            self.shops.append(agent)
+            if statistics is not None:
+                statistics.add_shop(agent)
+            return
+        if agent.unique_id in self.client_ids:
+            raise Exception(f"Agent with unique id {agent.unique_id!r} already added to scheduler")
+        self.client_ids.add(agent.unique_id)
+        self.identity.append(len(self.clients))
+        self.order.append(len(self.clients))
+        self.clients.append(agent)
+        if statistics is not None:
+            statistics.add_client(agent)
+
+    def remove(self, agent):
+        statistics = getattr(self.model, "statistics", None)
+        if isinstance(agent, ShopAgent):
+            self.shops.remove(agent)
+            if statistics is not None:
+                statistics.remove_shop(agent)
+            return
+        if statistics is not None:
+            statistics.remove_client(agent)
+        self.client_ids.discard(agent.unique_id)
+        self.clients.remove(agent)
+        self.identity.pop()
+        self.order.pop()
+
+    @property
+    def agents(self):
+        """
+        The activated agents (the clients), like mesa's BaseScheduler.agents.
+        """
+        return list(self.clients)
+
+    def get_agent_keys(self, shuffle=False):
+        keys = [client.unique_id for client in self.clients]
+        if shuffle:
+            self.model.random.shuffle(keys)
+        return keys
+
+    def permutation(self):
+        """
+        Returns today's activation order as indices into self.clients.
+        The returned list is reused, copy it to keep it beyond the next call.
+        """
+        order = self.order
+        order[:] = self.identity
+        if self.activation != "ordered":
+            self.model.random.shuffle(order)
+        return order
+
+    def step(self):
+        clients = self.clients
+        order = self.permutation()
+        profiler = getattr(self.model, "profiler", None)
+        if profiler is not None:
+            self.step_profiled(profiler, [clients[i] for i in order])
+        elif self.activation == "staged":
+            ordered = [clients[i] for i in order]
+            for stage in CLIENT_STAGES:
+                run_stage = methodcaller(stage)
+                for client in ordered:
+                    run_stage(client)
+        else:
+            for i in order:
+                clients[i].step()
+        self.steps += 1
+        self.time += 1
+
+    def step_profiled(self, profiler, ordered):
+        """
+        step() for a model with a profiler: every client runs the parts of its step one
+        by one (begin_day, then CLIENT_STAGES), each timed, in the order of the
+        activation mode, so the results are the same as without profiling.
+        """
+        seconds = dict.fromkeys(STAGE_PHASES, 0.0)
+        if self.activation == "staged":
+            for stage in CLIENT_STAGES:
+                run_stage = methodcaller(stage)
+                start = perf_counter()
+                for client in ordered:
+                    run_stage(client)
+                seconds[stage] = perf_counter() - start
+        else:
+            stages = ("begin_day",) + CLIENT_STAGES
+            for client in ordered:
+                for stage in stages:
+                    start = perf_counter()
+                    getattr(client, stage)()
+                    seconds[stage] += perf_counter() - start
+        for stage, phase in STAGE_PHASES.items():
+            profiler.add(phase, seconds[stage], len(ordered) if stage != "begin_day" else 0)
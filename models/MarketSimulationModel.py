@@ -1,34 +1,143 @@
+import gc
 import logging
+import os
+import random
+from time import perf_counter
+import numpy as np
 from mesa import Model
-from mesa.time import RandomActivation
 from mesa.space import MultiGrid
 from agents.ClientAgent import ClientAgent
 from agents.ShopAgent import ShopAgent
 from models.Product import Product
-from models.Opinion import Opinion
+from models.Opinion import Opinion, HISTORY_POLICIES
+from models.VectorizedMarketEngine import VectorizedMarketEngine
+from models.ShardedMarketEngine import ShardedMarketEngine
+from models.MetricsRecorder import MetricsRecorder
+from models.MarketStatistics import MarketStatistics
+from models.MarketClearing import MarketClearing
+from models.OpinionNetwork import OpinionNetwork
+from models.Checkpoint import save_checkpoint, load_checkpoint
+from models.MarketScheduler import MarketScheduler, ACTIVATION_MODES
+from models.Population import load_population
+from models.Profiler import PhaseProfiler, DayRangeProfiler, UNTIMED
+from models.TransactionLedger import TransactionLedger
 
 logger = logging.getLogger(__name__)
 
+ENGINES = ("agents", "vectorized", "sharded")
+
+# "off": no logging at all, "summary": day markers and daily statistics only,
+# "trace": additionally every agent action (the historical behaviour)
+VERBOSITY_LEVELS = ("off", "summary", "trace")
+
+# "sequential": each client probes model.shops in order (the original behaviour),
+# "clearing": all demand of the day is matched against a price-ordered order book
+MARKET_MODES = ("sequential", "clearing")
+
+# "agents": every client shares with its neighbors in ClientAgent.step (the original behaviour),
+# "sequential": the same shares replayed by an OpinionNetwork after the clients step,
+# "batched": all shares of the day applied at once by an OpinionNetwork
+OPINION_EXCHANGE_MODES = ("agents", "sequential", "batched")
+
+# Opinion exchange of each engine when none is given; the array engines need an OpinionNetwork
+DEFAULT_OPINION_EXCHANGE = {"agents": "agents", "vectorized": "sequential", "sharded": "batched"}
+
+# "legacy": the original agent-by-agent construction (the default, keeps the layouts of earlier versions),
+# "bulk": all agents are generated as arrays and placed on distinct cells drawn at once, a different
+# layout for the same seed
+PLACEMENT_MODES = ("legacy", "bulk")
+
+# (product_id, name, quality, price) of the products shops sell and clients need
+PRODUCT_CATALOG = (
+    (1, "Milk", 8, 2.5),
+    (2, "Eggs", 7, 3.0),
+    (3, "Bread", 6, 1.5),
+    (4, "Butter", 9, 4.0),
+    (5, "Cheese", 7, 5.0),
+)
+
 class MarketSimulationModel(Model):
-    def __init__(self, width, height, num_clients, num_shops):
+    def __init__(self, width, height, num_clients, num_shops, engine="agents", seed=None,
+                 record_metrics=False, verbosity="trace", market_mode="sequential",
+                 scam_probability=0.1, opinion_history="full", opinion_history_size=32,
+                 checkpoint_every=None, checkpoint_path="checkpoint_day{day}.npz",
+                 opinion_exchange=None, activation="random", workers=None, placement="legacy",
+                 population=None, profile=False, profile_days=None, profile_path="profile_days{first}-{last}.prof",
+                 ledger_chunk_size=65536, ledger_spill_directory=None):
+        # mesa's Model.__new__ only sees a seed passed by keyword, reseed so that a positional one counts
+        # too. Without a seed an integer one is drawn (mesa would pick a float, which --seed cannot take);
+        # model.seed reports it, so any run can be repeated.
         super().__init__()
-        self.grid = MultiGrid(width, height, torus=True)
-        self.schedule = RandomActivation(self)
-        self.day_count = 0
+        if seed is None:
+            seed = random.randrange(2 ** 63)
+        self.reset_randomizer(seed)
+        self.configure(
+            width, height,
+            engine=engine,
+            verbosity=verbosity,
+            market_mode=market_mode,
+            scam_probability=scam_probability,
+            opinion_history=opinion_history,
+            opinion_history_size=opinion_history_size,
+            checkpoint_every=checkpoint_every,
+            checkpoint_path=checkpoint_path,
+            opinion_exchange=opinion_exchange,
+            activation=activation,
+            workers=workers,
+            placement=placement,
+            profile=profile,
+            profile_days=profile_days,
+            profile_path=profile_path,
+            ledger_chunk_size=ledger_chunk_size,
+            ledger_spill_directory=ledger_spill_directory
+        )
+
+        # Construction creates a few objects per agent and opinion, all long-lived; pausing the cyclic
+        # garbage collector keeps it from rescanning them over and over (about 4x faster at 100k clients)
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            # A population (a dict of arrays or a .npz path, see models/Population.py)
+            # replaces num_clients and num_shops
+            if population is not None:
+                self.populate(population if isinstance(population, dict) else load_population(population))
+            elif self.placement == "bulk":
+                self.populate(self.generate_population(num_clients, num_shops))
+            else:
+                self.create_agents(num_clients, num_shops)
+
+            # Initialize client opinions about all shops, the same as create_opinion() for each of them
+            shop_ids = [shop.unique_id for shop in self.shops]
+            history, history_size = self.opinion_history, self.opinion_history_size
+            for client in self.clients:
+                client.opinions = {shop_id: Opinion(shop_id, 0.0, history, history_size) for shop_id in shop_ids}
+
+            self.start(record_metrics)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    @property
+    def seed(self):
+        """
+        The seed model.random was created from, pass it as `seed` to repeat the run.
+        """
+        return self._seed
 
+    def create_agents(self, num_clients, num_shops):
+        """
+        The original construction for placement="legacy": every agent is placed on a
+        random cell of a freshly listed set of empty cells, O(agents x cells).
+        """
         # Predefined list of products
         predefined_products = [
-            Product(product_id=1, name="Milk", quality=8, price=2.5, quantity=0),
-            Product(product_id=2, name="Eggs", quality=7, price=3.0, quantity=0),
-            Product(product_id=3, name="Bread", quality=6, price=1.5, quantity=0),
-            Product(product_id=4, name="Butter", quality=9, price=4.0, quantity=0),
-            Product(product_id=5, name="Cheese", quality=7, price=5.0, quantity=0),
+            Product(product_id=product_id, name=name, quality=quality, price=price, quantity=0)
+            for product_id, name, quality, price in PRODUCT_CATALOG
         ]
 
         # Create shops with randomly selected products
-        self.shops = []
         for i in range(num_shops):
-            shop = ShopAgent(unique_id=i, model=self)
+            shop = ShopAgent(unique_id=i, model=self, scam_probability=self.scam_probability)
             num_products = self.random.randint(2, 4)  # Each shop has 2 to 4 products
             for product in self.random.sample(predefined_products, num_products):
                 shop.add_product(Product(
@@ -39,6 +148,7 @@ class MarketSimulationModel(Model):
                     quantity=self.random.randint(10, 50)  # Random initial stock
                 ))
             self.shops.append(shop)
+            self.schedule.add(shop)
             empty_cells = [(x, y) for (x, y) in self.grid.empties]
             if empty_cells:
                 random_position = self.random.choice(empty_cells)
@@ -47,7 +157,6 @@ class MarketSimulationModel(Model):
                 raise RuntimeError("No empty cells available for placing the agent.")
 
         # Create clients with randomly selected product needs
-        self.clients = []
         for i in range(num_clients):
             num_needs = self.random.randint(2, 4)  # Each client has 2 to 4 needs
             product_needs = [
@@ -76,45 +185,364 @@ class MarketSimulationModel(Model):
             else:
                 raise RuntimeError("No empty cells available for placing the agent.")
 
-        # Initialize client opinions about all shops
-        for client in self.clients:
-            for shop in self.shops:
-                client.opinions[shop.unique_id] = Opinion(shop_id=shop.unique_id, initial_score=0.0)
+    def generate_population(self, num_clients, num_shops):
+        """
+        Draws a random population (see models/Population.py) for placement="bulk":
+        2 to 4 shelves of 10 to 50 units per shop and 2 to 4 needs of 1 to 5 units per
+        client, like create_agents, and distinct cells for all agents, all as NumPy
+        draws from a generator seeded by model.random.
+        """
+        num_cells = self.grid.width * self.grid.height
+        if num_shops + num_clients > num_cells:
+            raise RuntimeError(f"Cannot place {num_shops + num_clients} agents on {num_cells} cells.")
+        rng = np.random.default_rng(self.random.getrandbits(64))
+        catalog_id = np.array([product[0] for product in PRODUCT_CATALOG], dtype=np.int64)
+
+        def product_rows(count, low, high):
+            # A random subset of 2 to 4 catalog products per row, as ids padded with -1, and quantities
+            slots = min(4, len(catalog_id))
+            order = np.argsort(rng.random((count, len(catalog_id))), axis=1)[:, :slots]
+            used = np.arange(slots) < rng.integers(2, slots + 1, size=count)[:, None]
+            ids = np.where(used, catalog_id[order], -1)
+            quantities = np.where(used, rng.integers(low, high + 1, size=(count, slots)), 0)
+            return ids, quantities
+
+        offer_id, offer_quantity = product_rows(num_shops, 10, 50)
+        need_id, need_quantity = product_rows(num_clients, 1, 5)
+        cells = rng.choice(num_cells, size=num_shops + num_clients, replace=False)
+        x, y = np.divmod(cells, self.grid.height)
+        return {
+            "catalog_id": catalog_id,
+            "catalog_name": np.array([product[1] for product in PRODUCT_CATALOG], dtype=str),
+            "catalog_quality": np.array([product[2] for product in PRODUCT_CATALOG], dtype=np.int64),
+            "catalog_price": np.array([product[3] for product in PRODUCT_CATALOG], dtype=np.float64),
+            "shop_money": np.full(num_shops, 1000.0),
+            "shop_x": x[:num_shops],
+            "shop_y": y[:num_shops],
+            "offer_id": offer_id,
+            "offer_quantity": offer_quantity,
+            "client_money": np.full(num_clients, 500.0),
+            "client_x": x[num_shops:],
+            "client_y": y[num_shops:],
+            "need_id": need_id,
+            "need_quantity": need_quantity,
+        }
+
+    def populate(self, population):
+        """
+        Creates and places the shops and clients of a population (see models/Population.py).
+        """
+        self.product_catalog = tuple(zip(
+            population["catalog_id"].tolist(), population["catalog_name"].tolist(),
+            population["catalog_quality"].tolist(), population["catalog_price"].tolist()))
+        catalog = {product_id: (name, quality, price) for product_id, name, quality, price in self.product_catalog}
+
+        def products(ids, quantities):
+            return [
+                Product(product_id=product_id, name=catalog[product_id][0], quality=catalog[product_id][1],
+                        price=catalog[product_id][2], quantity=quantity)
+                for product_id, quantity in zip(ids, quantities) if product_id >= 0
+            ]
+
+        num_shops = len(population["shop_money"])
+        for i, (money, x, y, ids, quantities) in enumerate(zip(
+                population["shop_money"].tolist(), population["shop_x"].tolist(), population["shop_y"].tolist(),
+                population["offer_id"].tolist(), population["offer_quantity"].tolist())):
+            shop = ShopAgent(unique_id=i, model=self, scam_probability=self.scam_probability, initial_money=money)
+            for product in products(ids, quantities):
+                shop.add_product(product)
+            self.shops.append(shop)
+            self.schedule.add(shop)
+            self.grid.place_agent(shop, (x, y))
+
+        for i, (money, x, y, ids, quantities) in enumerate(zip(
+                population["client_money"].tolist(), population["client_x"].tolist(),
+                population["client_y"].tolist(), population["need_id"].tolist(),
+                population["need_quantity"].tolist())):
+            client = ClientAgent(
+                unique_id=i + num_shops,
+                model=self,
+                money=money,
+                product_to_sell="Cookies",
+                product_needs=products(ids, quantities)
+            )
+            self.clients.append(client)
+            self.schedule.add(client)
+            self.grid.place_agent(client, (x, y))
+
+    def configure(self, width, height, engine, verbosity, market_mode, scam_probability,
+                  opinion_history, opinion_history_size, checkpoint_every, checkpoint_path,
+                  opinion_exchange=None, activation="random", workers=None, placement="legacy",
+                  profile=False, profile_days=None, profile_path="profile_days{first}-{last}.prof",
+                  ledger_chunk_size=65536, ledger_spill_directory=None):
+        """
+        Validates the options and sets up an empty grid and schedule.
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}.")
+        if verbosity not in VERBOSITY_LEVELS:
+            raise ValueError(f"Unknown verbosity '{verbosity}', expected one of {VERBOSITY_LEVELS}.")
+        if market_mode not in MARKET_MODES:
+            raise ValueError(f"Unknown market mode '{market_mode}', expected one of {MARKET_MODES}.")
+        if opinion_history not in HISTORY_POLICIES:
+            raise ValueError(f"Unknown opinion history policy '{opinion_history}', expected one of {HISTORY_POLICIES}.")
+        if opinion_exchange is None:
+            opinion_exchange = DEFAULT_OPINION_EXCHANGE.get(engine)
+        if opinion_exchange not in OPINION_EXCHANGE_MODES:
+            raise ValueError(f"Unknown opinion exchange '{opinion_exchange}', expected one of {OPINION_EXCHANGE_MODES}.")
+        if activation not in ACTIVATION_MODES:
+            raise ValueError(f"Unknown activation '{activation}', expected one of {ACTIVATION_MODES}.")
+        if placement not in PLACEMENT_MODES:
+            raise ValueError(f"Unknown placement '{placement}', expected one of {PLACEMENT_MODES}.")
+        if engine != "agents" and market_mode != "sequential":
+            raise ValueError(f"The {engine} engine only supports the 'sequential' market mode.")
+        if engine != "agents" and opinion_exchange == "agents":
+            raise ValueError(f"The {engine} engine does not step the clients, use opinion_exchange "
+                             f"'{DEFAULT_OPINION_EXCHANGE[engine]}' so opinions are shared.")
+        if engine == "sharded" and opinion_exchange == "sequential":
+            raise ValueError("The sharded engine shares opinions batched, use opinion_exchange 'batched'.")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers < 1:
+            raise ValueError(f"workers must be at least 1, got {workers}.")
+        self.grid = MultiGrid(width, height, torus=True)
+        self.schedule = MarketScheduler(self, activation)
+        self.day_count = 0
+        self.engine_name = engine
+        self.verbosity = verbosity
+        # Checked by the agents before every hot-path log call
+        self.trace = verbosity == "trace"
+        self.log_summary = verbosity != "off"
+        self.market_mode = market_mode
+        self.scam_probability = scam_probability
+        self.opinion_history = opinion_history
+        self.opinion_history_size = opinion_history_size
+        self.checkpoint_every = checkpoint_every
+        self.checkpoint_path = checkpoint_path
+        self.opinion_exchange = opinion_exchange
+        self.activation = activation
+        # Worker processes of the sharded engine
+        self.workers = workers
+        self.placement = placement
+        # (product_id, name, quality, price) with the base prices agents started from, populate() replaces it
+        self.product_catalog = PRODUCT_CATALOG
+        # Phase timings and counters (see models/Profiler.py), None keeps the hot paths uninstrumented
+        self.profiler = PhaseProfiler() if profile else None
+        # cProfile over the days profile_days = (first, last), 1-based
+        self.day_profiler = DayRangeProfiler(*profile_days, profile_path) if profile_days else None
+        self.profile_days = tuple(profile_days) if profile_days else None
+        self.profile_path = profile_path
+        # Every sale of the agents engine (see models/TransactionLedger.py); with a spill directory,
+        # full chunks of ledger_chunk_size sales are moved to memory-mapped files there
+        self.ledger = TransactionLedger(ledger_chunk_size, ledger_spill_directory)
+        self.shops = []
+        self.clients = []
+        # Built by start(), None while the agents are being created
+        self.statistics = None
+
+    def start(self, record_metrics):
+        """
+        Builds the components that work on the populated shops and clients.
+        """
+        self.opinion_network = (
+            OpinionNetwork(self, self.opinion_exchange) if self.opinion_exchange != "agents" else None
+        )
+        # The vectorized and sharded engines take over the agents' state from here on
+        if self.engine_name == "vectorized":
+            self.engine = VectorizedMarketEngine(self)
+        elif self.engine_name == "sharded":
+            self.engine = ShardedMarketEngine(self, self.workers)
+        else:
+            self.engine = None
+        self.statistics = MarketStatistics(self) if self.engine is None else None
+        self.metrics = MetricsRecorder(self) if record_metrics else None
+        self.clearing = MarketClearing(self) if self.market_mode == "clearing" else None
+
+    def close(self):
+        """
+        Releases the engine's resources, i.e. stops the sharded engine's workers, and
+        deletes the spilled chunks of the transaction ledger.
+        """
+        if self.engine is not None:
+            self.engine.close()
+        self.ledger.close()
+
+    def create_opinion(self, shop_id, initial_score=0.0):
+        return Opinion(
+            shop_id=shop_id,
+            initial_score=initial_score,
+            history=self.opinion_history,
+            history_size=self.opinion_history_size
+        )
+
+    def move_agent(self, agent, pos):
+        self.grid.move_agent(agent, pos)
+        if self.opinion_network is not None:
+            self.opinion_network.positions_changed()
+
+    def phase(self, name, calls=0):
+        """
+        Context manager timing `name` as a phase of the current day when profiling,
+        a no-op otherwise. `calls` is the number of agent calls the phase makes.
+        """
+        if self.profiler is None:
+            return UNTIMED
+        return self.profiler.phase(name, calls)
 
     def step(self):
-        logger.info(f"\n--- Day {self.day_count + 1} ---")
+        profiler = self.profiler
+        if profiler is not None:
+            profiler.begin_day()
+        if self.day_profiler is not None:
+            self.day_profiler.before_step(self.day_count + 1)
+
+        if self.log_summary:
+            logger.info("\n--- Day %s ---", self.day_count + 1)
 
-        # Replenish client needs at the start of each day
-        for agent in self.schedule.agents:
-            if isinstance(agent, ClientAgent):
-                agent.replenish_needs()
+        if self.engine is not None:
+            self.engine.step()
+            self.day_count += 1
+            if profiler is not None:
+                profiler.count("sell_successes", self.engine.sales_today)
+                profiler.count("productions", self.engine.producers_today)
+                if self.opinion_network is not None:
+                    profiler.count("opinions_shared", self.opinion_network.shares_today)
+            # Agent objects are only refreshed when someone reads the statistics
+            if self.log_summary and logger.isEnabledFor(logging.INFO):
+                with self.phase("logging"):
+                    self.log_daily_statistics()
+        else:
+            self.statistics.start_day()
+            # Replenish client needs at the start of each day
+            with self.phase("replenish_needs", len(self.schedule.clients)):
+                for client in self.schedule.clients:
+                    client.replenish_needs()
 
+            if profiler is None:
+                for shop in self.shops:
+                    shop.restock_products()
+                    shop.adjust_prices()
+            else:
+                self.profiled_shops(profiler)
+
+            # Match all of today's demand before clients produce and share opinions
+            if self.clearing is not None:
+                with self.phase("market_clearing", len(self.schedule.clients)):
+                    self.clearing.clear()
+
+            self.schedule.step()
+            if self.opinion_network is not None:
+                with self.phase("opinion_network", len(self.opinion_network.queued)):
+                    self.opinion_network.propagate()
+                if profiler is not None:
+                    profiler.count("opinions_shared", self.opinion_network.shares_today)
+            self.day_count += 1
+
+            # Log daily statistics
+            if self.log_summary and logger.isEnabledFor(logging.INFO):
+                with self.phase("logging"):
+                    self.log_daily_statistics()
+
+        if self.metrics is not None:
+            with self.phase("metrics"):
+                self.metrics.record()
+
+        if self.checkpoint_every and self.day_count % self.checkpoint_every == 0:
+            with self.phase("checkpoint"):
+                self.save_checkpoint(self.checkpoint_path.format(day=self.day_count))
+
+        if self.day_profiler is not None:
+            self.day_profiler.after_step(self.day_count)
+        if profiler is not None:
+            profiler.end_day(self.day_count)
+
+    def profiled_shops(self, profiler):
+        """
+        The shops' restock and pricing phase of step(), timing both methods separately.
+        """
+        restock = adjust = 0.0
         for shop in self.shops:
+            start = perf_counter()
             shop.restock_products()
+            middle = perf_counter()
             shop.adjust_prices()
+            restock += middle - start
+            adjust += perf_counter() - middle
+        profiler.add("restock_products", restock, len(self.shops))
+        profiler.add("adjust_prices", adjust, len(self.shops))
 
-        self.schedule.step()
-        self.day_count += 1
+    def save_checkpoint(self, path):
+        """
+        Writes the full simulation state to `path` (see models/Checkpoint.py).
+        """
+        save_checkpoint(self, path)
 
-        # Log daily statistics
-        self.log_daily_statistics()
+    @classmethod
+    def load_checkpoint(cls, path):
+        """
+        Returns a model restored from a checkpoint written by save_checkpoint().
+        """
+        return load_checkpoint(cls, path)
 
     def log_daily_statistics(self):
-        logger.info(f"\n--- Day {self.day_count} ---")
-        logger.info("\nShop Statistics:")
-        for shop in self.shops:
-            total_stock = sum(p.quantity for p in shop.products)
-            logger.info(f"Shop {shop.unique_id}: Money = {shop.money:.2f}, Total Stock = {total_stock}")
+        """
+        Logs the market totals and the shops and clients that changed since the
+        previous report, so a quiet day costs O(changed agents), not O(agents).
+        """
+        totals = self.market_statistics()
+        logger.info("\n--- Day %s ---", self.day_count)
+        logger.info("Market: Shop Money = %.2f, Client Money = %.2f, Supply = %s, Demand = %s, Sold = %s, "
+                    "Starved = %s", totals["shop_money"], totals["client_money"], sum(totals["supply"].values()),
+                    sum(totals["demand"].values()), sum(totals["sold"].values()), sum(totals["starved"].values()))
+        statistics = self.statistics
+        if statistics is not None:
+            shops, clients = statistics.take_changed()
+        else:
+            shop_rows, client_rows = self.engine.take_changed()
+            self.engine.sync_to_agents()
+            shops = [self.engine.shops[s] for s in shop_rows]
+            clients = [self.engine.clients[c] for c in client_rows]
+
+        logger.info("\nShop Statistics (changed shops):")
+        for shop in shops:
+            logger.info("Shop %s: Money = %.2f, Total Stock = %s", shop.unique_id, shop.money,
+                        totals["shop_stock"][shop.unique_id])
             for product in shop.products:
-                logger.info(f"  {product}")
+                logger.info("  %s", product)
 
-        logger.info("\nClient Statistics:")
-        for agent in self.schedule.agents:
-            if isinstance(agent, ClientAgent):
+        logger.info("\nClient Statistics (changed clients):")
+        for client in clients:
+            if statistics is not None:
+                inventory_summary = statistics.inventory_summary(client)
+            else:
                 inventory_summary = ", ".join(
-                    f"{p.name}: {p.quantity}" for p in agent.inventory
+                    f"{p.name}: {p.quantity}" for p in client.inventory
                 ) or "Empty"
-                logger.info(f"Client {agent.unique_id}: Money = {agent.money:.2f}, Inventory = {inventory_summary}")
+            logger.info("Client %s: Money = %.2f, Inventory = %s", client.unique_id, client.money, inventory_summary)
+
+    def daily_aggregates(self):
+        """
+        Returns per-shop money and stock and per-client money and inventory totals,
+        in model.shops / model.clients order, for either engine.
+        """
+        if self.engine is not None:
+            return self.engine.aggregates()
+        return {
+            "shop_money": [shop.money for shop in self.shops],
+            "shop_stock": [sum(p.quantity for p in shop.products) for shop in self.shops],
+            "client_money": [client.money for client in self.clients],
+            "client_inventory": [sum(p.quantity for p in client.inventory) for client in self.clients],
+        }
+
+    def market_statistics(self):
+        """
+        Returns the market totals described in models/MarketStatistics.py: stock per
+        shop, supply, today's demand and sales and starved clients per product id,
+        and the money held by all shops and all clients. Cheap to call at any time.
+        """
+        if self.engine is not None:
+            return self.engine.statistics()
+        return self.statistics.snapshot()
 
     def print_grid(self):
         grid_str = ""
@@ -128,4 +556,4 @@ class MarketSimulationModel(Model):
                 else:
                     grid_str += ". "
             grid_str += "\n"
-        logger.info(f"\nGrid:\n{grid_str}")
\ No newline at end of file
+        logger.info("\nGrid:\n%s", grid_str)
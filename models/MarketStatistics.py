@@ -0,0 +1,169 @@
+class MarketStatistics:
+    """
+    Running market aggregates of a MarketSimulationModel on the "agents" engine.
+
+    The totals are built once from the agents and then updated by the agents
+    where they change stock, money, needs or inventories (ShopAgent.sell_product
+    and restock_products, ClientAgent.daily_demand, receive_product,
+    produce_product and replenish_needs), so reading them never scans the
+    population. Money totals are running sums and may differ from a fresh sum in
+    the last digits.
+
+    Tracked:
+      - shop_stock: total units on the shelves of every shop
+      - supply: units on all shelves per product id
+      - demand / sold: units requested / bought today per product id
+      - starved: per needed product id, how many clients hold less than their need
+      - shop_money / client_money: money held by all shops / all clients
+    The daily report only lists the shops and clients changed since the previous
+    report (take_changed()); client inventory summaries are cached and only
+    rebuilt for clients whose inventory changed. Agents added to the schedule
+    after construction are registered by MarketScheduler.add.
+    """
+
+    def __init__(self, model):
+        self.shop_stock = {}
+        self.supply = {}
+        self.shop_money = 0.0
+        self.client_money = 0.0
+        self.starved = {}
+        self.starved_by_client = {}
+        self.summaries = {}
+        # Agents whose money, stock, prices or inventory changed since the last report, by unique id
+        self.changed_shops = {}
+        self.changed_clients = {}
+        for shop in model.shops:
+            self.add_shop(shop)
+        for client in model.clients:
+            self.add_client(client)
+
+        self.demand = {}
+        self.sold = {}
+
+    def add_shop(self, shop):
+        """
+        Counts a shop in the totals, MarketScheduler.add calls it for shops added later.
+        """
+        if shop.unique_id in self.shop_stock:
+            return
+        self.shop_stock[shop.unique_id] = sum(product.quantity for product in shop.products)
+        self.shop_money += shop.money
+        for product in shop.products:
+            self.supply[product.product_id] = self.supply.get(product.product_id, 0) + product.quantity
+
+    def remove_shop(self, shop):
+        if self.shop_stock.pop(shop.unique_id, None) is None:
+            return
+        self.shop_money -= shop.money
+        for product in shop.products:
+            self.supply[product.product_id] = self.supply.get(product.product_id, 0) - product.quantity
+        self.changed_shops.pop(shop.unique_id, None)
+
+    def add_client(self, client):
+        """
+        Counts a client in the totals, MarketScheduler.add calls it for clients added later.
+        """
+        if client.unique_id in self.starved_by_client:
+            return
+        self.client_money += client.money
+        for need in client.product_needs:
+            self.starved.setdefault(need.product_id, 0)
+        self.starved_by_client[client.unique_id] = set()
+        self.needs_changed(client)
+
+    def remove_client(self, client):
+        previous = self.starved_by_client.pop(client.unique_id, None)
+        if previous is None:
+            return
+        self.client_money -= client.money
+        for product_id in previous:
+            self.starved[product_id] -= 1
+        self.summaries.pop(client.unique_id, None)
+        self.changed_clients.pop(client.unique_id, None)
+
+    def start_day(self):
+        self.demand = {}
+        self.sold = {}
+
+    def demanded(self, product_id, quantity):
+        self.demand[product_id] = self.demand.get(product_id, 0) + quantity
+        self.sold.setdefault(product_id, 0)
+
+    # Shops and clients that were never added (e.g. built by hand in a benchmark) still trade,
+    # so the hooks below treat unknown ids and product ids as starting from zero
+
+    def product_sold(self, shop, client, product, quantity, cost):
+        self.shop_stock[shop.unique_id] = self.shop_stock.get(shop.unique_id, 0) - quantity
+        self.supply[product.product_id] = self.supply.get(product.product_id, 0) - quantity
+        self.sold[product.product_id] = self.sold.get(product.product_id, 0) + quantity
+        self.shop_money += cost
+        self.client_money -= cost
+        self.changed_shops[shop.unique_id] = shop
+        self.changed_clients[client.unique_id] = client
+
+    def restocked(self, shop, product, quantity, cost):
+        self.shop_stock[shop.unique_id] = self.shop_stock.get(shop.unique_id, 0) + quantity
+        self.supply[product.product_id] = self.supply.get(product.product_id, 0) + quantity
+        self.shop_money -= cost
+        self.changed_shops[shop.unique_id] = shop
+
+    def price_changed(self, shop):
+        self.changed_shops[shop.unique_id] = shop
+
+    def produced(self, client, profit):
+        self.client_money += profit
+        self.inventory_changed(client)
+
+    def inventory_changed(self, client):
+        """
+        Records a change of a client's inventory (or money) for the next report.
+        """
+        self.needs_changed(client)
+        self.summaries.pop(client.unique_id, None)
+        self.changed_clients[client.unique_id] = client
+
+    def needs_changed(self, client):
+        """
+        Updates the starved counts of a client whose inventory or needs changed.
+        """
+        starved = set()
+        for need in client.product_needs:
+            item = client.inventory_by_id.get(need.product_id)
+            if item is None or item.quantity < need.quantity:
+                starved.add(need.product_id)
+        previous = self.starved_by_client.get(client.unique_id, set())
+        for product_id in starved - previous:
+            self.starved[product_id] = self.starved.get(product_id, 0) + 1
+        for product_id in previous - starved:
+            self.starved[product_id] -= 1
+        self.starved_by_client[client.unique_id] = starved
+
+    def take_changed(self):
+        """
+        Returns the shops and the clients changed since the last call, each in
+        unique id (i.e. creation) order, and starts collecting anew.
+        """
+        shops = [self.changed_shops[key] for key in sorted(self.changed_shops)]
+        clients = [self.changed_clients[key] for key in sorted(self.changed_clients)]
+        self.changed_shops = {}
+        self.changed_clients = {}
+        return shops, clients
+
+    def inventory_summary(self, client):
+        summary = self.summaries.get(client.unique_id)
+        if summary is None:
+            summary = self.summaries[client.unique_id] = ", ".join(
+                f"{p.name}: {p.quantity}" for p in client.inventory
+            ) or "Empty"
+        return summary
+
+    def snapshot(self):
+        return {
+            "shop_stock": dict(self.shop_stock),
+            "supply": dict(self.supply),
+            "demand": dict(self.demand),
+            "sold": dict(self.sold),
+            "starved": dict(self.starved),
+            "shop_money": self.shop_money,
+            "client_money": self.client_money,
+        }
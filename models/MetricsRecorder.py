@@ -0,0 +1,181 @@
+import numpy as np
+
+
+class MetricsRecorder:
+    """
+    Columnar per-day metrics of a MarketSimulationModel.
+
+    Each record() appends one row per day to preallocated NumPy arrays:
+      - shop_money (days x shops) and shop_stock (days x shops)
+      - prices (days x shops x shelf slots), product ids in offer_product_ids
+      - client_money (days x clients)
+      - client_inventory (days x clients x need slots), product ids in need_product_ids
+    Arrays start with room for chunk_days rows and double in size when full.
+    Nothing is formatted as text. main.py plots from the files ResultStream
+    writes (models/Report.py), not from these arrays.
+    """
+
+    def __init__(self, model, chunk_days=64):
+        self.model = model
+        self.chunk_days = chunk_days
+        self.shop_ids = np.array([shop.unique_id for shop in model.shops], dtype=np.int64)
+        self.client_ids = np.array([client.unique_id for client in model.clients], dtype=np.int64)
+
+        offer_slots = max([len(shop.products) for shop in model.shops] + [1])
+        need_slots = max([len(client.product_needs) for client in model.clients] + [1])
+        self.offer_product_ids = np.full((len(model.shops), offer_slots), -1, dtype=np.int64)
+        for s, shop in enumerate(model.shops):
+            for k, product in enumerate(shop.products):
+                self.offer_product_ids[s, k] = product.product_id
+        self.need_product_ids = np.full((len(model.clients), need_slots), -1, dtype=np.int64)
+        for c, client in enumerate(model.clients):
+            for k, need in enumerate(client.product_needs):
+                self.need_product_ids[c, k] = need.product_id
+
+        self.num_days = 0
+        self._days = np.zeros(0, dtype=np.int64)
+        self._shop_money = np.zeros((0, len(model.shops)), dtype=np.float64)
+        self._shop_stock = np.zeros((0, len(model.shops)), dtype=np.int64)
+        self._prices = np.zeros((0, len(model.shops), offer_slots), dtype=np.float64)
+        self._client_money = np.zeros((0, len(model.clients)), dtype=np.float64)
+        self._client_inventory = np.zeros((0, len(model.clients), need_slots), dtype=np.int64)
+
+    def _grow(self):
+        # Doubling the capacity copies every recorded day O(1) times on average over a run
+        capacity = max(self.chunk_days, 2 * len(self._days))
+
+        def extend(array):
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:self.num_days] = array[:self.num_days]
+            return grown
+
+        self._days = extend(self._days)
+        self._shop_money = extend(self._shop_money)
+        self._shop_stock = extend(self._shop_stock)
+        self._prices = extend(self._prices)
+        self._client_money = extend(self._client_money)
+        self._client_inventory = extend(self._client_inventory)
+
+    def record(self):
+        if self.num_days == len(self._days):
+            self._grow()
+        row = self.num_days
+        self._days[row] = self.model.day_count
+
+        engine = self.model.engine
+        if engine is not None:
+            self._shop_money[row] = engine.shop_money
+            self._shop_stock[row] = np.where(engine.offer_valid, engine.offer_qty, 0).sum(axis=1)
+            self._prices[row] = engine.offer_price
+            self._client_money[row] = engine.client_money
+            self._client_inventory[row] = np.where(engine.inv_present, engine.inv_qty, 0)
+        else:
+            self._record_agents(row)
+        self.num_days += 1
+
+    def _record_agents(self, row):
+        shops = self.model.shops
+        clients = self.model.clients
+        self._shop_money[row] = [shop.money for shop in shops]
+        self._shop_stock[row] = [sum(p.quantity for p in shop.products) for shop in shops]
+        prices = self._prices[row]
+        for s, shop in enumerate(shops):
+            for k, product in enumerate(shop.products):
+                prices[s, k] = product.price
+        self._client_money[row] = [client.money for client in clients]
+        inventory = self._client_inventory[row]
+        for c, client in enumerate(clients):
+            if not client.inventory:
+                continue
+            held = {item.product_id: item.quantity for item in client.inventory}
+            for k, need in enumerate(client.product_needs):
+                inventory[c, k] = held.get(need.product_id, 0)
+
+    @property
+    def days(self):
+        return self._days[:self.num_days]
+
+    @property
+    def shop_money(self):
+        return self._shop_money[:self.num_days]
+
+    @property
+    def shop_stock(self):
+        return self._shop_stock[:self.num_days]
+
+    @property
+    def prices(self):
+        return self._prices[:self.num_days]
+
+    @property
+    def client_money(self):
+        return self._client_money[:self.num_days]
+
+    @property
+    def client_inventory(self):
+        return self._client_inventory[:self.num_days]
+
+    def arrays(self):
+        return {
+            "days": self.days,
+            "shop_ids": self.shop_ids,
+            "client_ids": self.client_ids,
+            "offer_product_ids": self.offer_product_ids,
+            "need_product_ids": self.need_product_ids,
+            "shop_money": self.shop_money,
+            "shop_stock": self.shop_stock,
+            "prices": self.prices,
+            "client_money": self.client_money,
+            "client_inventory": self.client_inventory,
+        }
+
+    def load_arrays(self, arrays):
+        """
+        Replaces the recorded days with the ones in `arrays`, as returned by arrays().
+        """
+        self.num_days = len(arrays["days"])
+        self._days = np.array(arrays["days"], dtype=np.int64)
+        self._shop_money = np.array(arrays["shop_money"], dtype=np.float64)
+        self._shop_stock = np.array(arrays["shop_stock"], dtype=np.int64)
+        self._prices = np.array(arrays["prices"], dtype=np.float64)
+        self._client_money = np.array(arrays["client_money"], dtype=np.float64)
+        self._client_inventory = np.array(arrays["client_inventory"], dtype=np.int64)
+
+    def to_npz(self, path):
+        np.savez_compressed(path, **self.arrays())
+
+    def to_parquet(self, directory):
+        """
+        Writes shops.parquet, offers.parquet and clients.parquet in long format.
+        Requires pandas with a parquet engine (pyarrow or fastparquet).
+        """
+        import os
+        import pandas as pd
+
+        os.makedirs(directory, exist_ok=True)
+        num_days = self.num_days
+        num_shops = len(self.shop_ids)
+        num_clients = len(self.client_ids)
+
+        pd.DataFrame({
+            "day": np.repeat(self.days, num_shops),
+            "shop_id": np.tile(self.shop_ids, num_days),
+            "money": self.shop_money.ravel(),
+            "stock": self.shop_stock.ravel(),
+        }).to_parquet(os.path.join(directory, "shops.parquet"), index=False)
+
+        offer_slots = self.offer_product_ids.shape[1]
+        valid = np.tile((self.offer_product_ids >= 0).ravel(), num_days)
+        pd.DataFrame({
+            "day": np.repeat(self.days, num_shops * offer_slots),
+            "shop_id": np.tile(np.repeat(self.shop_ids, offer_slots), num_days),
+            "product_id": np.tile(self.offer_product_ids.ravel(), num_days),
+            "price": self.prices.ravel(),
+        })[valid].to_parquet(os.path.join(directory, "offers.parquet"), index=False)
+
+        pd.DataFrame({
+            "day": np.repeat(self.days, num_clients),
+            "client_id": np.tile(self.client_ids, num_days),
+            "money": self.client_money.ravel(),
+            "inventory": self.client_inventory.sum(axis=2).ravel(),
+        }).to_parquet(os.path.join(directory, "clients.parquet"), index=False)
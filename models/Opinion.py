@@ -1,11 +1,42 @@
+from array import array
+from collections import deque
+
+# How Opinion keeps its history of score changes:
+#   "full":    a dict per change (the original behaviour)
+#   "none":    nothing is kept
+#   "ring":    only the last history_size changes, as tuples
+#   "compact": every change, as float32 arrays plus integer reason codes
+HISTORY_POLICIES = ("full", "none", "ring", "compact")
+
+# Reason strings are stored once and referred to by their index in the ring and compact policies
+REASONS = []
+REASON_CODES = {}
+
+
+def reason_code(reason):
+    code = REASON_CODES.get(reason)
+    if code is None:
+        code = len(REASONS)
+        REASONS.append(reason)
+        REASON_CODES[reason] = code
+    return code
+
+
 class Opinion:
     """
     Represents a client's opinion about a specific shop.
     """
-    def __init__(self, shop_id, initial_score=0.0):
+    __slots__ = ("shop_id", "score", "history_policy", "history_size", "history")
+
+    def __init__(self, shop_id, initial_score=0.0, history="full", history_size=32):
+        if history not in HISTORY_POLICIES:
+            raise ValueError(f"Unknown history policy '{history}', expected one of {HISTORY_POLICIES}.")
         self.shop_id = shop_id
         self.score = initial_score
-        self.history = [] 
+        self.history_policy = history
+        self.history_size = history_size
+        # Created on the first change, most opinions never change
+        self.history = [] if history == "full" else None
 
     def adjust_score(self, change, reason=""):
         previous_score = self.score
@@ -14,18 +45,64 @@ class Opinion:
         self.score = max(-10.0, min(10.0, self.score))  # score between -10 and 10
 
         # Log the change in the history
-        self.history.append({
-            "previous_score": previous_score,
-            "new_score": self.score,
-            "change": change,
-            "reason": reason
-        })
+        self.record_change(previous_score, self.score, change, reason)
+
+    def record_change(self, previous_score, new_score, change, reason):
+        policy = self.history_policy
+        if policy == "full":
+            self.history.append({
+                "previous_score": previous_score,
+                "new_score": new_score,
+                "change": change,
+                "reason": reason
+            })
+        elif policy == "ring":
+            if self.history is None:
+                self.history = deque(maxlen=self.history_size)
+            self.history.append((previous_score, new_score, change, reason_code(reason)))
+        elif policy == "compact":
+            if self.history is None:
+                self.history = (array("f"), array("f"), array("f"), array("H"))
+            previous_scores, new_scores, changes, reasons = self.history
+            previous_scores.append(previous_score)
+            new_scores.append(new_score)
+            changes.append(change)
+            reasons.append(reason_code(reason))
+
+    def load_history(self, entries):
+        """
+        Replaces the history with (previous_score, new_score, change, reason) tuples.
+        """
+        self.history = [] if self.history_policy == "full" else None
+        for previous_score, new_score, change, reason in entries:
+            self.record_change(previous_score, new_score, change, reason)
 
     def get_score(self):
         return self.score
 
     def get_history(self):
-        return self.history
+        """
+        Returns the recorded changes as dicts, whatever the history policy.
+        With the "compact" policy scores come back with float32 precision.
+        """
+        policy = self.history_policy
+        if policy == "full":
+            return self.history
+        if self.history is None:
+            return []
+        if policy == "ring":
+            entries = self.history
+        else:
+            entries = zip(*self.history)
+        return [
+            {
+                "previous_score": previous_score,
+                "new_score": new_score,
+                "change": change,
+                "reason": REASONS[code]
+            }
+            for previous_score, new_score, change, code in entries
+        ]
 
     def __str__(self):
         return f"Opinion for Shop {self.shop_id}: {self.score}"
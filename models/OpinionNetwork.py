@@ -0,0 +1,166 @@
+import logging
+import numpy as np
+from agents.ClientAgent import ClientAgent
+
+logger = logging.getLogger(__name__)
+
+SHARE_CHANGE = 0.5
+SHARE_REASON = "Opinion shared by another client."
+
+
+class OpinionNetwork:
+    """
+    Opinion exchange between neighboring clients, used by MarketSimulationModel
+    when opinion_exchange is "sequential" or "batched".
+
+    The Moore neighborhood of every client is looked up once and kept as a CSR
+    adjacency (indptr, indices) over model.clients indices, in the order
+    grid.get_neighbors returns them. It is only rebuilt after positions_changed().
+    Scores are kept in a clients x shops matrix next to the Opinion objects; every
+    change made here is also applied to the Opinion objects, so their score and
+    history stay authoritative for everything else.
+
+    Clients are queued as they step and propagate() runs once after all of them:
+      - "sequential" replays the shares sharer by sharer in activation order and
+        neighbor by neighbor, comparing whole score rows at once. Scores, history
+        and opinion_exchange_count end up exactly as with ClientAgent.share_opinion,
+        since opinions do not influence buying or production.
+      - "batched" applies all shares of the day simultaneously, comparing
+        start-of-day scores: a client climbs 0.5 per neighbor with a higher score,
+        but no further than needed to reach the best of those scores, so the
+        result does not depend on activation order. A cell that climbs several
+        steps gets one history entry with their sum; opinion_exchange_count counts
+        every offered share.
+    """
+
+    def __init__(self, model, mode):
+        self.model = model
+        self.mode = mode
+        self.clients = list(model.clients)
+        self.client_index = {client.unique_id: i for i, client in enumerate(self.clients)}
+        self.shop_ids = [shop.unique_id for shop in model.shops]
+        self.shop_index = {shop_id: s for s, shop_id in enumerate(self.shop_ids)}
+        self.queued = []
+        self.indptr = None
+        self.indices = None
+        self.scores = np.zeros((len(self.clients), len(self.shop_ids)), dtype=np.float64)
+        for c, client in enumerate(self.clients):
+            for shop_id, opinion in client.opinions.items():
+                s = self.shop_index.get(shop_id)
+                if s is not None:
+                    self.scores[c, s] = opinion.score
+        self.shares_today = 0
+
+    def build_adjacency(self):
+        indptr = [0]
+        indices = []
+        grid = self.model.grid
+        for client in self.clients:
+            for neighbor in grid.get_neighbors(client.pos, moore=True, include_center=False):
+                if isinstance(neighbor, ClientAgent):
+                    indices.append(self.client_index[neighbor.unique_id])
+            indptr.append(len(indices))
+        self.indptr = np.array(indptr, dtype=np.int64)
+        self.indices = np.array(indices, dtype=np.int64)
+
+    def positions_changed(self):
+        self.indptr = None
+        self.indices = None
+
+    def queue(self, client):
+        self.queued.append(self.client_index[client.unique_id])
+
+    def set_score(self, client, shop_id):
+        """
+        Picks up a score changed on a client's Opinion object outside this network.
+        """
+        s = self.shop_index.get(shop_id)
+        if s is not None:
+            self.scores[self.client_index[client.unique_id], s] = client.opinions[shop_id].score
+
+    def propagate(self, order=None):
+        if order is None:
+            order, self.queued = self.queued, []
+        if self.indptr is None:
+            self.build_adjacency()
+        if self.mode == "sequential":
+            self.propagate_sequential(order)
+        else:
+            self.propagate_batched()
+
+    def share(self, receiver, s, change):
+        shop_id = self.shop_ids[s]
+        opinion = receiver.opinions.get(shop_id)
+        if opinion is None:
+            opinion = receiver.opinions[shop_id] = self.model.create_opinion(shop_id)
+        opinion.adjust_score(change=change, reason=SHARE_REASON)
+        return opinion.score
+
+    def propagate_sequential(self, order):
+        scores = self.scores
+        indptr = self.indptr
+        indices = self.indices.tolist()
+        clients = self.clients
+        shares = 0
+        for i in order:
+            sharer = clients[i]
+            exchange_count = sharer.opinion_exchange_count
+            row = scores[i]
+            for j in indices[indptr[i]:indptr[i + 1]]:
+                cells = np.flatnonzero(scores[j] < row)
+                if not len(cells):
+                    continue
+                receiver = clients[j]
+                for s in cells.tolist():
+                    shop_id = self.shop_ids[s]
+                    if self.model.trace:
+                        logger.info("Client %s: sharing opinion about Shop %s with Client %s",
+                                    sharer.unique_id, shop_id, receiver.unique_id)
+                    scores[j, s] = self.share(receiver, s, SHARE_CHANGE)
+                    exchange_count[shop_id] = exchange_count.get(shop_id, 0) + 1
+                shares += len(cells)
+        self.shares_today = shares
+
+    def propagate_batched(self):
+        scores = self.scores
+        num_shops = scores.shape[1]
+        sources = np.repeat(np.arange(len(self.clients)), np.diff(self.indptr))
+        targets = self.indices
+        edges, cells = share_edges(scores, sources, targets)
+        received_at, steps = climb_steps(scores, targets[edges], cells, sources[edges])
+        for flat, count in zip(received_at.tolist(), steps.tolist()):
+            j, s = divmod(flat, num_shops)
+            if self.model.trace:
+                logger.info("Client %s: received %s shared opinions about Shop %s",
+                            self.clients[j].unique_id, count, self.shop_ids[s])
+            scores[j, s] = self.share(self.clients[j], s, SHARE_CHANGE * count)
+        given_at, given = np.unique(sources[edges] * num_shops + cells, return_counts=True)
+        for flat, count in zip(given_at.tolist(), given.tolist()):
+            i, s = divmod(flat, num_shops)
+            exchange_count = self.clients[i].opinion_exchange_count
+            shop_id = self.shop_ids[s]
+            exchange_count[shop_id] = exchange_count.get(shop_id, 0) + count
+        self.shares_today = len(edges)
+
+
+def share_edges(scores, sources, targets):
+    """
+    Returns (edges, cells): every edge index and shop column where the source's
+    score is higher than the target's, i.e. where a share happens.
+    """
+    return np.nonzero(scores[targets] < scores[sources])
+
+
+def climb_steps(scores, targets, cells, sources):
+    """
+    Applies the "batched" rule to the shares returned by share_edges, given as
+    their target, shop column and source. Returns the flat score indices that
+    change, in ascending order, and how many SHARE_CHANGE steps each one climbs:
+    one per higher neighbor, but no further than the best neighbor's score.
+    """
+    num_shops = scores.shape[1]
+    received_at, cell, received = np.unique(targets * num_shops + cells, return_inverse=True, return_counts=True)
+    best = np.full(len(received_at), -np.inf)
+    np.maximum.at(best, cell, scores[sources, cells])
+    needed = np.ceil((best - scores.ravel()[received_at]) / SHARE_CHANGE)
+    return received_at, np.minimum(received, needed).astype(np.int64)
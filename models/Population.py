@@ -0,0 +1,68 @@
+"""
+Populations: the initial shops and clients of a market as plain arrays.
+
+A population is a dict of NumPy arrays:
+  - catalog_id, catalog_name, catalog_quality, catalog_price: the products
+  - shop_money, shop_x, shop_y (one row per shop)
+  - offer_id, offer_quantity (shops x shelf slots, unused slots have id -1);
+    offers are priced from the catalog
+  - client_money, client_x, client_y (one row per client)
+  - need_id, need_quantity (clients x need slots, unused slots have id -1)
+MarketSimulationModel.populate() creates the agents from it in one pass.
+Populations are stored as uncompressed .npz files, without pickling.
+"""
+import numpy as np
+
+POPULATION_ARRAYS = ("catalog_id", "catalog_name", "catalog_quality", "catalog_price",
+                     "shop_money", "shop_x", "shop_y", "offer_id", "offer_quantity",
+                     "client_money", "client_x", "client_y", "need_id", "need_quantity")
+
+
+def padded(rows, dtype, fill):
+    """
+    Turns a list of variable-length rows into a rectangular array padded with `fill`.
+    """
+    width = max([len(row) for row in rows] + [1])
+    array = np.full((len(rows), width), fill, dtype=dtype)
+    for i, row in enumerate(rows):
+        array[i, :len(row)] = row
+    return array
+
+
+def population_of(model):
+    """
+    Returns the current shops and clients of `model` as a population. Client
+    inventories, opinions and sales are not part of it, and offers are priced
+    from the model's catalog again, not at the shops' current prices.
+    """
+    catalog = model.product_catalog
+    return {
+        "catalog_id": np.array([product[0] for product in catalog], dtype=np.int64),
+        "catalog_name": np.array([product[1] for product in catalog], dtype=str),
+        "catalog_quality": np.array([product[2] for product in catalog], dtype=np.int64),
+        "catalog_price": np.array([product[3] for product in catalog], dtype=np.float64),
+        "shop_money": np.array([shop.money for shop in model.shops], dtype=np.float64),
+        "shop_x": np.array([shop.pos[0] for shop in model.shops], dtype=np.int64),
+        "shop_y": np.array([shop.pos[1] for shop in model.shops], dtype=np.int64),
+        "offer_id": padded([[p.product_id for p in shop.products] for shop in model.shops], np.int64, -1),
+        "offer_quantity": padded([[p.quantity for p in shop.products] for shop in model.shops], np.int64, 0),
+        "client_money": np.array([client.money for client in model.clients], dtype=np.float64),
+        "client_x": np.array([client.pos[0] for client in model.clients], dtype=np.int64),
+        "client_y": np.array([client.pos[1] for client in model.clients], dtype=np.int64),
+        "need_id": padded([[p.product_id for p in client.product_needs] for client in model.clients], np.int64, -1),
+        "need_quantity": padded([[p.quantity for p in client.product_needs] for client in model.clients],
+                                np.int64, 0),
+    }
+
+
+def save_population(population, path):
+    with open(path, "wb") as file:
+        np.savez(file, **{name: population[name] for name in POPULATION_ARRAYS})
+
+
+def load_population(path):
+    with np.load(path, allow_pickle=False) as data:
+        missing = [name for name in POPULATION_ARRAYS if name not in data.files]
+        if missing:
+            raise ValueError(f"Population file {path} lacks the arrays {missing}.")
+        return {name: data[name] for name in POPULATION_ARRAYS}
@@ -1,11 +1,69 @@
-class Product:
-    def __init__(self, product_id, name, quality, price, quantity=0):
+import weakref
+
+
+class CatalogEntry:
+    """
+    Immutable catalog data of a product, shared by every Product holding the same
+    (product_id, name, quality). Use CatalogEntry.get() rather than the constructor.
+
+    The lookup table only holds entries weakly: an entry lives as long as some
+    Product refers to it, so entries of finished models are dropped with them
+    instead of piling up in long-lived processes such as experiment workers.
+    """
+    __slots__ = ("product_id", "name", "quality", "__weakref__")
+
+    _entries = weakref.WeakValueDictionary()
+
+    def __init__(self, product_id, name, quality):
         self.product_id = product_id
         self.name = name
         self.quality = quality
+
+    @classmethod
+    def get(cls, product_id, name, quality):
+        key = (product_id, name, quality)
+        entry = cls._entries.get(key)
+        if entry is None:
+            entry = cls._entries[key] = cls(product_id, name, quality)
+        return entry
+
+
+class Product:
+    """
+    A quantity of a product held by a shop or a client. Only price and quantity
+    are stored per holder, the rest lives in a shared CatalogEntry.
+    """
+    __slots__ = ("catalog", "price", "quantity")
+
+    def __init__(self, product_id, name, quality, price, quantity=0):
+        self.catalog = CatalogEntry.get(product_id, name, quality)
         self.price = price
         self.quantity = quantity
 
+    @property
+    def product_id(self):
+        return self.catalog.product_id
+
+    @product_id.setter
+    def product_id(self, value):
+        self.catalog = CatalogEntry.get(value, self.catalog.name, self.catalog.quality)
+
+    @property
+    def name(self):
+        return self.catalog.name
+
+    @name.setter
+    def name(self, value):
+        self.catalog = CatalogEntry.get(self.catalog.product_id, value, self.catalog.quality)
+
+    @property
+    def quality(self):
+        return self.catalog.quality
+
+    @quality.setter
+    def quality(self, value):
+        self.catalog = CatalogEntry.get(self.catalog.product_id, self.catalog.name, value)
+
     def adjust_quantity(self, amount):
         if self.quantity + amount < 0:
             raise ValueError(f"Cannot reduce quantity below 0 for product {self.name}.")
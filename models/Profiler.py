@@ -0,0 +1,177 @@
+"""
+Instrumentation of MarketSimulationModel days.
+
+PhaseProfiler (model option profile=True) records, for every day, the wall time
+and number of agent calls of each phase of step(), and event counters such as
+sell_product attempts and successes. Without it the model only checks
+`model.profiler is None` once per phase and once per counted event.
+
+DayRangeProfiler (model option profile_days=(first, last)) runs cProfile over
+that range of days and dumps the stats to a .prof file, which pstats, snakeviz,
+or flamegraph tools such as flameprof can read.
+"""
+import cProfile
+import csv
+import os
+from contextlib import nullcontext
+from time import perf_counter
+
+# Returned by MarketSimulationModel.phase() when profiling is off
+UNTIMED = nullcontext()
+
+# The agent type every phase works on, for the per-type columns of the phase table
+PHASE_AGENT_TYPES = {
+    "replenish_needs": "ClientAgent",
+    "restock_products": "ShopAgent",
+    "adjust_prices": "ShopAgent",
+    "market_clearing": "ClientAgent",
+    "buy_products": "ClientAgent",
+    "produce_product": "ClientAgent",
+    "share_opinion": "ClientAgent",
+    "opinion_network": "ClientAgent",
+    "shard_workers": "",
+    "logging": "",
+    "metrics": "",
+    "checkpoint": "",
+}
+
+
+class Phase:
+    __slots__ = ("profiler", "name", "calls", "start")
+
+    def __init__(self, profiler, name, calls):
+        self.profiler = profiler
+        self.name = name
+        self.calls = calls
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add(self.name, perf_counter() - self.start, self.calls)
+
+
+class PhaseProfiler:
+    """
+    Per-day phase timings and counters. Every finished day is appended to
+    self.days as {"day", "seconds", "phases": {name: [seconds, calls]}, "counters"}.
+    """
+
+    def __init__(self):
+        self.days = []
+        self.phases = {}
+        self.counters = {}
+        self.day_start = None
+
+    def begin_day(self):
+        self.phases = {}
+        self.counters = {}
+        self.day_start = perf_counter()
+
+    def end_day(self, day):
+        self.days.append({
+            "day": day,
+            "seconds": perf_counter() - self.day_start,
+            "phases": self.phases,
+            "counters": self.counters,
+        })
+
+    def phase(self, name, calls=0):
+        return Phase(self, name, calls)
+
+    def add(self, name, seconds, calls=0):
+        totals = self.phases.get(name)
+        if totals is None:
+            self.phases[name] = [seconds, calls]
+        else:
+            totals[0] += seconds
+            totals[1] += calls
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def phase_table(self):
+        """
+        One row per day and phase: day, phase, agent_type, seconds, calls and the
+        share of the day's wall time.
+        """
+        rows = []
+        for record in self.days:
+            for name, (seconds, calls) in record["phases"].items():
+                rows.append({
+                    "day": record["day"],
+                    "phase": name,
+                    "agent_type": PHASE_AGENT_TYPES.get(name, ""),
+                    "seconds": seconds,
+                    "calls": calls,
+                    "share": seconds / record["seconds"] if record["seconds"] else 0.0,
+                })
+        return rows
+
+    def counter_table(self):
+        return [
+            {"day": record["day"], "counter": name, "value": value}
+            for record in self.days for name, value in record["counters"].items()
+        ]
+
+    def summary(self):
+        """
+        Seconds and calls per phase and counter totals, over all recorded days.
+        """
+        phases = {}
+        counters = {}
+        for record in self.days:
+            for name, (seconds, calls) in record["phases"].items():
+                totals = phases.setdefault(name, [0.0, 0])
+                totals[0] += seconds
+                totals[1] += calls
+            for name, value in record["counters"].items():
+                counters[name] = counters.get(name, 0) + value
+        return {"days": len(self.days), "seconds": sum(record["seconds"] for record in self.days),
+                "phases": phases, "counters": counters}
+
+    def to_csv(self, directory):
+        """
+        Writes phases.csv and counters.csv into `directory` and returns their paths.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, rows, header in (
+                ("phases.csv", self.phase_table(), ("day", "phase", "agent_type", "seconds", "calls", "share")),
+                ("counters.csv", self.counter_table(), ("day", "counter", "value"))):
+            path = os.path.join(directory, name)
+            with open(path, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=header)
+                writer.writeheader()
+                writer.writerows(rows)
+            paths.append(path)
+        return paths
+
+
+class DayRangeProfiler:
+    """
+    Runs cProfile from the start of day `first` to the end of day `last`
+    (1-based, as logged) and dumps the stats to path.format(first=..., last=...).
+    """
+
+    def __init__(self, first, last, path):
+        if first > last:
+            raise ValueError(f"profile_days must be (first, last) with first <= last, got ({first}, {last}).")
+        self.first = first
+        self.last = last
+        self.path = path.format(first=first, last=last)
+        self.profile = None
+
+    def before_step(self, day):
+        if day == self.first or (self.first < day <= self.last and self.profile is None):
+            self.profile = cProfile.Profile()
+        if self.profile is not None and day <= self.last:
+            self.profile.enable()
+
+    def after_step(self, day):
+        if self.profile is None or day > self.last:
+            return
+        self.profile.disable()
+        if day == self.last:
+            self.profile.dump_stats(self.path)
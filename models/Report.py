@@ -0,0 +1,93 @@
+"""
+Figures of a run recorded by models/ResultStream.py.
+
+matplotlib and seaborn are only imported when a report is rendered, so runs that
+never plot do not pay for them. Figures are written as PNG files next to the
+recorded data; with show=True they are also opened in windows.
+"""
+import os
+import numpy as np
+
+# Above this many shops or clients the money plot shows their mean and 5-95% range
+MAX_MONEY_SERIES = 50
+
+
+def read_columns(path):
+    """
+    Returns {column: array} of a numeric CSV file written by ResultStream.
+    """
+    with open(path) as file:
+        header = file.readline().strip().split(",")
+    data = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+    return {name: data[:, i] for i, name in enumerate(header)}
+
+
+def money_series(columns, id_column):
+    """
+    Returns (days, ids, money) with money as a days x ids matrix.
+    """
+    days = np.unique(columns["day"])
+    ids = np.unique(columns[id_column])
+    money = np.full((len(days), len(ids)), np.nan)
+    money[np.searchsorted(days, columns["day"]), np.searchsorted(ids, columns[id_column])] = columns["money"]
+    return days, ids.astype(np.int64), money
+
+
+def render_report(directory, show=False):
+    """
+    Writes grid_heatmap.png and money_over_time.png into `directory` and returns their paths.
+    """
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    grid = read_columns(os.path.join(directory, "grid.csv"))
+    width = int(grid["x"].max()) + 1
+    height = int(grid["y"].max()) + 1
+    agent_counts = np.zeros((width, height))
+    agent_counts[grid["x"].astype(np.int64), grid["y"].astype(np.int64)] = grid["agents"]
+
+    heatmap_path = os.path.join(directory, "grid_heatmap.png")
+    plt.figure()
+    g = sns.heatmap(agent_counts, cmap="viridis", annot=width * height <= 400, cbar=False, square=True)
+    g.figure.set_size_inches(5, 5)
+    g.set(title="Number of agents on each cell of the grid")
+    g.figure.savefig(heatmap_path)
+
+    plot_data = {
+        "shop_profits": money_series(read_columns(os.path.join(directory, "shops.csv")), "shop_id"),
+        "client_money": money_series(read_columns(os.path.join(directory, "clients.csv")), "client_id"),
+    }
+    plot_titles = {
+        'shop_profits': 'Shop Profits Over Time',
+        'client_money': 'Client Money Over Time'
+    }
+    plot_labels = {
+        'shop_profits': 'Shop',
+        'client_money': 'Client'
+    }
+
+    fig, axs = plt.subplots(len(plot_data), 1, figsize=(10, 5 * len(plot_data)))
+    fig.tight_layout(pad=5.0)
+    for ax, (key, (days, ids, money)) in zip(axs, plot_data.items()):
+        if len(ids) <= MAX_MONEY_SERIES:
+            for i, entity_id in enumerate(ids.tolist()):
+                ax.plot(days, money[:, i], label=f'{plot_labels[key]} {entity_id}')
+        else:
+            low, high = np.nanpercentile(money, [5, 95], axis=1)
+            ax.fill_between(days, low, high, alpha=0.3, label=f'{plot_labels[key]}s, 5-95%')
+            ax.plot(days, np.nanmean(money, axis=1), label=f'{plot_labels[key]}s, mean')
+        ax.set_xlabel('Day')
+        ax.set_ylabel('Money')
+        ax.set_title(plot_titles[key])
+        ax.legend()
+
+    money_path = os.path.join(directory, "money_over_time.png")
+    fig.savefig(money_path)
+
+    if show:
+        plt.show()
+    plt.close("all")
+    return [heatmap_path, money_path]
@@ -0,0 +1,68 @@
+import csv
+import json
+import os
+
+
+class ResultStream:
+    """
+    Writes the state of a MarketSimulationModel to `directory` day by day, so a
+    run's results are on disk while it goes and nothing accumulates in memory:
+      - grid.csv: x, y, agents (number of agents per cell), written once
+      - shops.csv: day, shop_id, money, stock
+      - clients.csv: day, client_id, money, inventory
+      - market.jsonl: one model.market_statistics() object per day
+    Call record() after every model.step(). Files are flushed every `flush_every`
+    days and on close(). models/Report.py renders the figures from these files.
+    """
+
+    def __init__(self, model, directory, flush_every=1):
+        self.model = model
+        self.directory = directory
+        self.flush_every = flush_every
+        self.days = 0
+        os.makedirs(directory, exist_ok=True)
+
+        with open(os.path.join(directory, "grid.csv"), "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(("x", "y", "agents"))
+            for cell_content, (x, y) in model.grid.coord_iter():
+                writer.writerow((x, y, len(cell_content)))
+
+        self.files = []
+        self.shops = self.open_csv("shops.csv", ("day", "shop_id", "money", "stock"))
+        self.clients = self.open_csv("clients.csv", ("day", "client_id", "money", "inventory"))
+        self.market = open(os.path.join(directory, "market.jsonl"), "w")
+        self.files.append(self.market)
+        self.shop_ids = [shop.unique_id for shop in model.shops]
+        self.client_ids = [client.unique_id for client in model.clients]
+
+    def open_csv(self, name, header):
+        file = open(os.path.join(self.directory, name), "w", newline="")
+        self.files.append(file)
+        writer = csv.writer(file)
+        writer.writerow(header)
+        return writer
+
+    def record(self):
+        day = self.model.day_count
+        aggregates = self.model.daily_aggregates()
+        self.shops.writerows(zip([day] * len(self.shop_ids), self.shop_ids,
+                                 aggregates["shop_money"], aggregates["shop_stock"]))
+        self.clients.writerows(zip([day] * len(self.client_ids), self.client_ids,
+                                   aggregates["client_money"], aggregates["client_inventory"]))
+        self.market.write(json.dumps({"day": day, **self.model.market_statistics()}) + "\n")
+        self.days += 1
+        if self.days % self.flush_every == 0:
+            for file in self.files:
+                file.flush()
+
+    def close(self):
+        for file in self.files:
+            file.close()
+        self.files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,423 @@
+import multiprocessing
+import random
+import traceback
+import weakref
+import numpy as np
+from models.VectorizedMarketEngine import VectorizedMarketEngine
+from models.OpinionNetwork import SHARE_CHANGE, share_edges, climb_steps
+
+# Engine buffers moved into shared memory, every worker writes only the rows it owns
+SHARED_BUFFERS = ("shop_money", "offer_qty", "offer_price", "client_money", "need_qty",
+                  "inv_qty", "inv_price", "inv_present", "inv_order")
+
+
+class ShardedMarketEngine(VectorizedMarketEngine):
+    """
+    Runs the market days of a MarketSimulationModel on several worker processes.
+
+    The torus grid is cut into `workers` rectangular tiles (tile_shape). Each
+    worker owns the shops and clients positioned in its tile and is the only one
+    writing their rows of the engine buffers, which live in shared memory; the
+    coordinating process reads the same buffers for aggregates(), the metrics and
+    sync_to_agents(). A day has four phases separated by barriers:
+      1. each worker replenishes its clients' needs and restocks and reprices its
+         shops, drawing from its own random stream;
+      2. each worker runs the purchases of its clients in a shuffled order against
+         a share of every offer's stock (allotment, proportional to the worker's
+         number of clients), and writes units sold and revenue per offer into its
+         row of the shared sold/revenue buffers;
+      3. each worker settles its shops from all rows of those buffers, lets its
+         clients produce, and computes the opinion shares received by its clients
+         from the scores as they were at the start of the phase, including those
+         of neighbors owned by other workers;
+      4. each worker writes the new scores and exchange counts of its clients.
+
+    Consistency: within a day a client only sees its own worker's share of a
+    shop's stock; units not sold return to the shop in phase 3, so stock is never
+    oversold, but a client may miss stock still held by another worker's share.
+    Shop revenue arrives in phase 3, before it is spent on the next restock.
+    Opinions follow the "batched" rule of OpinionNetwork exactly, so they do not
+    depend on the tiling. Positions are read once; agents are not expected to move.
+
+    Determinism: worker w draws day d from random.Random(f"{seed}:{d}:{w}"), so
+    for a fixed seed and worker count the results are identical from run to run
+    and after loading a checkpoint. Different worker counts, or the single
+    process engines, give statistically equivalent but different trajectories.
+    The transaction ledger (model.ledger) is not populated and opinion history is
+    not recorded; sync_to_agents() writes the scores and exchange counts only.
+    """
+
+    def __init__(self, model, workers):
+        super().__init__(model)
+        self.workers = workers
+        self.seed = model.seed
+        self.tiles = tile_shape(workers)
+        grid = model.grid
+        self.shop_shard = np.array([tile_of(shop.pos, grid.width, grid.height, self.tiles)
+                                    for shop in self.shops], dtype=np.int64)
+        self.client_shard = np.array([tile_of(client.pos, grid.width, grid.height, self.tiles)
+                                      for client in self.clients], dtype=np.int64)
+        shard_sizes = np.bincount(self.client_shard, minlength=workers)
+
+        network = model.opinion_network
+        if network is not None:
+            if network.indptr is None:
+                network.build_adjacency()
+            self.scores = network.scores
+            self.exchange_count = np.zeros(self.scores.shape, dtype=np.int64)
+            for c, client in enumerate(self.clients):
+                for shop_id, count in client.opinion_exchange_count.items():
+                    s = network.shop_index.get(shop_id)
+                    if s is not None:
+                        self.exchange_count[c, s] = count
+        self.sold = np.zeros((workers, self.offer_qty.size), dtype=np.int64)
+        self.revenue = np.zeros((workers, len(self.shops)), dtype=np.float64)
+        self.demand = np.zeros((workers, len(self.replenish_table)), dtype=np.int64)
+        # Sales, producers and shares of the last day, one row per worker
+        self.stats = np.zeros((workers, 3), dtype=np.int64)
+
+        context = multiprocessing.get_context()
+        buffers = {}
+        names = SHARED_BUFFERS + ("sold", "revenue", "demand", "stats")
+        if network is not None:
+            names += ("scores", "exchange_count")
+        for name in names:
+            array = getattr(self, name)
+            raw = context.RawArray("b", max(array.nbytes, 1))
+            shared = np.frombuffer(raw, dtype=array.dtype, count=array.size).reshape(array.shape)
+            shared[...] = array
+            setattr(self, name, shared)
+            buffers[name] = (raw, array.dtype.str, array.shape)
+        if network is not None:
+            network.scores = self.scores
+            sources = np.repeat(np.arange(len(self.clients)), np.diff(network.indptr))
+            targets = network.indices
+        # Kept referenced, spawned workers attach to them after this method returns
+        self.buffers = buffers
+        self.barrier = context.Barrier(workers)
+        self.connections = []
+        self.processes = []
+        for shard in range(workers):
+            clients = np.flatnonzero(self.client_shard == shard)
+            static = {
+                "workers": workers,
+                "seed": self.seed,
+                "activation": model.schedule.activation,
+                "clients": clients,
+                "shops": np.flatnonzero(self.shop_shard == shard),
+                "shard_sizes": shard_sizes,
+                "offer_valid": self.offer_valid,
+                "offers_by_product": self.offers_by_product,
+                "need_count": self.need_count[clients],
+                "need_pid": self.need_pid[clients],
+                "need_valid": self.need_valid[clients],
+                "replenish_table": self.replenish_table,
+                "inv_order_base": self._next_inv_order,
+                "incoming": None,
+                "outgoing": None,
+            }
+            if network is not None:
+                incoming = self.client_shard[targets] == shard
+                outgoing = self.client_shard[sources] == shard
+                static["incoming"] = (sources[incoming], targets[incoming])
+                static["outgoing"] = (sources[outgoing], targets[outgoing])
+            connection, worker_connection = context.Pipe()
+            process = context.Process(target=run_shard, daemon=True,
+                                      args=(shard, worker_connection, self.barrier, buffers, static))
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+        self._finalizer = weakref.finalize(self, stop_workers, self.connections, self.processes)
+
+    def step(self):
+        day = self.model.day_count
+        # The phases run inside the workers, the coordinator only sees the whole day
+        with self.model.phase("shard_workers", len(self.connections)):
+            for connection in self.connections:
+                connection.send(day)
+            errors = [error for error in (connection.recv() for connection in self.connections) if error is not None]
+        if errors:
+            raise RuntimeError(f"Shard worker failed on day {day + 1}:\n{errors[0]}")
+        schedule = self.model.schedule
+        schedule.steps += 1
+        schedule.time += 1
+        self.sales_today, self.producers_today, shares = self.stats.sum(axis=0).tolist()
+        self.demand_today = self.demand.sum(axis=0)
+        sold = self.sold.sum(axis=0).reshape(self.offer_qty.shape)
+        self.sold_today = np.bincount(self.offer_pid[self.offer_valid], weights=sold[self.offer_valid],
+                                      minlength=len(self.replenish_table)).astype(np.int64)
+        if self.model.opinion_network is not None:
+            self.model.opinion_network.shares_today = shares
+
+    def sync_to_agents(self):
+        super().sync_to_agents()
+        network = self.model.opinion_network
+        if network is None:
+            return
+        for c, client in enumerate(self.clients):
+            scores = self.scores[c].tolist()
+            counts = self.exchange_count[c].tolist()
+            for s, shop_id in enumerate(network.shop_ids):
+                opinion = client.opinions.get(shop_id)
+                if opinion is None:
+                    opinion = client.opinions[shop_id] = self.model.create_opinion(shop_id)
+                opinion.score = scores[s]
+                if counts[s]:
+                    client.opinion_exchange_count[shop_id] = counts[s]
+
+    def close(self):
+        """
+        Stops the worker processes. The shared buffers stay readable.
+        """
+        self._finalizer()
+
+
+def stop_workers(connections, processes):
+    for connection in connections:
+        try:
+            connection.send(None)
+        except OSError:
+            pass
+    for process in processes:
+        process.join()
+
+
+def tile_shape(workers):
+    """
+    Returns (tiles along x, tiles along y), the most square split of `workers`.
+    """
+    tiles_y = max(d for d in range(1, int(workers ** 0.5) + 1) if workers % d == 0)
+    return workers // tiles_y, tiles_y
+
+
+def tile_of(pos, width, height, tiles):
+    x, y = pos
+    tiles_x, tiles_y = tiles
+    return (x * tiles_x // width) * tiles_y + y * tiles_y // height
+
+
+def allotment(quantities, shard_sizes, shard):
+    """
+    The part of every offer's stock a shard may sell today. Shares are
+    proportional to the shards' numbers of clients and add up to the full stock.
+    """
+    bounds = np.concatenate(([0], np.cumsum(shard_sizes)))
+    total = max(int(bounds[-1]), 1)
+    return quantities * int(bounds[shard + 1]) // total - quantities * int(bounds[shard]) // total
+
+
+def run_shard(shard, connection, barrier, buffers, static):
+    worker = Shard(shard, barrier, buffers, static)
+    while True:
+        day = connection.recv()
+        if day is None:
+            break
+        try:
+            worker.step(day)
+            connection.send(None)
+        except Exception:
+            barrier.abort()
+            connection.send(traceback.format_exc())
+
+
+class Shard:
+    """
+    The part of a ShardedMarketEngine run inside one worker process.
+    """
+
+    def __init__(self, shard, barrier, buffers, static):
+        self.shard = shard
+        self.barrier = barrier
+        for name, (raw, dtype, shape) in buffers.items():
+            size = int(np.prod(shape))
+            setattr(self, name, np.frombuffer(raw, dtype=dtype, count=size).reshape(shape))
+        for name, value in static.items():
+            setattr(self, name, value)
+        self.num_shops, self.offer_slots = self.offer_qty.shape
+        self.need_slots = self.need_qty.shape[1]
+        self.shop_offers = (self.shops[:, None] * self.offer_slots + np.arange(self.offer_slots)).ravel()
+
+    def step(self, day):
+        rng = random.Random(f"{self.seed}:{day}:{self.shard}")
+        self.replenish_needs()
+        self.restock_products(rng)
+        self.adjust_prices()
+        self.barrier.wait()
+
+        produced, margins, surcharges = self.buy_products(rng, day)
+        self.barrier.wait()
+
+        self.settle_shops()
+        self.produce_products(produced, margins, surcharges)
+        received = self.receive_opinions()
+        self.barrier.wait()
+
+        shares = self.apply_opinions(received)
+        self.stats[self.shard] = (self.sales_today, int(produced.sum()), shares)
+
+    def replenish_needs(self):
+        rows = self.clients
+        reset = self.replenish_table[np.where(self.need_valid, self.need_pid, 0)]
+        keep = ~self.need_valid | (reset < 0)
+        self.need_qty[rows] = np.where(keep, self.need_qty[rows], reset)
+
+    def restock_products(self, rng):
+        rows = self.shops
+        qty = self.offer_qty[rows]
+        money = self.shop_money[rows]
+        due = self.offer_valid[rows] & (qty <= VectorizedMarketEngine.RESTOCK_THRESHOLD)
+        draws = np.zeros(qty.shape, dtype=np.int64)
+        draws[due] = [rng.randint(30, 150) for _ in range(int(due.sum()))]
+        cost = draws * self.offer_price[rows] * 0.2
+        for k in range(self.offer_slots):
+            paid = due[:, k] & (money >= cost[:, k])
+            qty[:, k] += np.where(paid, draws[:, k], 0)
+            money -= np.where(paid, cost[:, k], 0.0)
+        self.offer_qty[rows] = qty
+        self.shop_money[rows] = money
+
+    def adjust_prices(self):
+        rows = self.shops
+        qty = self.offer_qty[rows]
+        price = self.offer_price[rows]
+        price = np.where(qty < VectorizedMarketEngine.LOW_STOCK_THRESHOLD, price * 1.1, price)
+        price = np.where(qty > VectorizedMarketEngine.HIGH_STOCK_THRESHOLD, price * 0.9, price)
+        valid = self.offer_valid[rows]
+        price[valid] = [round(p, 2) for p in price[valid].tolist()]
+        self.offer_price[rows] = np.where(valid, price, 0.0)
+
+    def buy_products(self, rng, day):
+        """
+        Same purchase loop as VectorizedMarketEngine.buy_products, over this
+        shard's clients and its allotment of the stock.
+        """
+        randint = rng.randint
+        uniform = rng.uniform
+        staged = self.activation == "staged"
+        offer_slots = self.offer_slots
+        offers_by_product = self.offers_by_product
+        rows = self.clients
+
+        allotted = allotment(self.offer_qty.ravel(), self.shard_sizes, self.shard)
+        stock = allotted.tolist()
+        offer_price = self.offer_price.ravel().tolist()
+        revenue = [0.0] * self.num_shops
+        client_money = self.client_money[rows].tolist()
+        need_count = self.need_count.tolist()
+        need_pid = self.need_pid.tolist()
+        need_qty = self.need_qty[rows].tolist()
+        inv_qty = self.inv_qty[rows].tolist()
+        inv_present = self.inv_present[rows].tolist()
+        inv_order = self.inv_order[rows].tolist()
+        # Inventory items created on the same day are ordered by slot
+        stamp = self.inv_order_base + day * self.need_slots
+
+        order = list(range(len(rows)))
+        if self.activation != "ordered":
+            rng.shuffle(order)
+        produced = np.zeros(len(rows), dtype=bool)
+        margins = np.zeros(len(rows), dtype=np.float64)
+        surcharges = np.zeros(len(rows), dtype=np.float64)
+        demand = [0] * self.demand.shape[1]
+        sales = 0
+
+        for c in order:
+            money = client_money[c]
+            pids = need_pid[c]
+            needs = need_qty[c]
+            inventory = inv_qty[c]
+            present = inv_present[c]
+            can_produce = True
+            for k in range(need_count[c]):
+                need = needs[k]
+                if present[k] and inventory[k] >= need * 5:
+                    continue
+                quantity = randint(5, 8) * need
+                demand[pids[k]] += quantity
+                for flat in offers_by_product.get(pids[k], ()):
+                    if stock[flat] < quantity:
+                        continue
+                    cost = offer_price[flat] * quantity
+                    if money >= cost:
+                        money -= cost
+                        revenue[flat // offer_slots] += cost
+                        stock[flat] -= quantity
+                        inventory[k] += quantity
+                        if not present[k]:
+                            present[k] = True
+                            inv_order[c][k] = stamp + k
+                        sales += 1
+                        break
+            client_money[c] = money
+
+            for k in range(need_count[c]):
+                if not present[k] or inventory[k] < needs[k]:
+                    can_produce = False
+                    break
+            if can_produce:
+                produced[c] = True
+                if not staged:
+                    margins[c] = uniform(0.8, 0.9)
+                    surcharges[c] = uniform(0.1, 0.3)
+
+        if staged:
+            for c in order:
+                if produced[c]:
+                    margins[c] = uniform(0.8, 0.9)
+                    surcharges[c] = uniform(0.1, 0.3)
+
+        self.sold[self.shard] = allotted - np.array(stock, dtype=np.int64)
+        self.revenue[self.shard] = revenue
+        self.demand[self.shard] = demand
+        self.client_money[rows] = client_money
+        if len(rows):
+            self.inv_qty[rows] = inv_qty
+            self.inv_present[rows] = inv_present
+            self.inv_order[rows] = inv_order
+        self.sales_today = sales
+        return produced, margins, surcharges
+
+    def settle_shops(self):
+        rows = self.shops
+        # Summed shard by shard, so the result only depends on the worker count
+        sold = np.zeros(len(self.shop_offers), dtype=np.int64)
+        revenue = np.zeros(len(rows), dtype=np.float64)
+        for shard in range(self.workers):
+            sold += self.sold[shard, self.shop_offers]
+            revenue += self.revenue[shard, rows]
+        self.offer_qty[rows] -= sold.reshape(len(rows), self.offer_slots)
+        self.shop_money[rows] += revenue
+
+    def produce_products(self, produced, margins, surcharges):
+        rows = self.clients
+        used = np.where(self.need_valid & produced[:, None], self.need_qty[rows], 0)
+        self.inv_qty[rows] -= used
+        inv_price = self.inv_price[rows]
+        total_cost = np.zeros(len(rows), dtype=np.float64)
+        for k in range(self.need_slots):
+            total_cost = total_cost + inv_price[:, k] * used[:, k]
+        profit = total_cost * margins * (1 + surcharges)
+        self.client_money[rows] = np.where(produced, self.client_money[rows] + profit, self.client_money[rows])
+
+    def receive_opinions(self):
+        if self.incoming is None:
+            return None
+        scores = self.scores
+        sources, targets = self.incoming
+        edges, cells = share_edges(scores, sources, targets)
+        received_at, steps = climb_steps(scores, targets[edges], cells, sources[edges])
+        sources, targets = self.outgoing
+        edges, cells = share_edges(scores, sources, targets)
+        given_at, given = np.unique(sources[edges] * scores.shape[1] + cells, return_counts=True)
+        # Same range as Opinion.adjust_score
+        new_scores = np.clip(scores.ravel()[received_at] + SHARE_CHANGE * steps, -10.0, 10.0)
+        return received_at, new_scores, given_at, given
+
+    def apply_opinions(self, received):
+        if received is None:
+            return 0
+        received_at, new_scores, given_at, given = received
+        self.scores.ravel()[received_at] = new_scores
+        self.exchange_count.ravel()[given_at] += given
+        return int(given.sum())
@@ -0,0 +1,201 @@
+"""
+Market-wide, append-only ledger of the sales of a MarketSimulationModel.
+
+Every sale is one row of typed columns: day, shop, client, product, quantity,
+price, quality and scammed. Rows are appended to a plain list and sealed into
+chunks of chunk_size rows, one NumPy array per column. With a spill_directory,
+sealed chunks are written to .npy files there and read back memory-mapped, so a
+long run keeps at most one chunk of sales in memory. close() deletes them.
+
+Queries (revenue per shop per day, a client's purchases, scam rate per shop)
+run chunk by chunk with NumPy and combine the partial results, so spilled
+chunks are never loaded into memory all at once.
+"""
+import os
+import shutil
+import tempfile
+import weakref
+import numpy as np
+
+LEDGER_COLUMNS = (
+    ("day", np.int64),
+    ("shop", np.int64),
+    ("client", np.int64),
+    ("product", np.int64),
+    ("quantity", np.int64),
+    ("price", np.float64),
+    ("quality", np.float64),
+    ("scammed", np.bool_),
+)
+ROW_DTYPE = np.dtype(list(LEDGER_COLUMNS))
+
+
+class TransactionLedger:
+    def __init__(self, chunk_size=65536, spill_directory=None):
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be at least 1, got {chunk_size}.")
+        self.chunk_size = chunk_size
+        self.spill_directory = spill_directory
+        # Chunk files of this ledger go to their own subdirectory, created on the first spill and
+        # deleted by close() or, failing that, when the ledger is garbage collected
+        self.spill_path = None
+        self.remove_spill_path = None
+        self.chunks = []
+        self.rows = []
+        self.sealed_rows = 0
+
+    def __len__(self):
+        return self.sealed_rows + len(self.rows)
+
+    def append(self, day, shop, client, product, quantity, price, quality, scammed):
+        self.rows.append((day, shop, client, product, quantity, price, quality, scammed))
+        if len(self.rows) >= self.chunk_size:
+            self.seal()
+
+    def seal(self):
+        """
+        Turns the rows appended since the last chunk into a chunk of columns.
+        """
+        if not self.rows:
+            return
+        table = np.array(self.rows, dtype=ROW_DTYPE)
+        self.add_chunk({name: np.ascontiguousarray(table[name]) for name, _ in LEDGER_COLUMNS})
+        self.rows = []
+
+    def add_chunk(self, chunk):
+        if self.spill_directory is not None:
+            if self.spill_path is None:
+                os.makedirs(self.spill_directory, exist_ok=True)
+                self.spill_path = tempfile.mkdtemp(prefix="ledger-", dir=self.spill_directory)
+                self.remove_spill_path = weakref.finalize(self, shutil.rmtree, self.spill_path, ignore_errors=True)
+            index = len(self.chunks)
+            spilled = {}
+            for name, array in chunk.items():
+                path = os.path.join(self.spill_path, f"chunk{index:06d}_{name}.npy")
+                np.save(path, array)
+                spilled[name] = np.load(path, mmap_mode="r")
+            chunk = spilled
+        self.chunks.append(chunk)
+        self.sealed_rows += len(chunk["day"])
+
+    def iter_chunks(self):
+        """
+        Yields the chunks oldest first, the rows not sealed yet as a last, smaller chunk.
+        """
+        yield from self.chunks
+        if self.rows:
+            table = np.array(self.rows, dtype=ROW_DTYPE)
+            yield {name: table[name] for name, _ in LEDGER_COLUMNS}
+
+    def column(self, name):
+        """
+        Returns all values of one column, oldest sale first, as a single in-memory array.
+        """
+        parts = [chunk[name] for chunk in self.iter_chunks()]
+        if not parts:
+            return np.zeros(0, dtype=ROW_DTYPE[name])
+        return np.concatenate(parts)
+
+    def arrays(self):
+        """
+        Returns all columns as a dict of arrays, e.g. for a checkpoint.
+        """
+        return {name: self.column(name) for name, _ in LEDGER_COLUMNS}
+
+    def load_arrays(self, arrays):
+        """
+        Appends the rows of a dict of columns like the one arrays() returns.
+        """
+        self.seal()
+        count = len(arrays["day"])
+        for start in range(0, count, self.chunk_size):
+            self.add_chunk({
+                name: np.ascontiguousarray(arrays[name][start:start + self.chunk_size], dtype=dtype)
+                for name, dtype in LEDGER_COLUMNS
+            })
+
+    def close(self):
+        """
+        Deletes the spilled chunk files. The ledger is empty afterwards.
+        """
+        self.chunks = []
+        self.rows = []
+        self.sealed_rows = 0
+        if self.spill_path is not None:
+            self.remove_spill_path()
+            self.spill_path = None
+
+    def select(self, where):
+        """
+        Returns the rows for which where(chunk), a boolean mask over the columns of
+        one chunk, is true, as a dict of columns. Only the selected rows are copied.
+        """
+        parts = {name: [] for name, _ in LEDGER_COLUMNS}
+        for chunk in self.iter_chunks():
+            mask = where(chunk)
+            for name, _ in LEDGER_COLUMNS:
+                parts[name].append(chunk[name][mask])
+        return {
+            name: np.concatenate(parts[name]) if parts[name] else np.zeros(0, dtype=dtype)
+            for name, dtype in LEDGER_COLUMNS
+        }
+
+    def shop_transactions(self, shop_id):
+        """
+        Returns the sales of one shop as dicts, in the format of the former ShopAgent.sales_log.
+        """
+        rows = self.select(lambda chunk: chunk["shop"] == shop_id)
+        return [
+            {"day": day, "client_id": client, "product_id": product, "quantity": quantity, "price": price,
+             "quality": quality, "scammed": scammed}
+            for day, client, product, quantity, price, quality, scammed in zip(
+                rows["day"].tolist(), rows["client"].tolist(), rows["product"].tolist(),
+                rows["quantity"].tolist(), rows["price"].tolist(), rows["quality"].tolist(),
+                rows["scammed"].tolist())
+        ]
+
+    def client_history(self, client_id):
+        """
+        Returns the purchases of one client as a dict of columns, oldest first.
+        """
+        return self.select(lambda chunk: chunk["client"] == client_id)
+
+    def revenue_per_shop_per_day(self):
+        """
+        Returns (days, shops, revenue): the days and shop ids with sales, sorted, and
+        a days x shops array of the money taken in. Each chunk is reduced to its
+        (day, shop) sums first, only those are combined.
+        """
+        pairs, totals = [], []
+        for chunk in self.iter_chunks():
+            chunk_pairs, index = np.unique(np.stack([chunk["day"], chunk["shop"]], axis=1), axis=0,
+                                           return_inverse=True)
+            pairs.append(chunk_pairs)
+            totals.append(np.bincount(index.ravel(), weights=chunk["quantity"] * chunk["price"],
+                                      minlength=len(chunk_pairs)))
+        if not pairs:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros((0, 0), dtype=np.float64)
+        pairs = np.concatenate(pairs)
+        days, day_index = np.unique(pairs[:, 0], return_inverse=True)
+        shops, shop_index = np.unique(pairs[:, 1], return_inverse=True)
+        revenue = np.zeros((len(days), len(shops)), dtype=np.float64)
+        np.add.at(revenue, (day_index, shop_index), np.concatenate(totals))
+        return days, shops, revenue
+
+    def scam_rate_per_shop(self):
+        """
+        Returns (shops, rate): the shop ids with sales, sorted, and the share of their
+        sales that were scams. Sales and scams are counted per chunk, then combined.
+        """
+        chunk_shops, chunk_sales, chunk_scams = [], [], []
+        for chunk in self.iter_chunks():
+            shops, shop_index, sales = np.unique(chunk["shop"], return_inverse=True, return_counts=True)
+            chunk_shops.append(shops)
+            chunk_sales.append(sales)
+            chunk_scams.append(np.bincount(shop_index, weights=chunk["scammed"], minlength=len(shops)))
+        if not chunk_shops:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float64)
+        shops, shop_index = np.unique(np.concatenate(chunk_shops), return_inverse=True)
+        sales = np.bincount(shop_index, weights=np.concatenate(chunk_sales), minlength=len(shops))
+        scams = np.bincount(shop_index, weights=np.concatenate(chunk_scams), minlength=len(shops))
+        return shops, scams / sales
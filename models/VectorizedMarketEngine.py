@@ -0,0 +1,358 @@
+import numpy as np
+from agents.ClientAgent import DAILY_NEED_QUANTITIES
+from models.Product import Product
+
+
+class VectorizedMarketEngine:
+    """
+    Struct-of-arrays implementation of a market day.
+
+    The engine is built from the agents of an existing MarketSimulationModel and
+    from then on keeps client money, needs and inventories, and shop stock and
+    prices, in NumPy buffers. Agent objects are only updated on sync_to_agents().
+
+    Deterministic ordering: a day is run in the same order as the object-based
+    agents and draws from the same model.random stream, so for a given seed the
+    per-day aggregates are identical to the "agents" engine:
+      1. replenish needs for all clients (no randomness);
+      2. restock all shops: one randint(30, 150) per product with stock <= 25,
+         shop by shop in model.shops order, products in shelf order;
+      3. adjust prices of all shops;
+      4. take the schedule's activation order (MarketScheduler.permutation,
+         shuffled exactly like RandomActivation.step unless "ordered");
+      5. for each client in that order: one randint(5, 8) per need it buys,
+         shops probed in model.shops order, then two uniform() draws if it
+         can produce. With activation="staged" all clients buy first and the
+         uniform() draws follow for the producers, again in that order. Only
+         the purchases are applied in this loop; production is applied
+         afterwards as a batch, which is equivalent because a client's
+         production only touches its own money and inventory.
+
+    Opinions are exchanged by the model's OpinionNetwork, which is fed the same
+    activation order. The engine requires one: opinion_exchange defaults to
+    "sequential", which shares exactly like ClientAgent, and "agents" is refused.
+    The transaction ledger (model.ledger) is not populated.
+    """
+
+    RESTOCK_THRESHOLD = 25
+    LOW_STOCK_THRESHOLD = 20
+    HIGH_STOCK_THRESHOLD = 100
+
+    def __init__(self, model):
+        self.model = model
+        self.shops = list(model.shops)
+        self.clients = list(model.clients)
+        self.client_index = {client.unique_id: i for i, client in enumerate(self.clients)}
+
+        num_shops = len(self.shops)
+        num_clients = len(self.clients)
+        self.offer_slots = max([len(shop.products) for shop in self.shops] + [1])
+        self.need_slots = max([len(client.product_needs) for client in self.clients] + [1])
+
+        # Shop buffers, one row per shop and one column per shelf slot
+        self.shop_money = np.array([shop.money for shop in self.shops], dtype=np.float64)
+        self.offer_pid = np.full((num_shops, self.offer_slots), -1, dtype=np.int64)
+        self.offer_qty = np.zeros((num_shops, self.offer_slots), dtype=np.int64)
+        self.offer_price = np.zeros((num_shops, self.offer_slots), dtype=np.float64)
+        for s, shop in enumerate(self.shops):
+            for k, product in enumerate(shop.products):
+                self.offer_pid[s, k] = product.product_id
+                self.offer_qty[s, k] = product.quantity
+                self.offer_price[s, k] = product.price
+        self.offer_valid = self.offer_pid >= 0
+
+        # Client buffers, inventories are aligned with the need slots
+        self.client_money = np.array([client.money for client in self.clients], dtype=np.float64)
+        self.need_count = np.array([len(client.product_needs) for client in self.clients], dtype=np.int64)
+        self.need_pid = np.full((num_clients, self.need_slots), -1, dtype=np.int64)
+        self.need_qty = np.zeros((num_clients, self.need_slots), dtype=np.int64)
+        self.inv_qty = np.zeros((num_clients, self.need_slots), dtype=np.int64)
+        self.inv_price = np.zeros((num_clients, self.need_slots), dtype=np.float64)
+        self.inv_present = np.zeros((num_clients, self.need_slots), dtype=bool)
+        # Order in which inventory items were created, used to rebuild the lists on sync
+        self.inv_order = np.full((num_clients, self.need_slots), -1, dtype=np.int64)
+        for c, client in enumerate(self.clients):
+            slot_of = {}
+            for k, need in enumerate(client.product_needs):
+                self.need_pid[c, k] = need.product_id
+                self.need_qty[c, k] = need.quantity
+                self.inv_price[c, k] = need.price
+                slot_of[need.product_id] = k
+            for order, item in enumerate(client.inventory):
+                if item.product_id not in slot_of:
+                    raise ValueError(
+                        f"Client {client.unique_id} holds product {item.product_id} it does not need."
+                    )
+                k = slot_of[item.product_id]
+                self.inv_qty[c, k] = item.quantity
+                self.inv_price[c, k] = item.price
+                self.inv_present[c, k] = True
+                self.inv_order[c, k] = order
+        self.need_valid = self.need_pid >= 0
+        self._next_inv_order = int(self.inv_order.max(initial=-1)) + 1
+
+        # Daily reset table indexed by product id, -1 keeps the current need
+        max_pid = int(max(self.need_pid.max(initial=0), max(DAILY_NEED_QUANTITIES, default=0)))
+        self.replenish_table = np.full(max_pid + 1, -1, dtype=np.int64)
+        for product_id, quantity in DAILY_NEED_QUANTITIES.items():
+            self.replenish_table[product_id] = quantity
+
+        # Flat offer indices (shop * offer_slots + slot) per product id, in model.shops order
+        self.offers_by_product = {}
+        for flat in np.flatnonzero(self.offer_valid.ravel()).tolist():
+            self.offers_by_product.setdefault(int(self.offer_pid.flat[flat]), []).append(flat)
+
+        self.sales_today = 0
+        self.producers_today = 0
+        # Units requested and bought today, indexed by product id
+        self.demand_today = np.zeros(len(self.replenish_table), dtype=np.int64)
+        self.sold_today = np.zeros(len(self.replenish_table), dtype=np.int64)
+        self.take_changed()
+
+    def step(self):
+        phase = self.model.phase
+        num_clients, num_shops = len(self.clients), len(self.shop_money)
+        with phase("replenish_needs", num_clients):
+            self.replenish_needs()
+        with phase("restock_products", num_shops):
+            self.restock_products()
+        with phase("adjust_prices", num_shops):
+            self.adjust_prices()
+        with phase("buy_products", num_clients):
+            order = self.activation_order()
+            produced, margins, surcharges = self.buy_products(order)
+        with phase("produce_product", num_clients):
+            self.produce_products(produced, margins, surcharges)
+        if self.model.opinion_network is not None:
+            with phase("opinion_network", num_clients):
+                self.model.opinion_network.propagate(order)
+
+    def replenish_needs(self):
+        reset = self.replenish_table[np.where(self.need_valid, self.need_pid, 0)]
+        keep = ~self.need_valid | (reset < 0)
+        self.need_qty = np.where(keep, self.need_qty, reset)
+
+    def restock_products(self):
+        due = self.offer_valid & (self.offer_qty <= self.RESTOCK_THRESHOLD)
+        randint = self.model.random.randint
+        # Draws are consumed in row-major order, i.e. shop by shop, shelf by shelf
+        draws = np.zeros(self.offer_qty.shape, dtype=np.int64)
+        draws[due] = [randint(30, 150) for _ in range(int(due.sum()))]
+        cost = draws * self.offer_price * 0.2
+        # A shop pays for its shelves one at a time, so iterate over slots
+        for k in range(self.offer_slots):
+            paid = due[:, k] & (self.shop_money >= cost[:, k])
+            self.offer_qty[:, k] += np.where(paid, draws[:, k], 0)
+            self.shop_money -= np.where(paid, cost[:, k], 0.0)
+
+    def adjust_prices(self):
+        price = self.offer_price
+        price = np.where(self.offer_qty < self.LOW_STOCK_THRESHOLD, price * 1.1, price)
+        price = np.where(self.offer_qty > self.HIGH_STOCK_THRESHOLD, price * 0.9, price)
+        valid = self.offer_valid
+        # Python's round() is correctly rounded while np.round is not, keep the agents' result
+        price[valid] = [round(p, 2) for p in price[valid].tolist()]
+        self.offer_price = np.where(valid, price, 0.0)
+
+    def activation_order(self):
+        schedule = self.model.schedule
+        clients = schedule.clients
+        order = [self.client_index[clients[i].unique_id] for i in schedule.permutation()]
+        schedule.steps += 1
+        schedule.time += 1
+        return order
+
+    def buy_products(self, order):
+        """
+        Runs the purchases of the day in activation order. The probing of shops is
+        inherently sequential (stock taken by one client is gone for the next), so
+        this is the only per-client loop; it works on flat lists instead of objects.
+        """
+        randint = self.model.random.randint
+        uniform = self.model.random.uniform
+        staged = self.model.schedule.activation == "staged"
+        offer_slots = self.offer_slots
+        offers_by_product = self.offers_by_product
+
+        offer_qty = self.offer_qty.ravel().tolist()
+        offer_price = self.offer_price.ravel().tolist()
+        shop_money = self.shop_money.tolist()
+        client_money = self.client_money.tolist()
+        need_count = self.need_count.tolist()
+        need_pid = self.need_pid.tolist()
+        need_qty = self.need_qty.tolist()
+        inv_qty = self.inv_qty.tolist()
+        inv_present = self.inv_present.tolist()
+        inv_order = self.inv_order.tolist()
+        next_inv_order = self._next_inv_order
+
+        produced = np.zeros(len(self.clients), dtype=bool)
+        margins = np.zeros(len(self.clients), dtype=np.float64)
+        surcharges = np.zeros(len(self.clients), dtype=np.float64)
+        demand = [0] * len(self.replenish_table)
+        sold = [0] * len(self.replenish_table)
+        sales = 0
+
+        for c in order:
+            money = client_money[c]
+            pids = need_pid[c]
+            needs = need_qty[c]
+            inventory = inv_qty[c]
+            present = inv_present[c]
+            can_produce = True
+            for k in range(need_count[c]):
+                need = needs[k]
+                if present[k] and inventory[k] >= need * 5:
+                    continue
+                quantity = randint(5, 8) * need
+                demand[pids[k]] += quantity
+                for flat in offers_by_product.get(pids[k], ()):
+                    if offer_qty[flat] < quantity:
+                        continue
+                    cost = offer_price[flat] * quantity
+                    if money >= cost:
+                        money -= cost
+                        shop_money[flat // offer_slots] += cost
+                        offer_qty[flat] -= quantity
+                        inventory[k] += quantity
+                        if not present[k]:
+                            present[k] = True
+                            inv_order[c][k] = next_inv_order
+                            next_inv_order += 1
+                        sold[pids[k]] += quantity
+                        sales += 1
+                        break
+            client_money[c] = money
+
+            for k in range(need_count[c]):
+                if not present[k] or inventory[k] < needs[k]:
+                    can_produce = False
+                    break
+            if can_produce:
+                produced[c] = True
+                if not staged:
+                    margins[c] = uniform(0.8, 0.9)
+                    surcharges[c] = uniform(0.1, 0.3)
+
+        if staged:
+            for c in order:
+                if produced[c]:
+                    margins[c] = uniform(0.8, 0.9)
+                    surcharges[c] = uniform(0.1, 0.3)
+
+        self.offer_qty = np.array(offer_qty, dtype=np.int64).reshape(self.offer_qty.shape)
+        self.shop_money = np.array(shop_money, dtype=np.float64)
+        self.client_money = np.array(client_money, dtype=np.float64)
+        self.inv_qty = np.array(inv_qty, dtype=np.int64).reshape(self.inv_qty.shape)
+        self.inv_present = np.array(inv_present, dtype=bool).reshape(self.inv_present.shape)
+        self.inv_order = np.array(inv_order, dtype=np.int64).reshape(self.inv_order.shape)
+        self._next_inv_order = next_inv_order
+        self.sales_today = sales
+        self.demand_today = np.array(demand, dtype=np.int64)
+        self.sold_today = np.array(sold, dtype=np.int64)
+        return produced, margins, surcharges
+
+    def produce_products(self, produced, margins, surcharges):
+        used = np.where(self.need_valid & produced[:, None], self.need_qty, 0)
+        self.inv_qty -= used
+        # Accumulate slot by slot to keep the agents' summation order
+        total_cost = np.zeros(len(self.clients), dtype=np.float64)
+        for k in range(self.need_slots):
+            total_cost = total_cost + self.inv_price[:, k] * used[:, k]
+        profit = total_cost * margins * (1 + surcharges)
+        self.client_money = np.where(produced, self.client_money + profit, self.client_money)
+        self.producers_today = int(produced.sum())
+
+    def close(self):
+        """
+        Nothing to release, the buffers are plain arrays.
+        """
+
+    def aggregates(self):
+        return {
+            "shop_money": self.shop_money.tolist(),
+            "shop_stock": np.where(self.offer_valid, self.offer_qty, 0).sum(axis=1).tolist(),
+            "client_money": self.client_money.tolist(),
+            "client_inventory": np.where(self.inv_present, self.inv_qty, 0).sum(axis=1).tolist(),
+        }
+
+    def take_changed(self):
+        """
+        Returns the indices of the shops and of the clients whose money, stock,
+        prices or inventory differ from the previous call, like
+        MarketStatistics.take_changed() on the agents engine.
+        """
+        shop_state = (self.shop_money, self.offer_qty, self.offer_price)
+        client_state = (self.client_money, self.inv_qty, self.inv_present)
+        shops = clients = None
+        if getattr(self, "reported", None) is not None:
+            reported_shops, reported_clients = self.reported
+            shops = np.flatnonzero(
+                (shop_state[0] != reported_shops[0])
+                | (shop_state[1] != reported_shops[1]).any(axis=1)
+                | (shop_state[2] != reported_shops[2]).any(axis=1)
+            ).tolist()
+            clients = np.flatnonzero(
+                (client_state[0] != reported_clients[0])
+                | (client_state[1] != reported_clients[1]).any(axis=1)
+                | (client_state[2] != reported_clients[2]).any(axis=1)
+            ).tolist()
+        self.reported = (tuple(array.copy() for array in shop_state), tuple(array.copy() for array in client_state))
+        return shops, clients
+
+    def statistics(self):
+        """
+        The totals of MarketStatistics.snapshot(), computed from the buffers.
+        """
+        stock = np.where(self.offer_valid, self.offer_qty, 0)
+        offered = self.offer_pid[self.offer_valid]
+        supply = np.bincount(offered, weights=stock[self.offer_valid], minlength=len(self.replenish_table))
+        held = np.where(self.inv_present, self.inv_qty, 0)
+        needed = self.need_pid[self.need_valid]
+        starved = np.bincount(self.need_pid[self.need_valid & (held < self.need_qty)],
+                              minlength=len(self.replenish_table))
+        requested = np.flatnonzero(self.demand_today).tolist()
+        return {
+            "shop_stock": dict(zip((shop.unique_id for shop in self.shops), stock.sum(axis=1).tolist())),
+            "supply": {pid: int(supply[pid]) for pid in np.unique(offered).tolist()},
+            "demand": {pid: int(self.demand_today[pid]) for pid in requested},
+            "sold": {pid: int(self.sold_today[pid]) for pid in requested},
+            "starved": {pid: int(starved[pid]) for pid in np.unique(needed).tolist()},
+            "shop_money": float(self.shop_money.sum()),
+            "client_money": float(self.client_money.sum()),
+        }
+
+    def sync_to_agents(self):
+        """
+        Writes the buffers back into the ShopAgent and ClientAgent objects.
+        """
+        for s, shop in enumerate(self.shops):
+            shop.money = float(self.shop_money[s])
+            quantities = self.offer_qty[s].tolist()
+            prices = self.offer_price[s].tolist()
+            for k, product in enumerate(shop.products):
+                product.quantity = quantities[k]
+                product.price = prices[k]
+                shop.stock_changed(product)
+
+        for c, client in enumerate(self.clients):
+            client.money = float(self.client_money[c])
+            needs = self.need_qty[c].tolist()
+            for k, need in enumerate(client.product_needs):
+                need.quantity = needs[k]
+            created = []
+            for k in np.flatnonzero(self.inv_present[c]).tolist():
+                need = client.product_needs[k]
+                item = client.get_inventory_item(need.product_id)
+                if item is None:
+                    item = Product(
+                        product_id=need.product_id,
+                        name=need.name,
+                        quality=0,
+                        price=float(self.inv_price[c, k]),
+                        quantity=0
+                    )
+                    created.append((int(self.inv_order[c, k]), item))
+                item.quantity = int(self.inv_qty[c, k])
+            for _, item in sorted(created, key=lambda entry: entry[0]):
+                client.add_to_inventory(item)
@@ -0,0 +1,34 @@
+import argparse
+import json
+import os
+from experiments.ExperimentRunner import ExperimentRunner
+
+EXAMPLE_GRID = '{"num_clients": [30, 60], "num_shops": [5, 10], "width": 10, "height": 10, "days": 100}'
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run MarketSimulationModel over a parameter grid in parallel.")
+    parser.add_argument("--grid", required=True,
+                        help=f"JSON object or path to a JSON file mapping parameters to value lists, e.g. '{EXAMPLE_GRID}'")
+    parser.add_argument("--replicates", type=int, default=1, help="Runs per parameter combination")
+    parser.add_argument("--seed", type=int, default=0, help="Base seed every run seed is derived from")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--output", default="experiments.jsonl",
+                        help="JSON lines file results are appended to; completed runs in it are skipped")
+    args = parser.parse_args()
+
+    if os.path.exists(args.grid):
+        with open(args.grid) as file:
+            grid = json.load(file)
+    else:
+        grid = json.loads(args.grid)
+
+    runner = ExperimentRunner(grid, replicates=args.replicates, base_seed=args.seed,
+                              workers=args.workers, output=args.output)
+    for result in runner.run():
+        print(f"[{runner.completed}] seed={result['seed']} params={json.dumps(result['params'], sort_keys=True)} "
+              f"shop money={result['shop_money_total']:.2f} client money={result['client_money_total']:.2f} "
+              f"({result['elapsed']:.2f}s)")
+
+    runs_per_second, per_core = runner.throughput()
+    print(f"Completed {runner.completed} runs, skipped {runner.skipped} already in {args.output}")
+    print(f"Throughput: {runs_per_second:.2f} runs/s, {per_core:.2f} runs/s per core ({runner.workers} workers)")
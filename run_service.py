@@ -0,0 +1,38 @@
+"""
+Serves MarketSimulationModel scenarios over HTTP on this machine (see experiments/ScenarioService.py).
+
+Usage:
+    python run_service.py --workers 4
+    curl -X POST localhost:8765/scenarios -d '{"params": {"num_clients": 60, "width": 10, "height": 10, "days": 50}, "seed": 1}'
+    curl -N -X POST localhost:8765/scenarios/stream -d '{"params": {"num_clients": 60, "width": 10, "height": 10, "days": 50}}'
+    curl localhost:8765/health
+"""
+import argparse
+import asyncio
+from experiments.ScenarioService import ScenarioService
+
+
+async def serve(args):
+    service = ScenarioService(host=args.host, port=args.port, workers=args.workers, max_queued=args.max_queued,
+                              cache_size=args.cache_size)
+    await service.start()
+    print(f"Serving scenarios on http://{service.host}:{service.port} with {service.workers} workers")
+    try:
+        await service.serve_forever()
+    finally:
+        await service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--max-queued", type=int, default=64,
+                        help="Scenarios that may wait for a worker before submissions are refused")
+    parser.add_argument("--cache-size", type=int, default=256, help="Finished scenarios kept for repeated requests")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.fixture
+def approx_money():
+    """
+    Wraps market_statistics() so that the money totals, which are running sums,
+    compare equal to the totals of the agents up to rounding.
+    """
+    def wrap(statistics):
+        return dict(statistics, shop_money=pytest.approx(statistics["shop_money"]),
+                    client_money=pytest.approx(statistics["client_money"]))
+    return wrap
@@ -0,0 +1,50 @@
+import pytest
+from models.MarketSimulationModel import MarketSimulationModel
+
+
+@pytest.mark.parametrize("engine", ["agents", "vectorized"])
+def test_resume_from_checkpoint_gives_identical_aggregates(tmp_path, engine, approx_money):
+    path = str(tmp_path / "checkpoint.npz")
+    model = MarketSimulationModel(10, 10, 60, 6, engine=engine, seed=11, verbosity="off", record_metrics=True)
+    for _ in range(5):
+        model.step()
+    model.save_checkpoint(path)
+    resumed = MarketSimulationModel.load_checkpoint(path)
+    for _ in range(5):
+        model.step()
+        resumed.step()
+        assert resumed.daily_aggregates() == model.daily_aggregates()
+    assert resumed.market_statistics() == approx_money(model.market_statistics())
+    assert len(resumed.ledger) == len(model.ledger)
+
+
+def test_resume_restores_opinions_metrics_and_catalog(tmp_path):
+    path = str(tmp_path / "checkpoint.npz")
+    model = MarketSimulationModel(10, 10, 60, 6, seed=7, verbosity="off", record_metrics=True,
+                                  market_mode="clearing", opinion_history="ring")
+    for _ in range(4):
+        model.step()
+    model.clients[0].update_opinion(model.shops[0].unique_id, 1.5, "good")
+    model.save_checkpoint(path)
+    resumed = MarketSimulationModel.load_checkpoint(path)
+    for _ in range(4):
+        model.step()
+        resumed.step()
+
+    def opinions(m):
+        return [(opinion.score, opinion.get_history()) for client in m.clients for opinion in client.opinions.values()]
+    assert opinions(resumed) == opinions(model)
+    assert (resumed.metrics.client_money == model.metrics.client_money).all()
+    assert resumed.product_catalog == model.product_catalog
+
+
+def test_periodic_checkpoints_are_written_and_load(tmp_path):
+    path = str(tmp_path / "checkpoint_day{day}.npz")
+    model = MarketSimulationModel(10, 10, 30, 4, seed=2, verbosity="off", checkpoint_every=3, checkpoint_path=path)
+    for _ in range(7):
+        model.step()
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["checkpoint_day3.npz", "checkpoint_day6.npz"]
+    resumed = MarketSimulationModel.load_checkpoint(path.format(day=6))
+    assert resumed.day_count == 6
+    resumed.step()
+    assert resumed.daily_aggregates() == model.daily_aggregates()
@@ -0,0 +1,53 @@
+from agents.ClientAgent import ClientAgent
+from agents.ShopAgent import ShopAgent
+from models.MarketSimulationModel import MarketSimulationModel
+from models.Product import Product
+
+
+def milk(price, quantity):
+    return Product(product_id=1, name="Milk", quality=8, price=price, quantity=quantity)
+
+
+def market(client_money):
+    model = MarketSimulationModel(4, 4, 0, 0, seed=1, verbosity="off", market_mode="clearing")
+    for unique_id, price in ((0, 2.0), (1, 3.0)):
+        shop = ShopAgent(unique_id=unique_id, model=model)
+        shop.add_product(milk(price, 10))
+        model.shops.append(shop)
+        model.schedule.add(shop)
+    client = ClientAgent(2, model, money=client_money, product_to_sell="Cookies", product_needs=[milk(2.5, 3)])
+    model.clients.append(client)
+    model.schedule.add(client)
+    return model, client
+
+
+def sales(model):
+    rows = model.ledger.arrays()
+    return list(zip(rows["shop"].tolist(), rows["quantity"].tolist(), rows["price"].tolist()))
+
+
+def test_demand_is_split_over_shops_cheapest_first():
+    model, client = market(client_money=1000.0)
+    model.clearing.clear()
+    # daily_demand asks for 5 to 8 times the need of 3 units
+    (cheap, cheap_quantity, _), (dear, dear_quantity, _) = sales(model)
+    assert (cheap, cheap_quantity, dear) == (0, 10, 1)
+    assert 5 <= dear_quantity <= 10
+    assert client.inventory_by_id[1].quantity == 10 + dear_quantity
+
+
+def test_client_buys_what_it_can_afford_and_stops():
+    model, client = market(client_money=25.0)
+    model.clearing.clear()
+    # 10 units at 2.0, then one unit at 3.0 out of the remaining 5.0
+    assert sales(model) == [(0, 10, 2.0), (1, 1, 3.0)]
+    assert client.money == 2.0
+
+
+def test_clearing_never_oversells():
+    model = MarketSimulationModel(14, 14, 150, 4, seed=6, verbosity="off", market_mode="clearing")
+    for _ in range(10):
+        model.step()
+        statistics = model.market_statistics()
+        assert all(product.quantity >= 0 for shop in model.shops for product in shop.products)
+        assert all(statistics["sold"][product_id] <= demand for product_id, demand in statistics["demand"].items())
@@ -0,0 +1,42 @@
+import pytest
+from models.MarketScheduler import ACTIVATION_MODES
+from models.MarketSimulationModel import MarketSimulationModel
+
+
+def run(days, **options):
+    model = MarketSimulationModel(10, 10, 60, 6, seed=3, verbosity="off", **options)
+    try:
+        aggregates = []
+        for _ in range(days):
+            model.step()
+            aggregates.append(model.daily_aggregates())
+        return aggregates, model.market_statistics()
+    finally:
+        model.close()
+
+
+@pytest.mark.parametrize("activation", ACTIVATION_MODES)
+def test_vectorized_engine_matches_agents(activation, approx_money):
+    agents = run(10, engine="agents", activation=activation, opinion_exchange="sequential")
+    vectorized = run(10, engine="vectorized", activation=activation, opinion_exchange="sequential")
+    assert agents[0] == vectorized[0]
+    assert agents[1] == approx_money(vectorized[1])
+
+
+def test_vectorized_engine_shares_opinions_by_default():
+    models = [MarketSimulationModel(10, 10, 60, 6, engine=engine, seed=5, verbosity="off")
+              for engine in ("agents", "vectorized")]
+    scores = []
+    for model in models:
+        for client in model.clients[::3]:
+            client.update_opinion(model.shops[0].unique_id, 2.5, "seeded")
+        for _ in range(5):
+            model.step()
+        scores.append([opinion.score for client in model.clients for opinion in client.opinions.values()])
+    assert models[1].opinion_exchange == "sequential"
+    assert scores[0] == scores[1]
+
+
+def test_array_engines_refuse_agents_opinion_exchange():
+    with pytest.raises(ValueError):
+        MarketSimulationModel(10, 10, 60, 6, engine="vectorized", opinion_exchange="agents", verbosity="off")
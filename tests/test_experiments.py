@@ -0,0 +1,45 @@
+import json
+import os
+from experiments.ExperimentRunner import ExperimentRunner, run_single
+
+GRID = {"num_clients": [10, 20], "days": [3]}
+
+
+def finished_runs(path):
+    runs = []
+    with open(path) as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            runs.append((result["params"]["num_clients"], result["seed"]))
+    return sorted(runs)
+
+
+def test_runner_resumes_and_skips_finished_runs(tmp_path):
+    output = str(tmp_path / "experiments.jsonl")
+    assert len(list(ExperimentRunner(GRID, replicates=2, workers=1, output=output).run())) == 4
+    expected = finished_runs(output)
+
+    again = ExperimentRunner(GRID, replicates=2, workers=1, output=output)
+    assert list(again.run()) == []
+    assert again.skipped == 4
+
+    # Keep one finished run and a line cut short by an interruption
+    with open(output) as file:
+        lines = file.readlines()
+    with open(output, "w") as file:
+        file.write(lines[0] + lines[1][:10])
+    resumed = ExperimentRunner(GRID, replicates=2, workers=1, output=output)
+    assert len(list(resumed.run())) == 3
+    assert resumed.skipped == 1
+    assert finished_runs(output) == expected
+
+
+def test_run_single_closes_the_model(tmp_path):
+    spill = tmp_path / "spill"
+    params = {"width": 6, "height": 6, "num_clients": 20, "num_shops": 3, "days": 3, "verbosity": "off",
+              "ledger_chunk_size": 1, "ledger_spill_directory": str(spill)}
+    assert run_single(params, seed=1)["days"] == 3
+    assert os.listdir(spill) == []
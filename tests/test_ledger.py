@@ -0,0 +1,87 @@
+import gc
+import random
+import numpy as np
+import pytest
+from models.TransactionLedger import TransactionLedger
+
+# (day, shop, client, product, quantity, price, quality, scammed)
+SALES = [
+    (i // 7, rng.randrange(4), rng.randrange(10), rng.randint(1, 5), rng.randint(5, 40),
+     round(rng.uniform(1, 6), 2), rng.randint(6, 9), rng.random() < 0.2)
+    for rng in [random.Random(3)] for i in range(100)
+]
+
+
+def recorded(spill_directory=None):
+    # Chunks of 16 rows: six sealed chunks and a tail of 4 rows not sealed yet
+    ledger = TransactionLedger(chunk_size=16, spill_directory=spill_directory)
+    for sale in SALES:
+        ledger.append(*sale)
+    return ledger
+
+
+@pytest.fixture(params=["memory", "spilled"])
+def ledger(request, tmp_path):
+    ledger = recorded(str(tmp_path) if request.param == "spilled" else None)
+    yield ledger
+    ledger.close()
+
+
+def test_columns_keep_every_sale_in_order(ledger):
+    assert len(ledger) == 100
+    assert len(ledger.chunks) == 6
+    assert ledger.column("quantity").tolist() == [sale[4] for sale in SALES]
+
+
+def test_revenue_per_shop_per_day(ledger):
+    expected = {}
+    for day, shop, _, _, quantity, price, _, _ in SALES:
+        expected[day, shop] = expected.get((day, shop), 0.0) + quantity * price
+    days, shops, revenue = ledger.revenue_per_shop_per_day()
+    assert days.tolist() == sorted({day for day, _ in expected})
+    assert shops.tolist() == sorted({shop for _, shop in expected})
+    for (day, shop), total in expected.items():
+        assert revenue[days.tolist().index(day), shops.tolist().index(shop)] == pytest.approx(total)
+    assert revenue.sum() == pytest.approx(sum(expected.values()))
+
+
+def test_scam_rate_per_shop(ledger):
+    shops, rate = ledger.scam_rate_per_shop()
+    for shop, shop_rate in zip(shops.tolist(), rate.tolist()):
+        scams = [sale[7] for sale in SALES if sale[1] == shop]
+        assert shop_rate == pytest.approx(sum(scams) / len(scams))
+
+
+def test_client_and_shop_queries(ledger):
+    history = ledger.client_history(3)
+    assert history["day"].tolist() == [sale[0] for sale in SALES if sale[2] == 3]
+    transactions = ledger.shop_transactions(2)
+    assert [(sale["client_id"], sale["quantity"]) for sale in transactions] == \
+        [(sale[2], sale[4]) for sale in SALES if sale[1] == 2]
+
+
+def test_empty_ledger_queries():
+    ledger = TransactionLedger()
+    assert [array.shape for array in ledger.revenue_per_shop_per_day()] == [(0,), (0,), (0, 0)]
+    assert ledger.client_history(1)["day"].shape == (0,)
+
+
+def test_spilled_chunks_are_memory_mapped_and_deleted(tmp_path):
+    ledger = recorded(str(tmp_path))
+    assert all(isinstance(chunk["day"], np.memmap) for chunk in ledger.chunks)
+    spill_path = ledger.spill_path
+    ledger.close()
+    assert not (tmp_path / spill_path).exists()
+    assert list(tmp_path.iterdir()) == []
+
+    ledger = recorded(str(tmp_path))
+    del ledger
+    gc.collect()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_select_spans_sealed_and_open_rows(ledger):
+    selected = ledger.select(lambda chunk: chunk["scammed"] & (chunk["price"] > 3))
+    expected = [sale for sale in SALES if sale[7] and sale[5] > 3]
+    assert selected["client"].tolist() == [sale[2] for sale in expected]
+    assert selected["day"].tolist() == [sale[0] for sale in expected]
@@ -0,0 +1,73 @@
+import pytest
+from models.MarketSimulationModel import MarketSimulationModel
+from models.Opinion import Opinion, HISTORY_POLICIES
+
+CHANGES = [(1.5, "good"), (-0.5, "scammed"), (12.0, "great"), (-3.25, "late")]
+
+
+def adjusted(policy, history_size=32):
+    opinion = Opinion(shop_id=1, history=policy, history_size=history_size)
+    for change, reason in CHANGES:
+        opinion.adjust_score(change, reason)
+    return opinion
+
+
+def test_full_history_records_every_change():
+    history = adjusted("full").get_history()
+    assert [entry["reason"] for entry in history] == ["good", "scammed", "great", "late"]
+    assert history[2] == {"previous_score": 1.0, "new_score": 10.0, "change": 12.0, "reason": "great"}
+
+
+@pytest.mark.parametrize("policy", HISTORY_POLICIES)
+def test_every_policy_keeps_the_same_score(policy):
+    assert adjusted(policy).score == adjusted("full").score == 6.75
+
+
+def test_none_keeps_no_history():
+    assert adjusted("none").get_history() == []
+    assert Opinion(shop_id=1, history="ring").get_history() == []
+
+
+def test_ring_keeps_the_last_changes():
+    assert adjusted("ring", history_size=2).get_history() == adjusted("full").get_history()[-2:]
+
+
+def test_compact_keeps_every_change_in_float32():
+    # All values of CHANGES are exact in float32
+    assert adjusted("compact").get_history() == adjusted("full").get_history()
+    opinion = Opinion(shop_id=1, history="compact")
+    opinion.adjust_score(0.1, "good")
+    assert opinion.get_history()[0]["change"] == pytest.approx(0.1, rel=1e-6)
+
+
+@pytest.mark.parametrize("policy", HISTORY_POLICIES)
+def test_load_history_replays_entries(policy):
+    opinion = Opinion(shop_id=1, history=policy, history_size=2)
+    opinion.load_history([(0.0, 1.5, 1.5, "good"), (1.5, 1.0, -0.5, "scammed"), (1.0, 10.0, 12.0, "great")])
+    expected = adjusted("full").get_history()[:3]
+    assert opinion.get_history() == {"full": expected, "none": [], "ring": expected[-2:], "compact": expected}[policy]
+
+
+def test_unknown_policy_is_refused():
+    with pytest.raises(ValueError):
+        Opinion(shop_id=1, history="sometimes")
+
+
+def shared_opinions(opinion_exchange, days=6):
+    model = MarketSimulationModel(10, 10, 60, 6, seed=12, verbosity="off", opinion_exchange=opinion_exchange)
+    for client in model.clients[::4]:
+        client.update_opinion(model.shops[1].unique_id, 3.0, "seeded")
+    for _ in range(days):
+        model.step()
+    return [
+        ({shop_id: (opinion.score, opinion.get_history()) for shop_id, opinion in client.opinions.items()},
+         dict(client.opinion_exchange_count))
+        for client in model.clients
+    ]
+
+
+def test_sequential_network_shares_exactly_like_the_agents():
+    agents = shared_opinions("agents")
+    assert shared_opinions("sequential") == agents
+    # The seeded opinions did spread
+    assert sum(len(counts) for _, counts in agents) > 0
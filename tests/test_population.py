@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from models.MarketSimulationModel import MarketSimulationModel
+from models.Population import POPULATION_ARRAYS, load_population, population_of, save_population
+
+
+def assert_same_population(population, expected):
+    assert set(population) == set(POPULATION_ARRAYS)
+    for name in POPULATION_ARRAYS:
+        assert population[name].dtype == expected[name].dtype, name
+        np.testing.assert_array_equal(population[name], expected[name], err_msg=name)
+
+
+@pytest.mark.parametrize("placement", ["legacy", "bulk"])
+def test_population_survives_export_and_import(tmp_path, placement):
+    model = MarketSimulationModel(12, 12, 80, 6, seed=5, verbosity="off", placement=placement)
+    population = population_of(model)
+    assert population["catalog_quality"].dtype == np.int64
+    path = str(tmp_path / "population.npz")
+    save_population(population, path)
+    loaded = load_population(path)
+    assert_same_population(loaded, population)
+
+    imported = MarketSimulationModel(12, 12, 0, 0, seed=9, verbosity="off", population=path)
+    assert_same_population(population_of(imported), population)
+    assert [shop.pos for shop in imported.shops] == [shop.pos for shop in model.shops]
+    assert [client.pos for client in imported.clients] == [client.pos for client in model.clients]
+    assert all(len(client.opinions) == 6 for client in imported.clients)
+
+
+@pytest.mark.parametrize("placement", ["legacy", "bulk"])
+def test_placement_is_reproducible(placement):
+    first, second = (population_of(MarketSimulationModel(12, 12, 80, 6, seed=5, verbosity="off",
+                                                         placement=placement)) for _ in range(2))
+    assert_same_population(second, first)
+
+
+def test_load_population_rejects_incomplete_files(tmp_path):
+    path = str(tmp_path / "population.npz")
+    np.savez(path, shop_money=np.zeros(2))
+    with pytest.raises(ValueError, match="lacks the arrays"):
+        load_population(path)
@@ -0,0 +1,18 @@
+import random
+from models.MarketSimulationModel import MarketSimulationModel
+
+
+def test_ordered_activation_keeps_insertion_order():
+    model = MarketSimulationModel(10, 10, 20, 3, seed=1, verbosity="off", activation="ordered")
+    state = model.random.getstate()
+    assert model.schedule.permutation() == list(range(20))
+    assert model.random.getstate() == state
+
+
+def test_random_activation_shuffles_like_random_activation():
+    model = MarketSimulationModel(10, 10, 20, 3, seed=1, verbosity="off")
+    expected = list(range(20))
+    rng = random.Random()
+    rng.setstate(model.random.getstate())
+    rng.shuffle(expected)
+    assert model.schedule.permutation() == expected
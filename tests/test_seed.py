@@ -0,0 +1,11 @@
+import re
+from main import main
+
+
+def test_unseeded_run_replays_from_printed_seed(tmp_path, capsys):
+    options = ["--days", "5", "--verbosity", "off", "--log-file", str(tmp_path / "simulation.log")]
+    main(options + ["--output", str(tmp_path / "first")])
+    seed = re.search(r"with seed (\S+) in", capsys.readouterr().out).group(1)
+    main(options + ["--output", str(tmp_path / "replay"), "--seed", seed])
+    for name in ("shops.csv", "clients.csv", "market.jsonl"):
+        assert (tmp_path / "first" / name).read_text() == (tmp_path / "replay" / name).read_text()
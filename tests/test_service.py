@@ -0,0 +1,71 @@
+import asyncio
+import pytest
+from benchmarks.service_benchmark import request
+from experiments.ScenarioService import MAX_SIZES, ScenarioService
+
+SCENARIO = {"params": {"width": 8, "height": 8, "num_clients": 20, "num_shops": 3, "days": 3}, "seed": 4}
+
+
+def with_service(test):
+    async def run():
+        service = ScenarioService(port=0, workers=1)
+        await service.start()
+        try:
+            return await test(service.port)
+        finally:
+            await service.close()
+    return asyncio.run(run())
+
+
+async def send_raw(port, data):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(data)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    writer.close()
+    return status
+
+
+@pytest.mark.parametrize("params", [
+    {"ledger_spill_directory": "/tmp"},
+    {"engine": "sharded"},
+    {"num_clients": MAX_SIZES["num_clients"] + 1},
+    {"days": -1},
+    {"width": True},
+    {"market_mode": "auction"},
+    {"scam_probability": 2},
+])
+def test_invalid_params_are_refused(params):
+    async def test(port):
+        return await request(port, "POST", "/scenarios", {"params": params})
+    status, body = with_service(test)
+    assert status == 400
+    assert "error" in body
+
+
+@pytest.mark.parametrize("length", ["abc", "-5", "+3", "1e3"])
+def test_malformed_content_length_is_refused(length):
+    async def test(port):
+        return await send_raw(port, f"POST /scenarios HTTP/1.1\r\nContent-Length: {length}\r\n\r\n{{}}".encode())
+    assert with_service(test) == 400
+
+
+def test_oversized_body_is_refused():
+    async def test(port):
+        return await send_raw(port, b"POST /scenarios HTTP/1.1\r\nContent-Length: 99999999\r\n\r\n")
+    assert with_service(test) == 413
+
+
+def test_finished_scenario_is_replayed_from_the_cache():
+    async def test(port):
+        first = await request(port, "POST", "/scenarios/stream", SCENARIO)
+        second = await request(port, "POST", "/scenarios", SCENARIO)
+        replay = await request(port, "POST", "/scenarios/stream", SCENARIO)
+        return first, second, replay
+    (status, events), (cached_status, summary), (_, replay) = with_service(test)
+    assert status == 200
+    assert [event for _, event, _ in events] == ["day"] * 3 + ["result"]
+    assert [data["day"] for _, event, data in events if event == "day"] == [1, 2, 3]
+    assert cached_status == 200
+    assert summary["cached"] and summary["status"] == "finished" and summary["days"] == 3
+    assert [(event, data) for _, event, data in replay] == [(event, data) for _, event, data in events]
@@ -0,0 +1,31 @@
+import pytest
+from models.MarketSimulationModel import MarketSimulationModel
+
+
+def run(days, seed, workers):
+    model = MarketSimulationModel(10, 10, 60, 6, engine="sharded", workers=workers, seed=seed, verbosity="off")
+    try:
+        aggregates = []
+        for _ in range(days):
+            model.step()
+            aggregates.append(model.daily_aggregates())
+        opinions = [opinion.score for client in model.clients for opinion in client.opinions.values()]
+        return aggregates, model.market_statistics(), opinions
+    finally:
+        model.close()
+
+
+def test_sharded_engine_is_deterministic():
+    assert run(8, seed=3, workers=2) == run(8, seed=3, workers=2)
+
+
+def test_sharded_engine_depends_on_seed():
+    assert run(4, seed=3, workers=2)[0] != run(4, seed=4, workers=2)[0]
+
+
+def test_sharded_engine_shares_opinions_batched():
+    model = MarketSimulationModel(10, 10, 60, 6, engine="sharded", workers=2, seed=3, verbosity="off")
+    model.close()
+    assert model.opinion_exchange == "batched"
+    with pytest.raises(ValueError):
+        MarketSimulationModel(10, 10, 60, 6, engine="sharded", opinion_exchange="sequential", verbosity="off")
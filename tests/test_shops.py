@@ -0,0 +1,31 @@
+from agents.ShopAgent import ShopAgent
+from models.MarketSimulationModel import MarketSimulationModel
+
+
+def run(days, market_mode):
+    model = MarketSimulationModel(12, 12, 80, 6, seed=8, verbosity="off", market_mode=market_mode)
+    days_seen = []
+    for _ in range(days):
+        model.step()
+        prices = [[product.price for product in shop.products] for shop in model.shops]
+        days_seen.append((model.daily_aggregates(), prices))
+    return days_seen, model.random.getstate()
+
+
+def scan_every_shelf(method):
+    # The former behaviour: every shelf of every shop is visited every day
+    def scanning(self):
+        self.restock_due.update(range(len(self.products)))
+        self.reprice_due.update(range(len(self.products)))
+        method(self)
+    return scanning
+
+
+def test_event_driven_restock_and_reprice_match_a_daily_scan(monkeypatch):
+    for market_mode in ("sequential", "clearing"):
+        marked = run(20, market_mode)
+        with monkeypatch.context() as patch:
+            patch.setattr(ShopAgent, "restock_products", scan_every_shelf(ShopAgent.restock_products))
+            patch.setattr(ShopAgent, "adjust_prices", scan_every_shelf(ShopAgent.adjust_prices))
+            scanned = run(20, market_mode)
+        assert marked == scanned
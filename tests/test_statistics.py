@@ -0,0 +1,61 @@
+import pytest
+from agents.ClientAgent import ClientAgent
+from agents.ShopAgent import ShopAgent
+from models.MarketSimulationModel import MarketSimulationModel
+from models.Product import Product
+
+
+def recount(model):
+    supply, starved = {}, {}
+    for shop in model.shops:
+        for product in shop.products:
+            supply[product.product_id] = supply.get(product.product_id, 0) + product.quantity
+    for client in model.clients:
+        for need in client.product_needs:
+            item = client.inventory_by_id.get(need.product_id)
+            starved[need.product_id] = starved.get(need.product_id, 0) + (item is None or item.quantity < need.quantity)
+    return {
+        "shop_stock": {shop.unique_id: sum(p.quantity for p in shop.products) for shop in model.shops},
+        "supply": supply,
+        "starved": starved,
+        "shop_money": pytest.approx(sum(shop.money for shop in model.shops)),
+        "client_money": pytest.approx(sum(client.money for client in model.clients)),
+    }
+
+
+@pytest.mark.parametrize("market_mode", ["sequential", "clearing"])
+def test_running_statistics_match_a_recount(market_mode):
+    model = MarketSimulationModel(12, 12, 80, 6, seed=4, verbosity="off", market_mode=market_mode)
+    for _ in range(8):
+        model.step()
+        statistics = model.market_statistics()
+        assert {name: statistics[name] for name in recount(model)} == recount(model)
+
+
+def test_agents_added_after_construction_are_counted():
+    model = MarketSimulationModel(6, 6, 10, 2, seed=1, verbosity="off")
+    shop = ShopAgent(unique_id=100, model=model)
+    shop.add_product(Product(product_id=1, name="Milk", quality=8, price=2.5, quantity=40))
+    model.schedule.add(shop)
+    model.shops.append(shop)
+    assert model.market_statistics()["shop_stock"][100] == 40
+    for _ in range(3):
+        model.step()
+        statistics = model.market_statistics()
+        assert {name: statistics[name] for name in recount(model)} == recount(model)
+
+
+def test_unscheduled_agents_can_trade():
+    # Like benchmarks/product_lookup_benchmark.py: agents the statistics never saw
+    model = MarketSimulationModel(2, 2, 0, 1, seed=0, verbosity="off")
+    shop = ShopAgent(unique_id=10_000, model=model)
+    shop.add_product(Product(product_id=7, name="SKU 7", quality=5, price=1.0, quantity=10))
+    client = ClientAgent(10_001, model, money=100.0, product_to_sell="Cookies",
+                         product_needs=[Product(product_id=7, name="SKU 7", quality=5, price=1.0, quantity=1)])
+    assert shop.sell_product(client, 7, 3)
+    client.receive_product(client.product_needs[0], 3)
+    client.produce_product()
+    assert shop.products_by_id[7].quantity == 7
+    assert client.inventory_by_id[7].quantity == 2
+    # Both products share one catalog entry
+    assert shop.products_by_id[7].catalog is client.product_needs[0].catalog